@@ -2,9 +2,10 @@
 # Compatibility fix for Python 3.10+ must be imported FIRST
 import compatibility
 
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template, send_from_directory, request, session, jsonify, url_for
 import os
 import atexit
+import click
 import logging
 from dotenv import load_dotenv
 
@@ -13,9 +14,35 @@ from routes.authentication import init_auth_routes
 from routes.converter import init_converter_routes
 from routes.pdf_editor import init_pdf_editor_routes
 from routes.utility import init_utility_routes
+from routes.jobs import init_job_routes
+from routes.chunked_upload import init_chunked_upload_routes
+
+# Import LibreOffice pool for Word to PDF
+from office_pool import start_office_pool, shutdown_office_pool
+
+# Import result cache for repeated operations on the same input
+from result_cache import init_result_cache, get_result_cache
+
+# Import background job queue for long conversions
+from job_queue import start_job_queue, shutdown_job_queue, submit_job, get_job, job_result
+
+# Import the batched conversion history writer
+from conversion_log import start_conversion_log, stop_conversion_log, get_conversion_log_stats
+
+# Import single-pass upload handling
+from uploads import StreamingRequest, ChunkedUpload, UploadLimitExceeded, save_upload
+
+# Import downloads with ETags, ranges and front-end offload
+from downloads import send_download, stream_download
+
+# Import process pools shared by requests, and settings defined only in config.py
+from process_pools import shutdown_process_pools
+from config import Config
 
 # Import database modules
-from database import get_db_connection, init_db, init_users_table, migrate_users_column
+from database import (
+    get_db_connection, release_db_connection, get_db_stats, check_schema, run_migrations
+)
 
 # Import security functions
 from security import (
@@ -32,12 +59,12 @@ from security import (
 )
 
 # Import forms
-from forms import UploadFileForm as UploadForm, EncryptPDFForm, DecryptPDFForm, WatermarkPDFForm, RotatePDFForm, RegisterForm, LoginForm
+from forms import UploadFileForm as UploadForm, EncryptPDFForm, DecryptPDFForm, WatermarkPDFForm, RotatePDFForm, RegisterForm, LoginForm, BatchCryptoForm
 
 # Import converter and PDF operations
 # Import converter and PDF operations
 from converter_ops import convert_file, log_conversion
-from pdf_ops import PDFOperations, EncryptOps, DecryptOps, WatermarkOps, RotateOps
+from pdf_ops import PDFOperations, EncryptOps, DecryptOps, WatermarkOps, RotateOps, BatchCryptoOps
 
 # Configure logging
 logging.basicConfig(
@@ -50,6 +77,8 @@ load_dotenv()
 
 # Create Flask app
 app = Flask(__name__)
+# Validate and hash uploads while the form parser writes them
+app.request_class = StreamingRequest
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(24).hex())
@@ -66,13 +95,66 @@ app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_SIZE', 40)) * 1024
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['STREAM_SPLIT_ZIP'] = os.getenv('STREAM_SPLIT_ZIP', 'true').lower() == 'true'
+app.config['SPLIT_WORKERS'] = Config.SPLIT_WORKERS
+app.config['SPLIT_CHUNK_PAGES'] = int(os.getenv('SPLIT_CHUNK_PAGES', 50))
+app.config['SPLIT_PARALLEL_MIN_PAGES'] = int(os.getenv('SPLIT_PARALLEL_MIN_PAGES', 200))
+app.config['MERGE_STREAMING_THRESHOLD_MB'] = int(os.getenv('MERGE_STREAMING_THRESHOLD_MB', 100))
+app.config['MERGE_MEMORY_BUDGET_MB'] = int(os.getenv('MERGE_MEMORY_BUDGET_MB', 256))
+app.config['MERGE_UPLOAD_WORKERS'] = int(os.getenv('MERGE_UPLOAD_WORKERS', 8))
+app.config['CRYPTO_WORKERS'] = Config.CRYPTO_WORKERS
+app.config['LIBREOFFICE_PATH'] = os.getenv('LIBREOFFICE_PATH')
+app.config['WORD_TO_PDF_POOL'] = Config.WORD_TO_PDF_POOL
+app.config['WORD_TO_PDF_POOL_SIZE'] = int(os.getenv('WORD_TO_PDF_POOL_SIZE', 2))
+app.config['WORD_TO_PDF_TIMEOUT'] = int(os.getenv('WORD_TO_PDF_TIMEOUT', 120))
+app.config['WORD_TO_PDF_HEALTH_INTERVAL'] = int(os.getenv('WORD_TO_PDF_HEALTH_INTERVAL', 30))
+
+# Results live outside UPLOAD_FOLDER, which is emptied at shutdown
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', 'result_cache')
+if not os.path.isabs(RESULT_CACHE_DIR):
+    RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), RESULT_CACHE_DIR)
+app.config['RESULT_CACHE_DIR'] = RESULT_CACHE_DIR
+app.config['RESULT_CACHE_MAX_MB'] = int(os.getenv('RESULT_CACHE_MAX_MB', 512))
+# Background jobs per operation type, e.g. 'pdf-to-word=1,csv-to-pdf=2'; others use the default
+app.config['JOB_CONCURRENCY'] = os.getenv('JOB_CONCURRENCY', 'pdf-to-word=1,word-to-pdf=2,csv-to-pdf=1')
+app.config['JOB_DEFAULT_CONCURRENCY'] = int(os.getenv('JOB_DEFAULT_CONCURRENCY', 2))
+# Hours a finished job's result stays downloadable
+app.config['JOB_RESULT_HOURS'] = int(os.getenv('JOB_RESULT_HOURS', 24))
+# Resumable uploads: largest file, and the chunk size suggested to clients
+app.config['CHUNKED_UPLOAD_MAX_MB'] = int(os.getenv('CHUNKED_UPLOAD_MAX_MB', 500))
+app.config['CHUNKED_UPLOAD_CHUNK_MB'] = int(os.getenv('CHUNKED_UPLOAD_CHUNK_MB', 8))
+# Open resumable uploads each reserve their full size: per user or session, then across the server
+app.config['CHUNKED_UPLOAD_MAX_PER_OWNER'] = int(os.getenv('CHUNKED_UPLOAD_MAX_PER_OWNER', 3))
+app.config['CHUNKED_UPLOAD_MAX_OWNER_MB'] = int(os.getenv('CHUNKED_UPLOAD_MAX_OWNER_MB', 1024))
+app.config['CHUNKED_UPLOAD_MAX_OPEN'] = int(os.getenv('CHUNKED_UPLOAD_MAX_OPEN', 50))
+app.config['CHUNKED_UPLOAD_MAX_RESERVED_MB'] = int(os.getenv('CHUNKED_UPLOAD_MAX_RESERVED_MB', 10240))
+# Let the front-end server send download bytes: '' (off), 'x-accel' (nginx) or 'x-sendfile'
+app.config['DOWNLOAD_OFFLOAD'] = os.getenv('DOWNLOAD_OFFLOAD', '').lower()
+app.config['DOWNLOAD_ACCEL_PREFIX'] = os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
+
+# Migrate an outdated schema at startup under SQLite's write lock, rather than only via the CLI
+app.config['SCHEMA_AUTO_MIGRATE'] = os.getenv('SCHEMA_AUTO_MIGRATE', 'true').lower() == 'true'
+
+# Conversion history rows per page
+app.config['HISTORY_PAGE_SIZE'] = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+
+# Batched conversion history writes: rows per batch (1 writes directly), flush interval, queue bound
+app.config['CONVERSION_LOG_BATCH_SIZE'] = int(os.getenv('CONVERSION_LOG_BATCH_SIZE', 100))
+app.config['CONVERSION_LOG_FLUSH_MS'] = int(os.getenv('CONVERSION_LOG_FLUSH_MS', 500))
+app.config['CONVERSION_LOG_QUEUE_SIZE'] = int(os.getenv('CONVERSION_LOG_QUEUE_SIZE', 10000))
 
 # Use security module extension sets
 ALLOWED_EXTENSIONS = CONVERTER_EXTENSIONS
 
 
 def cleanup_uploads():
-    """Clean up old upload files on shutdown"""
+    """
+    Clean up old upload files on shutdown.
+
+    Only files directly in UPLOAD_FOLDER are removed. Its subdirectories hold
+    resumable uploads and job results, which outlive a worker process and
+    expire on their own.
+    """
     try:
         if os.path.exists(app.config['UPLOAD_FOLDER']):
             for filename in os.listdir(app.config['UPLOAD_FOLDER']):
@@ -90,12 +172,37 @@ def cleanup_uploads():
 # Register cleanup function to run at shutdown
 atexit.register(cleanup_uploads)
 
+# Requests share one pooled connection, returned to the pool at teardown
+app.teardown_appcontext(release_db_connection)
+
+# Check the database schema; with SCHEMA_AUTO_MIGRATE off, migrations only run through 'flask --app app migrate'
+# Runs before the services below, which read and write their tables
+check_schema(app.config['SCHEMA_AUTO_MIGRATE'])
+
+# LibreOffice workers for Word to PDF where Microsoft Word is unavailable, started per worker process on first use
+start_office_pool(app.config)
+atexit.register(shutdown_office_pool)
+
+# Serve repeated operations on identical inputs from disk
+init_result_cache(app.config)
+
+# Record conversion history in batches; registered first so it stops after the job queue
+start_conversion_log(app.config)
+atexit.register(stop_conversion_log)
+
+# Worker processes for parallel splits, CSV rendering, batch crypto and PDF to Word, started on first use;
+# registered before the job queue so they stop after it
+atexit.register(shutdown_process_pools)
+
+# Run long conversions in the background when the client asks for it
+start_job_queue(app.config)
+atexit.register(shutdown_job_queue)
 
-# Initialize Database
-with app.app_context():
-    init_db()
-    init_users_table()
-    migrate_users_column()
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending database migrations"""
+    click.echo(f"Database schema is at version {run_migrations()}")
 
 
 # Create wrapper functions for PDF operations with app config
@@ -104,9 +211,74 @@ def split_pdf(pdf_path, start_page=None, end_page=None):
     return PDFOperations.split_pdf(pdf_path, app.config, start_page, end_page)
 
 
-def merge_pdfs(pdf_files):
+def split_pdf_stream(pdf_path, start_page=None, end_page=None):
+    """Wrapper for streamed PDF split, sharing cached results with split_pdf"""
+    cache = get_result_cache()
+    if cache is None:
+        return PDFOperations.split_pdf_stream(pdf_path, app.config, start_page, end_page)
+
+    key = cache.make_key('split_pdf', [pdf_path], {'start_page': start_page, 'end_page': end_page})
+    zip_path = cache.restore(key, output_dir=app.config['UPLOAD_FOLDER'])
+    if zip_path:
+        def read_cached():
+            with open(zip_path, 'rb') as f:
+                yield from iter(lambda: f.read(1024 * 1024), b'')
+        return zip_path, read_cached()
+
+    result = PDFOperations.split_pdf_stream(pdf_path, app.config, start_page, end_page)
+    if result is None:
+        return None
+    zip_path, chunks = result
+
+    def generate_and_store():
+        yield from chunks
+        # Only a ZIP that streamed to the end is complete enough to cache
+        cache.store(key, zip_path)
+    return zip_path, generate_and_store()
+
+
+def split_pdf_ranges(pdf_path, range_spec=None, every_pages=None, max_chunk_mb=None):
+    """Wrapper for multi-range PDF split"""
+    return PDFOperations.split_pdf_ranges(pdf_path, app.config, range_spec, every_pages, max_chunk_mb)
+
+
+def merge_pdfs(pdf_files, deduplicate=False, readers=None):
     """Wrapper for PDF merge"""
-    return PDFOperations.merge_pdfs(pdf_files, app.config)
+    return PDFOperations.merge_pdfs(pdf_files, app.config, deduplicate, readers)
+
+
+def queue_job(conversion_type, work, filename):
+    """Queue work as a background job and answer 202 with the job status URL"""
+    user_id = session.get('user_id')
+    job_id = submit_job(
+        conversion_type, work, filename, user_id,
+        on_success=lambda output_path: log_conversion(filename, conversion_type, output_path, user_id)
+    )
+    status_url = url_for('job_status', job_id=job_id)
+    return jsonify(job_id=job_id, status='queued', status_url=status_url), 202, {'Location': status_url}
+
+
+def respond_async(conversion_type, work, filename):
+    """
+    Queue work as a background job when the client asked for an asynchronous response.
+
+    Clients opt in with an 'async' form field or a 'Prefer: respond-async'
+    header. Returns the 202 response from queue_job, or None when the route
+    should run work itself.
+    """
+    if not (request.form.get('async') or 'respond-async' in request.headers.get('Prefer', '')):
+        return None
+    return queue_job(conversion_type, work, filename)
+
+
+def collect_stats():
+    """Connection pool, lock-wait, conversion log and result cache counters for /stats"""
+    cache = get_result_cache()
+    return {
+        'database': get_db_stats(),
+        'conversion_log': get_conversion_log_stats(),
+        'result_cache': cache.stats() if cache else None,
+    }
 
 
 # Initialize all routes
@@ -114,17 +286,27 @@ init_auth_routes(app, get_db_connection, RegisterForm, LoginForm)
 
 init_converter_routes(
     app, UploadForm, allowed_file, validate_upload_path, validate_file_size,
-    is_valid_pdf, CONVERTER_EXTENSIONS, convert_file, log_conversion
+    is_valid_pdf, CONVERTER_EXTENSIONS, convert_file, log_conversion, IMAGE_EXTENSIONS, respond_async,
+    save_upload, send_download
 )
 
 init_pdf_editor_routes(
     app, get_db_connection, UploadForm, EncryptPDFForm, DecryptPDFForm,
     allowed_file, validate_upload_path, validate_file_size, is_valid_pdf,
     PDF_EDITOR_EXTENSIONS, split_pdf, merge_pdfs, convert_file, log_conversion,
-    EncryptOps, DecryptOps, WatermarkOps, WatermarkPDFForm, RotateOps, RotatePDFForm
+    EncryptOps, DecryptOps, WatermarkOps, WatermarkPDFForm, RotateOps, RotatePDFForm,
+    split_pdf_stream, split_pdf_ranges, PDFOperations.preparse_pdf, BatchCryptoOps, BatchCryptoForm,
+    respond_async, save_upload, send_download, stream_download
 )
 
-init_utility_routes(app, get_db_connection)
+init_utility_routes(app, get_db_connection, send_download, collect_stats)
+
+init_job_routes(app, get_job, job_result, send_download)
+
+init_chunked_upload_routes(
+    app, allowed_file, validate_upload_path, CONVERTER_EXTENSIONS, ChunkedUpload, UploadLimitExceeded,
+    convert_file, split_pdf, queue_job
+)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Benchmarks for DocEase PDF operations
+
+Usage:
+    python benchmarks.py split --pages 1000 --workers 1,2,4,8
+    python benchmarks.py clone --pages 1000
+    python benchmarks.py watermark --pages 2000
+    python benchmarks.py csv --rows 100000 --workers 1,2,4
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import random
+import resource
+import tempfile
+import time
+
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from pdf_ops import PDFOperations, WatermarkOps, CSVToPDFOps, _copy_document
+from process_pools import shutdown_process_pools
+
+logger = logging.getLogger(__name__)
+
+
+def make_sample_pdf(path, pages):
+    """Write a synthetic PDF with one line of text per page"""
+    c = canvas.Canvas(path, pagesize=A4)
+    for page_num in range(pages):
+        c.setFont("Helvetica", 24)
+        c.drawString(72, 720, f"DocEase benchmark page {page_num + 1}")
+        c.showPage()
+    c.save()
+
+
+def bench_split(pages, worker_counts, chunk_pages):
+    """Time split_pdf over the whole document for each worker count"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, "bench.pdf")
+        make_sample_pdf(pdf_path, pages)
+
+        print(f"split_pdf: {pages} pages, chunk size {chunk_pages}, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>10} {'pages/s':>10} {'speedup':>8}")
+
+        baseline = None
+        for workers in worker_counts:
+            app_config = {
+                'UPLOAD_FOLDER': work_dir,
+                'SPLIT_WORKERS': workers,
+                'SPLIT_CHUNK_PAGES': chunk_pages,
+                'SPLIT_PARALLEL_MIN_PAGES': 0,
+            }
+            # The split pool is shared and sized on first use; start each worker count afresh
+            shutdown_process_pools()
+            started = time.perf_counter()
+            zip_path = PDFOperations.split_pdf(pdf_path, app_config)
+            elapsed = time.perf_counter() - started
+            if not zip_path:
+                print(f"{workers:>8} {'failed':>10}")
+                continue
+            os.remove(zip_path)
+
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.3f} {pages / elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+
+
+def _copy_page_loop(reader):
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    return writer
+
+
+def _copy_clone_from_reader(reader):
+    writer = PdfWriter()
+    writer.clone_document_from_reader(reader)
+    return writer
+
+
+def bench_clone(pages):
+    """Time the document copy used by encrypt, decrypt, rotate and watermark against the alternatives"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, "bench.pdf")
+        make_sample_pdf(pdf_path, pages)
+
+        print(f"document copy and write: {pages} pages")
+        print(f"{'strategy':>26} {'copy s':>10} {'write s':>10} {'total s':>10}")
+
+        strategies = (
+            ("add_page loop", _copy_page_loop),
+            ("append (_copy_document)", _copy_document),
+            ("clone_document_from_reader", _copy_clone_from_reader),
+        )
+        for name, copy in strategies:
+            reader = PdfReader(pdf_path)
+            started = time.perf_counter()
+            writer = copy(reader)
+            copied = time.perf_counter() - started
+            writer.write(io.BytesIO())
+            total = time.perf_counter() - started
+            print(f"{name:>26} {copied:>10.3f} {total - copied:>10.3f} {total:>10.3f}")
+
+
+def bench_watermark(pages):
+    """Compare per-page content merge with a shared Form XObject stamp"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_path = os.path.join(work_dir, "bench.pdf")
+        output_path = os.path.join(work_dir, "output.pdf")
+        make_sample_pdf(pdf_path, pages)
+
+        print(f"watermark: {pages} pages")
+        print(f"{'mode':>10} {'seconds':>10} {'ms/page':>10} {'output KB':>10}")
+
+        for name, shared_stamp in (("merge", False), ("xobject", True)):
+            started = time.perf_counter()
+            WatermarkOps.add_text_watermark(pdf_path, output_path, "BENCH", shared_stamp=shared_stamp)
+            elapsed = time.perf_counter() - started
+            size_kb = os.path.getsize(output_path) / 1024
+            print(f"{name:>10} {elapsed:>10.3f} {elapsed * 1000 / pages:>10.3f} {size_kb:>10.1f}")
+
+
+def make_sample_csv(path, rows):
+    """Write a synthetic export with short columns and one free-text column"""
+    words = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda".split()
+    rng = random.Random(0)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "email", "description", "amount", "date"])
+        for row_num in range(rows):
+            writer.writerow([
+                row_num,
+                f"Customer {row_num}",
+                f"user{row_num}@example.com",
+                " ".join(rng.choices(words, k=rng.randint(1, 40))),
+                f"{rng.random() * 1000:.2f}",
+                "2024-01-01",
+            ])
+
+
+def bench_csv(rows, worker_counts):
+    """Time CSV to PDF conversion for each worker count and report throughput"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = os.path.join(work_dir, "bench.csv")
+        pdf_path = os.path.join(work_dir, "bench.pdf")
+        make_sample_csv(csv_path, rows)
+
+        print(f"csv-to-pdf: {rows} rows, {os.path.getsize(csv_path) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>10} {'rows/s':>10} {'speedup':>8}")
+
+        baseline = None
+        for workers in worker_counts:
+            # The CSV pool is shared and sized on first use; start each worker count afresh
+            shutdown_process_pools()
+            started = time.perf_counter()
+            CSVToPDFOps.convert(csv_path, pdf_path, workers=workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.3f} {rows / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"peak RSS of the calling process: {peak_mb:.0f} MB")
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DocEase benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    split_parser = subparsers.add_parser("split", help="Serial vs process-pool PDF split")
+    split_parser.add_argument("--pages", type=int, default=1000)
+    split_parser.add_argument("--workers", type=parse_int_list, default=[1, 2, 4, 8])
+    split_parser.add_argument("--chunk-pages", type=int, default=50)
+
+    clone_parser = subparsers.add_parser("clone", help="Document copy strategies for single-document operations")
+    clone_parser.add_argument("--pages", type=int, default=1000)
+
+    watermark_parser = subparsers.add_parser("watermark", help="Merged vs shared Form XObject watermark")
+    watermark_parser.add_argument("--pages", type=int, default=2000)
+
+    csv_parser = subparsers.add_parser("csv", help="CSV to PDF table rendering")
+    csv_parser.add_argument("--rows", type=int, default=100000)
+    csv_parser.add_argument("--workers", type=parse_int_list, default=[1, 2, 4])
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.benchmark == "split":
+        bench_split(args.pages, args.workers, args.chunk_pages)
+    elif args.benchmark == "clone":
+        bench_clone(args.pages)
+    elif args.benchmark == "watermark":
+        bench_watermark(args.pages)
+    elif args.benchmark == "csv":
+        bench_csv(args.rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
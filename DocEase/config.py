@@ -20,6 +20,60 @@ class Config:
     # File upload settings
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc', 'jpg', 'jpeg', 'png'}
     
+    # PDF split and merge settings
+    STREAM_SPLIT_ZIP = os.getenv('STREAM_SPLIT_ZIP', 'true').lower() == 'true'
+    # Processes in the split pool shared by all requests of an app process; 1 splits on the request thread
+    SPLIT_WORKERS = int(os.getenv('SPLIT_WORKERS', min(2, os.cpu_count() or 1)))
+    SPLIT_CHUNK_PAGES = int(os.getenv('SPLIT_CHUNK_PAGES', 50))
+    SPLIT_PARALLEL_MIN_PAGES = int(os.getenv('SPLIT_PARALLEL_MIN_PAGES', 200))
+    MERGE_STREAMING_THRESHOLD_MB = int(os.getenv('MERGE_STREAMING_THRESHOLD_MB', 100))
+    MERGE_MEMORY_BUDGET_MB = int(os.getenv('MERGE_MEMORY_BUDGET_MB', 256))
+    MERGE_UPLOAD_WORKERS = int(os.getenv('MERGE_UPLOAD_WORKERS', 8))
+    # Processes in the batch encrypt/decrypt pool shared by all requests of an app process
+    CRYPTO_WORKERS = int(os.getenv('CRYPTO_WORKERS', min(2, os.cpu_count() or 1)))
+
+    # Word to PDF through headless LibreOffice; the warm UNO pool is opt-in, else each file starts a one-off soffice
+    LIBREOFFICE_PATH = os.getenv('LIBREOFFICE_PATH')
+    WORD_TO_PDF_POOL = os.getenv('WORD_TO_PDF_POOL', 'false').lower() == 'true'
+    WORD_TO_PDF_POOL_SIZE = int(os.getenv('WORD_TO_PDF_POOL_SIZE', 2))
+    WORD_TO_PDF_TIMEOUT = int(os.getenv('WORD_TO_PDF_TIMEOUT', 120))
+    WORD_TO_PDF_HEALTH_INTERVAL = int(os.getenv('WORD_TO_PDF_HEALTH_INTERVAL', 30))
+
+    # On-disk cache of operation results keyed by input hash and parameters (0 MB disables it)
+    RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', 'result_cache')
+    RESULT_CACHE_MAX_MB = int(os.getenv('RESULT_CACHE_MAX_MB', 512))
+
+    # Background jobs per operation type, e.g. 'pdf-to-word=1,csv-to-pdf=2'; others use the default
+    JOB_CONCURRENCY = os.getenv('JOB_CONCURRENCY', 'pdf-to-word=1,word-to-pdf=2,csv-to-pdf=1')
+    JOB_DEFAULT_CONCURRENCY = int(os.getenv('JOB_DEFAULT_CONCURRENCY', 2))
+    # Hours a finished job's result stays downloadable
+    JOB_RESULT_HOURS = int(os.getenv('JOB_RESULT_HOURS', 24))
+
+    # Resumable chunked uploads: largest file, and the chunk size suggested to clients
+    CHUNKED_UPLOAD_MAX_MB = int(os.getenv('CHUNKED_UPLOAD_MAX_MB', 500))
+    CHUNKED_UPLOAD_CHUNK_MB = int(os.getenv('CHUNKED_UPLOAD_CHUNK_MB', 8))
+    # Open resumable uploads each reserve their full size: per user or session, then across the server
+    CHUNKED_UPLOAD_MAX_PER_OWNER = int(os.getenv('CHUNKED_UPLOAD_MAX_PER_OWNER', 3))
+    CHUNKED_UPLOAD_MAX_OWNER_MB = int(os.getenv('CHUNKED_UPLOAD_MAX_OWNER_MB', 1024))
+    CHUNKED_UPLOAD_MAX_OPEN = int(os.getenv('CHUNKED_UPLOAD_MAX_OPEN', 50))
+    CHUNKED_UPLOAD_MAX_RESERVED_MB = int(os.getenv('CHUNKED_UPLOAD_MAX_RESERVED_MB', 10240))
+
+    # Let the front-end server send download bytes: '' (off), 'x-accel' (nginx) or 'x-sendfile'
+    DOWNLOAD_OFFLOAD = os.getenv('DOWNLOAD_OFFLOAD', '').lower()
+    DOWNLOAD_ACCEL_PREFIX = os.getenv('DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
+
+    # Migrate an outdated schema at startup; turn off when 'flask --app app migrate' runs at deploy time
+    SCHEMA_AUTO_MIGRATE = os.getenv('SCHEMA_AUTO_MIGRATE', 'true').lower() == 'true'
+
+    # Conversion history rows per page
+    HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+
+    # Conversion history is written in batches of up to this many rows (1 writes each record directly),
+    # at least every CONVERSION_LOG_FLUSH_MS; a full queue falls back to direct writes
+    CONVERSION_LOG_BATCH_SIZE = int(os.getenv('CONVERSION_LOG_BATCH_SIZE', 100))
+    CONVERSION_LOG_FLUSH_MS = int(os.getenv('CONVERSION_LOG_FLUSH_MS', 500))
+    CONVERSION_LOG_QUEUE_SIZE = int(os.getenv('CONVERSION_LOG_QUEUE_SIZE', 10000))
+    
     # Session settings
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
@@ -0,0 +1,186 @@
+"""Conversion history writes, batched on a background thread off the request path"""
+import time
+import queue
+import threading
+import logging
+from datetime import datetime, timezone
+from database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+_writer = None
+
+INSERT_CONVERSION = (
+    'INSERT INTO conversions (filename, conversion_type, output_file, user_id, timestamp) VALUES (?, ?, ?, ?, ?)'
+)
+
+
+def _utc_timestamp():
+    # Same format and zone as SQLite's CURRENT_TIMESTAMP
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def write_conversions(rows):
+    """Insert conversion rows with one executemany in a single transaction"""
+    conn = get_db_connection()
+    try:
+        conn.executemany(INSERT_CONVERSION, rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ConversionLogWriter:
+    """
+    Queues conversion records and writes them in batches.
+
+    A batch is written once it holds batch_size rows or its oldest row has
+    waited flush_interval seconds, whichever comes first, so a burst of
+    operations takes the database write lock once per batch instead of once
+    per request. Rows carry the time they were recorded, so the history
+    order does not depend on when the batch lands.
+    """
+
+    def __init__(self, batch_size, flush_interval, max_queue):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.overflow = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+
+    def _ensure_thread(self):
+        # Also restarts the writer in a worker forked after it was started
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='conversion-log', daemon=True)
+                    self._thread.start()
+
+    def record(self, filename, conversion_type, output_file, user_id):
+        row = (filename, conversion_type, output_file, user_id, _utc_timestamp())
+        if self._stopping:
+            write_conversions([row])
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Falling back to a direct write slows this request but keeps the record
+            self.overflow += 1
+            logger.warning("Conversion log queue is full; writing the record directly")
+            write_conversions([row])
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is None:
+                self._queue.task_done()
+                return
+            batch = [row]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            write_conversions(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Could not write {len(batch)} conversion records: {str(e)}", exc_info=True)
+            return
+        elapsed = time.perf_counter() - started
+        self.written += len(batch)
+        self.batches += 1
+        self.flush_seconds += elapsed
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        logger.debug(f"Wrote {len(batch)} conversion records in {elapsed * 1000:.1f} ms")
+
+    def flush(self):
+        """Block until every record queued so far has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self, timeout=10):
+        """Write the queued records and stop the writer thread"""
+        self._stopping = True
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Conversion log writer did not finish within {timeout}s; "
+                           f"{self._queue.qsize()} records may be lost")
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'failed': self.failed,
+            'overflow': self.overflow,
+            'avg_flush_ms': round(self.flush_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 2),
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 2),
+        }
+
+
+def start_conversion_log(config):
+    """Create the process-wide writer; CONVERSION_LOG_BATCH_SIZE of 1 or less keeps writes synchronous"""
+    global _writer
+    if _writer is None and config.get('CONVERSION_LOG_BATCH_SIZE', 100) > 1:
+        _writer = ConversionLogWriter(
+            config.get('CONVERSION_LOG_BATCH_SIZE', 100),
+            config.get('CONVERSION_LOG_FLUSH_MS', 500) / 1000,
+            config.get('CONVERSION_LOG_QUEUE_SIZE', 10000),
+        )
+    return _writer
+
+
+def record_conversion(filename, conversion_type, output_file, user_id=None):
+    """Queue a conversion record, or write it now when no writer is running"""
+    if _writer is None:
+        write_conversions([(filename, conversion_type, output_file, user_id, _utc_timestamp())])
+        return
+    _writer.record(filename, conversion_type, output_file, user_id)
+
+
+def flush_conversion_log():
+    if _writer is not None:
+        _writer.flush()
+
+
+def get_conversion_log_stats():
+    return _writer.stats() if _writer else None
+
+
+def stop_conversion_log():
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
@@ -1,17 +1,143 @@
 """File Conversion Operations"""
 import os
+import sys
 import logging
+import tempfile
+import time
 from pdf2docx import Converter as PDFToWordConverter
 from docx2pdf import convert as word_to_pdf_convert
-from PIL import Image
-from database import get_db_connection
-from flask import session
-from pdf_ops import CSVToPDFOps
+from conversion_log import record_conversion
+from flask import session, has_request_context
+from pdf_ops import CSVToPDFOps, ImageToPDFOps
+import office_pool
+from result_cache import get_result_cache
+from job_queue import report_progress
+from process_pools import map_ordered
 
 logger = logging.getLogger(__name__)
 
+# PDF to Word: processes in the shared pool (1 parses on the calling thread), and the page count from which it is used
+PDF_TO_WORD_WORKERS = int(os.getenv('PDF_TO_WORD_WORKERS', min(2, os.cpu_count() or 1)))
+PDF_TO_WORD_PARALLEL_MIN_PAGES = int(os.getenv('PDF_TO_WORD_PARALLEL_MIN_PAGES', 20))
 
-def convert_file(file_path, conversion_type):
+# Output extension written by each conversion type
+OUTPUT_EXTENSIONS = {
+    'pdf-to-word': '.docx',
+    'word-to-pdf': '.pdf',
+    'image-to-pdf': '.pdf',
+    'csv-to-pdf': '.pdf',
+}
+
+
+def _pdf_to_word_worker(pdf_path, page_indexes, json_path):
+    """Process-pool worker: parse a run of pages and store the layout as JSON"""
+    cv = PDFToWordConverter(pdf_path)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(pages=page_indexes)
+        cv.parse_document(**settings).parse_pages(**settings).serialize(json_path)
+    finally:
+        cv.close()
+
+
+def convert_pdf_to_word(file_path, output_path, start_page=None, end_page=None, workers=None):
+    """
+    Convert a 1-based, inclusive page range of a PDF to a Word document.
+
+    Ranges of PDF_TO_WORD_PARALLEL_MIN_PAGES pages or more are parsed in
+    contiguous runs on the shared PDF to Word pool. Each run is stored as
+    JSON in a private temp directory, and the docx is written here. The
+    time spent opening, analysing, laying out pages and writing the docx
+    is logged.
+    """
+    workers = workers or PDF_TO_WORD_WORKERS
+    timings = {}
+    started = time.perf_counter()
+
+    cv = PDFToWordConverter(file_path)
+    try:
+        settings = cv.default_settings
+        page_total = len(cv.fitz_doc)
+        start_page = start_page or 1
+        end_page = end_page or page_total
+        if start_page < 1 or end_page > page_total or start_page > end_page:
+            raise ValueError(f"Invalid page range: {start_page}-{end_page}. PDF has {page_total} pages.")
+
+        page_indexes = list(range(start_page - 1, end_page))
+        cv.load_pages(start_page - 1, end_page)
+        timings['open'] = time.perf_counter() - started
+        report_progress(5, f"Opened {len(page_indexes)} pages")
+
+        if workers > 1 and len(page_indexes) >= max(2, PDF_TO_WORD_PARALLEL_MIN_PAGES):
+            # Contiguous runs of pages per worker, as in pdf2docx's own multi-processing mode
+            run_size = -(-len(page_indexes) // min(workers, len(page_indexes)))
+            runs = [page_indexes[i:i + run_size] for i in range(0, len(page_indexes), run_size)]
+
+            phase_started = time.perf_counter()
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as work_dir:
+                json_paths = [os.path.join(work_dir, f"pages-{index}.json") for index in range(len(runs))]
+                results = map_ordered(
+                    'pdf-to-word', workers, _pdf_to_word_worker, [file_path] * len(runs), runs, json_paths
+                )
+                for done, _ in enumerate(results, 1):
+                    report_progress(5 + 80 * done // len(runs), f"Parsed {done} of {len(runs)} page runs")
+                for json_path in json_paths:
+                    cv.deserialize(json_path)
+            timings['analyze+layout'] = time.perf_counter() - phase_started
+        else:
+            workers = 1
+            phase_started = time.perf_counter()
+            cv.parse_document(**settings)
+            timings['analyze'] = time.perf_counter() - phase_started
+            report_progress(40, "Analysed document")
+
+            phase_started = time.perf_counter()
+            cv.parse_pages(**settings)
+            timings['layout'] = time.perf_counter() - phase_started
+            report_progress(85, "Laid out pages")
+
+        phase_started = time.perf_counter()
+        cv.make_docx(output_path, **settings)
+        timings['docx'] = time.perf_counter() - phase_started
+    finally:
+        cv.close()
+
+    phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    logger.info(
+        f"PDF to Word timings for {os.path.basename(file_path)} "
+        f"(pages {start_page}-{end_page}, {workers} workers): {phases}, "
+        f"total {time.perf_counter() - started:.2f}s"
+    )
+    return output_path
+
+
+def convert_file(file_path, conversion_type, start_page=None, end_page=None, image_paths=None):
+    """Convert a file, serving the result from the result cache when this input was converted before"""
+    cache = get_result_cache()
+    if cache is None or conversion_type not in OUTPUT_EXTENSIONS:
+        return _convert_file(file_path, conversion_type, start_page, end_page, image_paths)
+
+    output_path = os.path.splitext(file_path)[0] + OUTPUT_EXTENSIONS[conversion_type]
+    try:
+        key = cache.make_key(
+            conversion_type, image_paths or [file_path], {'start_page': start_page, 'end_page': end_page}
+        )
+        if cache.restore(key, output_path):
+            return output_path
+    except Exception as e:
+        logger.error(f"Result cache lookup failed for {conversion_type}: {str(e)}")
+        return _convert_file(file_path, conversion_type, start_page, end_page, image_paths)
+
+    result = _convert_file(file_path, conversion_type, start_page, end_page, image_paths)
+    if result == output_path and os.path.isfile(result):
+        try:
+            cache.store(key, result)
+        except Exception as e:
+            logger.error(f"Result cache store failed for {conversion_type}: {str(e)}")
+    return result
+
+
+def _convert_file(file_path, conversion_type, start_page=None, end_page=None, image_paths=None):
     """Convert file based on conversion type with proper logging"""
     output_path = os.path.splitext(file_path)[0]
     
@@ -20,31 +146,35 @@ def convert_file(file_path, conversion_type):
         
         if conversion_type == 'pdf-to-word':
             output_path += '.docx'
-            cv = PDFToWordConverter(file_path)
-            cv.convert(output_path)
-            cv.close()
+            convert_pdf_to_word(file_path, output_path, start_page, end_page)
             logger.info(f"PDF to Word conversion successful: {output_path}")
             
         elif conversion_type == 'word-to-pdf':
-            try:
-                output_path += '.pdf'
-                word_to_pdf_convert(file_path, output_path)
-                logger.info(f"Word to PDF conversion successful: {output_path}")
-            except Exception as e:
-                # This usually fails on Linux/Render since MS Word isn't installed
-                error_msg = str(e)
-                logger.error(f"Word to PDF conversion failed: {error_msg}")
-                # Return special marker to indicate deployment limitation
-                if 'not implemented' in error_msg.lower() or 'linux' in error_msg.lower() or 'windows' in error_msg.lower():
+            output_path += '.pdf'
+            if sys.platform not in ('win32', 'darwin'):
+                # docx2pdf drives Microsoft Word, so Linux uses LibreOffice instead
+                if not office_pool.is_available():
+                    logger.error("Word to PDF conversion failed: LibreOffice is not installed")
                     return 'NOT_AVAILABLE_ON_DEPLOYMENT'
-                return None
+                office_pool.convert_word_to_pdf(file_path, output_path)
+                logger.info(f"Word to PDF conversion successful: {output_path}")
+            else:
+                try:
+                    word_to_pdf_convert(file_path, output_path)
+                    logger.info(f"Word to PDF conversion successful: {output_path}")
+                except Exception as e:
+                    error_msg = str(e)
+                    logger.error(f"Word to PDF conversion failed: {error_msg}")
+                    # Return special marker to indicate deployment limitation
+                    if 'not implemented' in error_msg.lower() or 'linux' in error_msg.lower() or 'windows' in error_msg.lower():
+                        return 'NOT_AVAILABLE_ON_DEPLOYMENT'
+                    return None
             
         elif conversion_type == 'image-to-pdf':
             output_path += '.pdf'
-            image = Image.open(file_path)
-            if image.mode == 'RGBA':
-                image = image.convert('RGB')
-            image.save(output_path, 'PDF', resolution=100.0)
+            if not ImageToPDFOps.convert(image_paths or [file_path], output_path):
+                logger.error(f"Image to PDF conversion failed for: {file_path}")
+                return None
             logger.info(f"Image to PDF conversion successful: {output_path}")
         
         elif conversion_type == 'csv-to-pdf':
@@ -65,19 +195,15 @@ def convert_file(file_path, conversion_type):
         return None
 
 
-def log_conversion(filename, conversion_type, output_file):
-    """Log file conversion to database"""
+def log_conversion(filename, conversion_type, output_file, user_id=None):
+    """Log file conversion to database for user_id, or the session user inside a request"""
     try:
         output_filename = os.path.basename(output_file)
-        user_id = session.get('user_id')
+        if user_id is None and has_request_context():
+            user_id = session.get('user_id')
         
-        conn = get_db_connection()
-        conn.execute(
-            'INSERT INTO conversions (filename, conversion_type, output_file, user_id) VALUES (?, ?, ?, ?)',
-            (filename, conversion_type, output_filename, user_id)
-        )
-        conn.commit()
-        conn.close()
+        # Queued for the background writer; the request does not wait on the database
+        record_conversion(filename, conversion_type, output_filename, user_id)
         logger.info(f"Conversion logged: {filename} -> {conversion_type} (user_id={user_id})")
     except Exception as e:
         logger.error(f"Error logging conversion: {str(e)}", exc_info=True)    
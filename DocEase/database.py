@@ -1,23 +1,202 @@
 """Database initialization and utility functions"""
 import sqlite3
 import os
+import time
+import threading
 import logging
+from flask import g, has_app_context
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'conversions.db')
 
+# Idle connections kept for reuse, milliseconds a writer waits for the lock, and the WAL sync level
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL').upper()
+
+# Statements before which sqlite3 opens a transaction implicitly
+_WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class PooledConnection:
+    """
+    A pooled sqlite3 connection; close() hands it back to the pool.
+
+    Inside a Flask app context the connection belongs to the request and
+    close() is a no-op until the context tears down, so every helper called
+    during one request shares a single connection. Write transactions start
+    with BEGIN IMMEDIATE, which makes the wait for SQLite's write lock
+    measurable instead of hiding it in a later statement.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self.request_scoped = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def _begin_write(self, sql):
+        if self._connection.in_transaction or not sql.lstrip().upper().startswith(_WRITE_STATEMENTS):
+            return
+        started = time.perf_counter()
+        try:
+            self._connection.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError:
+            self._pool.record_busy()
+            raise
+        self._pool.record_lock_wait(time.perf_counter() - started)
+
+    def execute(self, sql, parameters=()):
+        self._begin_write(sql)
+        return self._connection.execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin_write(sql)
+        return self._connection.executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if not self.request_scoped:
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """Idle WAL-mode connections shared by the threads of one process, with usage and lock-wait counters"""
+
+    def __init__(self, db_path, max_idle, busy_timeout_ms, synchronous):
+        self.pid = os.getpid()
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.acquired = 0
+        self.in_use = 0
+        self.write_transactions = 0
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.max_lock_wait_seconds = 0.0
+        self.busy_errors = 0
+
+    def _connect(self):
+        # Connections move between threads with the pool but are used by one thread at a time
+        connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        # WAL lets readers run alongside the single writer; the mode persists in the database file
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(f'PRAGMA synchronous={self.synchronous}')
+        connection.execute(f'PRAGMA busy_timeout={self.busy_timeout_ms}')
+        return connection
+
+    def acquire(self):
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+            self.acquired += 1
+            self.in_use += 1
+            if connection is None:
+                self.created += 1
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+        return PooledConnection(self, connection)
+
+    def release(self, pooled):
+        connection = pooled._connection
+        if connection is None:
+            return
+        pooled._connection = None
+        if connection.in_transaction:
+            # Uncommitted work of a failed request must not leak into the next one
+            connection.rollback()
+        with self._lock:
+            self.in_use -= 1
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def record_lock_wait(self, seconds):
+        with self._lock:
+            self.write_transactions += 1
+            self.lock_wait_seconds += seconds
+            self.max_lock_wait_seconds = max(self.max_lock_wait_seconds, seconds)
+            if seconds >= 0.001:
+                self.lock_waits += 1
+
+    def record_busy(self):
+        with self._lock:
+            self.busy_errors += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections_created': self.created,
+                'connections_reused': self.acquired - self.created,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'write_transactions': self.write_transactions,
+                'lock_waits': self.lock_waits,
+                'lock_wait_ms_total': round(self.lock_wait_seconds * 1000, 1),
+                'lock_wait_ms_max': round(self.max_lock_wait_seconds * 1000, 1),
+                'busy_errors': self.busy_errors,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _current_pool():
+    """This process's pool, created on first use"""
+    global _pool
+    if _pool is not None and _pool.pid == os.getpid():
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            # Connections inherited through fork belong to the parent; SQLite connections must not cross a fork
+            _pool = ConnectionPool(DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS, DB_SYNCHRONOUS)
+        return _pool
+
 
 def get_db_connection():
-    """Create and return a database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return the request's pooled connection inside an app context, else a pooled one to close() when done"""
+    if has_app_context():
+        if 'db' not in g:
+            g.db = _current_pool().acquire()
+            g.db.request_scoped = True
+        return g.db
+    return _current_pool().acquire()
 
 
-def init_db():
-    """Initialize database tables"""
-    conn = get_db_connection()
+def release_db_connection(exception=None):
+    """Teardown handler returning the request's connection to the pool"""
+    connection = g.pop('db', None)
+    if connection is not None:
+        connection._pool.release(connection)
+
+
+def get_db_stats():
+    return _current_pool().stats()
+
+
+def _current_version(conn):
+    try:
+        return conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # No schema_version table yet
+        return 0
+
+
+def _create_conversions_table(conn):
     conn.execute('''
         CREATE TABLE IF NOT EXISTS conversions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,31 +207,114 @@ def init_db():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized")
 
 
-def init_users_table():
-    """Initialize users table"""
-    conn = get_db_connection()
+def _create_users_table(conn):
     conn.execute('''CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         username TEXT UNIQUE NOT NULL,
         password TEXT NOT NULL
     )''')
-    conn.commit()
-    conn.close()
-    logger.info("Users table initialized")
 
 
-def migrate_users_column():
-    """Add user_id column to conversions table if it doesn't exist"""
+def _add_conversions_user_id(conn):
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(conversions)')]
+    if 'user_id' not in columns:
+        conn.execute('ALTER TABLE conversions ADD COLUMN user_id INTEGER')
+
+
+def _create_jobs_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        operation TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        user_id INTEGER,
+        status TEXT NOT NULL,
+        progress INTEGER DEFAULT 0,
+        message TEXT,
+        output_file TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+
+def _add_conversions_history_index(conn):
+    # id breaks timestamp ties so keyset pagination never skips or repeats a row
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_conversions_user_timestamp ON conversions (user_id, timestamp, id)'
+    )
+
+
+def _add_jobs_owner(conn):
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+    if 'owner' not in columns:
+        conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+
+
+# Schema changes in the order they apply. Append new ones with the next version;
+# the first five are idempotent because they also run on databases created before versioning.
+MIGRATIONS = [
+    (1, 'Create conversions table', _create_conversions_table),
+    (2, 'Create users table', _create_users_table),
+    (3, 'Add user_id to conversions', _add_conversions_user_id),
+    (4, 'Create jobs table', _create_jobs_table),
+    (5, 'Index conversions by user and time', _add_conversions_history_index),
+    (6, 'Record the process running each job', _add_jobs_owner),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations():
+    """
+    Apply pending migrations in one transaction and return the schema version.
+
+    The transaction starts with BEGIN IMMEDIATE, so concurrent runners
+    queue on SQLite's write lock; each re-reads the version once it holds
+    the lock, and all but the first find nothing left to do.
+    """
     conn = get_db_connection()
     try:
-        conn.execute('ALTER TABLE conversions ADD COLUMN user_id INTEGER')
-        logger.info("Added user_id column to conversions table")
-    except Exception as e:
-        logger.debug(f"user_id column may already exist: {str(e)}")
-    conn.commit()
-    conn.close()
+        conn.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )''')
+        conn.execute('BEGIN IMMEDIATE')
+        current = _current_version(conn)
+        for version, description, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            migration(conn)
+            conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+            logger.info(f"Applied migration {version}: {description}")
+            current = version
+        conn.commit()
+        return current
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def check_schema(auto_migrate=True):
+    """
+    Compare the database with SCHEMA_VERSION at startup and return its version.
+
+    An up-to-date database costs one read. An older one is migrated when
+    auto_migrate is set, and otherwise left alone with an error logged, to be
+    migrated by the 'migrate' CLI command.
+    """
+    conn = get_db_connection()
+    try:
+        current = _current_version(conn)
+    finally:
+        conn.close()
+
+    if current >= SCHEMA_VERSION:
+        return current
+    if auto_migrate:
+        return run_migrations()
+    logger.error(f"Database schema is at version {current}, expected {SCHEMA_VERSION}; "
+                 f"run 'flask --app app migrate'")
+    return current
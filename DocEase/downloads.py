@@ -0,0 +1,66 @@
+"""File downloads with content-hash ETags, byte ranges and optional front-end server offload"""
+import os
+import logging
+import unicodedata
+from urllib.parse import quote
+from flask import current_app, request, send_file, Response
+from result_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+
+def send_download(path, as_attachment=True, download_name=None):
+    """
+    Send a file with a strong SHA-256 ETag and Last-Modified.
+
+    Repeat downloads get 304 Not Modified, and Range/If-Range requests get
+    206 Partial Content so interrupted downloads can resume. The digest is
+    remembered per (path, size, mtime), so a file is hashed at most once.
+
+    With DOWNLOAD_OFFLOAD set to 'x-accel' (nginx) or 'x-sendfile' (Apache
+    mod_xsendfile, lighttpd) only headers are produced here and the
+    front-end server sends the bytes, including ranges. For x-accel,
+    UPLOAD_FOLDER must be served as an internal location at
+    DOWNLOAD_ACCEL_PREFIX.
+    """
+    etag = file_digest(path)
+    offload = current_app.config.get('DOWNLOAD_OFFLOAD')
+    if offload not in ('x-accel', 'x-sendfile'):
+        response = send_file(path, as_attachment=as_attachment, download_name=download_name, etag=etag)
+        # Advertise resumable downloads on full responses too, not only on 206s
+        response.accept_ranges = 'bytes'
+        return response
+
+    response = send_file(
+        path, as_attachment=as_attachment, download_name=download_name, etag=etag, conditional=False
+    )
+    # Keep the headers, drop the body
+    response.close()
+    response.response = []
+    response.headers.pop('Content-Length', None)
+    if offload == 'x-accel':
+        relative_path = os.path.relpath(path, current_app.config['UPLOAD_FOLDER'])
+        prefix = current_app.config['DOWNLOAD_ACCEL_PREFIX'].rstrip('/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{relative_path}"
+    else:
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    return response.make_conditional(request.environ)
+
+
+def stream_download(chunks, download_name, mimetype='application/octet-stream'):
+    """
+    Send generated bytes as an attachment named download_name.
+
+    The Content-Disposition header is built the way send_file builds it:
+    the name is quoted, and non-ASCII names get an ASCII fallback plus an
+    RFC 5987 filename* parameter.
+    """
+    response = Response(chunks, mimetype=mimetype)
+    try:
+        download_name.encode('ascii')
+        names = {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+-.^_`|~')}"}
+    response.headers.set('Content-Disposition', 'attachment', **names)
+    return response
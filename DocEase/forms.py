@@ -1,7 +1,9 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
-from wtforms import SubmitField, PasswordField, StringField
-from wtforms.validators import DataRequired, Length, EqualTo, ValidationError
+from wtforms import (
+    SubmitField, PasswordField, StringField, SelectField, TextAreaField, MultipleFileField, BooleanField
+)
+from wtforms.validators import DataRequired, Length, EqualTo, ValidationError, Optional
 
 
 class UploadFileForm(FlaskForm):
@@ -54,9 +56,26 @@ class RotatePDFForm(FlaskForm):
         FileAllowed({'pdf'}, 'Only PDF files allowed!')
     ])
     angle = StringField('Rotation Angle (degrees)', default='90')
+    pages = StringField('Pages (blank for all)', validators=[Optional()])
+    incremental = BooleanField('Append changes to the original file', default=True)
     submit = SubmitField('Rotate PDF')
 
 
+class BatchCryptoForm(FlaskForm):
+    # Multiple uploads are validated per file in the route
+    files = MultipleFileField('Select PDF Files or a ZIP')
+    mode = SelectField('Operation', choices=[('encrypt', 'Encrypt'), ('decrypt', 'Decrypt')])
+    algorithm = SelectField('Encryption Algorithm', default='AES-256', choices=[
+        ('AES-256', 'AES-256'),
+        ('AES-128', 'AES-128'),
+        ('RC4-128', 'RC4 128-bit'),
+        ('RC4-40', 'RC4 40-bit')
+    ])
+    password = PasswordField('Password (all files)', validators=[Optional()])
+    password_map = TextAreaField('Per-file Passwords (JSON)', validators=[Optional()])
+    submit = SubmitField('Run Batch')
+
+
 class RegisterForm(FlaskForm):
     username = StringField('Username', validators=[
         DataRequired(),
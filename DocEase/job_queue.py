@@ -0,0 +1,256 @@
+"""Background jobs for long conversions, run on local thread pools without a broker"""
+import os
+import time
+import uuid
+import shutil
+import socket
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+# Job ID of the work running on the current thread, for report_progress
+_current = threading.local()
+
+# Subdirectory of the upload folder holding finished results; cleanup_uploads leaves it alone
+JOB_RESULTS_DIR = 'jobs'
+# Message of a finished job whose result file has expired or was deleted
+RESULT_GONE = 'The result has expired; please submit the file again'
+
+
+def parse_concurrency(spec):
+    """Parse 'pdf-to-word=1,csv-to-pdf=2' into {'pdf-to-word': 1, 'csv-to-pdf': 2}"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        operation, count = item.split('=', 1)
+        limits[operation.strip()] = max(1, int(count))
+    return limits
+
+
+class JobQueue:
+    """
+    Runs submitted work on one thread pool per operation type.
+
+    Job state lives in the jobs table rather than in memory, so any app
+    process can answer status polls and result downloads. The work itself
+    runs in the process that accepted the job; the heavy operations already
+    fan out to their own process pools. Each result is moved to
+    results_dir/<job id>/, which outlives the process, and is removed
+    result_hours after the job finished.
+    """
+
+    def __init__(self, concurrency, default_concurrency, results_dir, result_hours):
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self.results_dir = results_dir
+        self.result_hours = result_hours
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, operation):
+        with self._lock:
+            executor = self._executors.get(operation)
+            if executor is None:
+                workers = self.concurrency.get(operation, self.default_concurrency)
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{operation}")
+                self._executors[operation] = executor
+            return executor
+
+    def submit(self, operation, work, filename, user_id=None, on_success=None):
+        """
+        Queue work() and return the new job ID.
+
+        work returns the output path, or None on failure. on_success is
+        called with the output path once the job has finished.
+        """
+        self.remove_expired_results()
+        job_id = uuid.uuid4().hex
+        conn = get_db_connection()
+        conn.execute(
+            'INSERT INTO jobs (id, operation, filename, user_id, status, owner) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, operation, filename, user_id, 'queued', _process_owner())
+        )
+        conn.commit()
+        conn.close()
+        self._executor(operation).submit(self._run, job_id, operation, work, on_success)
+        logger.info(f"Queued job {job_id}: {operation} for {filename}")
+        return job_id
+
+    def _run(self, job_id, operation, work, on_success):
+        _update_job(job_id, status='running')
+        _current.job_id = job_id
+        try:
+            output_path = work()
+        except Exception as e:
+            logger.error(f"Job {job_id} ({operation}) failed: {str(e)}", exc_info=True)
+            output_path = None
+        finally:
+            _current.job_id = None
+
+        if not output_path or not os.path.isfile(output_path):
+            _update_job(job_id, status='failed', message='Operation failed')
+            return
+
+        if on_success is not None:
+            try:
+                on_success(output_path)
+            except Exception as e:
+                logger.error(f"Job {job_id} success callback failed: {str(e)}")
+        result_name = os.path.basename(output_path)
+        try:
+            os.makedirs(os.path.join(self.results_dir, job_id))
+            shutil.move(output_path, os.path.join(self.results_dir, job_id, result_name))
+        except OSError as e:
+            logger.error(f"Could not keep the result of job {job_id}: {str(e)}")
+            _update_job(job_id, status='failed', message='Operation failed')
+            return
+        _update_job(job_id, status='finished', progress=100, message=None, output_file=result_name)
+        logger.info(f"Job {job_id} ({operation}) finished: {result_name}")
+
+    def remove_expired_results(self):
+        """Delete the result directories of jobs that finished more than result_hours ago"""
+        cutoff = time.time() - self.result_hours * 3600
+        for job_id in os.listdir(self.results_dir):
+            job_dir = os.path.join(self.results_dir, job_id)
+            try:
+                if os.path.getmtime(job_dir) < cutoff:
+                    shutil.rmtree(job_dir)
+                    logger.info(f"Removed the expired result of job {job_id}")
+            except OSError:
+                # Removed by another process meanwhile
+                pass
+
+    def shutdown(self):
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors.clear()
+
+
+def _update_job(job_id, **fields):
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    conn = get_db_connection()
+    conn.execute(
+        f'UPDATE jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+        (*fields.values(), job_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def _process_owner():
+    """Identify the process running a job: host name and pid, read at submit time so forked workers differ"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def reconcile_stale_jobs():
+    """
+    Fail queued and running jobs whose process is gone, so their clients stop polling.
+
+    Work lives only in the memory of the process that accepted it, so a job
+    left unfinished by a crash or restart can never complete. Jobs owned by
+    live processes on this host, or by other hosts, are left alone; jobs
+    from before owners were recorded are failed.
+
+    Returns:
+        int: Number of jobs marked failed
+    """
+    host = socket.gethostname()
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        stale = []
+        for row in rows:
+            owner_host, _, pid = (row['owner'] or '').rpartition(':')
+            if not row['owner'] or (owner_host == host and not _process_alive(int(pid))):
+                stale.append(row['id'])
+        if stale:
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', message = ?, updated_at = CURRENT_TIMESTAMP "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                [('Interrupted by a server restart; please submit it again', job_id) for job_id in stale]
+            )
+            conn.commit()
+            logger.warning(f"Marked {len(stale)} interrupted jobs as failed")
+        return len(stale)
+    finally:
+        conn.close()
+
+
+def start_job_queue(config):
+    """Create the process-wide job queue from JOB_CONCURRENCY, JOB_DEFAULT_CONCURRENCY and JOB_RESULT_HOURS"""
+    global _queue
+    if _queue is None:
+        results_dir = os.path.join(config['UPLOAD_FOLDER'], JOB_RESULTS_DIR)
+        os.makedirs(results_dir, exist_ok=True)
+        _queue = JobQueue(
+            parse_concurrency(config.get('JOB_CONCURRENCY')), config.get('JOB_DEFAULT_CONCURRENCY', 2),
+            results_dir, config.get('JOB_RESULT_HOURS', 24)
+        )
+        try:
+            reconcile_stale_jobs()
+        except Exception as e:
+            logger.error(f"Could not reconcile interrupted jobs: {str(e)}")
+    return _queue
+
+
+def submit_job(operation, work, filename, user_id=None, on_success=None):
+    return _queue.submit(operation, work, filename, user_id, on_success)
+
+
+def get_job(job_id):
+    """Return the job row as a dict, or None for an unknown ID"""
+    conn = get_db_connection()
+    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def job_result(job):
+    """
+    Path of a finished job's result file, or None once it is gone.
+
+    A job whose result expired or was deleted is marked failed, so status
+    polls stop offering a download.
+    """
+    if job['output_file']:
+        path = os.path.join(_queue.results_dir, job['id'], job['output_file'])
+        if os.path.isfile(path):
+            return path
+    logger.warning(f"Result of job {job['id']} is gone: {job['output_file']}")
+    _update_job(job['id'], status='failed', message=RESULT_GONE)
+    job.update(status='failed', message=RESULT_GONE)
+    return None
+
+
+def report_progress(progress, message=None):
+    """Record progress (0-100) for the job running on this thread; a no-op outside jobs"""
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    try:
+        _update_job(job_id, progress=int(progress), message=message)
+    except Exception as e:
+        logger.debug(f"Could not record progress for job {job_id}: {str(e)}")
+
+
+def shutdown_job_queue():
+    global _queue
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
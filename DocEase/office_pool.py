@@ -0,0 +1,363 @@
+"""Warm LibreOffice worker pool for Word to PDF conversion on Linux"""
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The UNO bridge ships with LibreOffice (python3-uno on Debian/Ubuntu), not on PyPI
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+# Seconds allowed for a new soffice process to accept connections
+STARTUP_TIMEOUT = 60
+
+_pool = None
+_pool_lock = threading.Lock()
+_config = {}
+
+
+def find_soffice(configured_path=None):
+    """Return the LibreOffice executable, or None if it is not installed"""
+    if configured_path:
+        return configured_path if os.path.exists(configured_path) else shutil.which(configured_path)
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+
+def _property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def _kill_process_group(process):
+    """Terminate soffice and the children it forks (oosplash, soffice.bin)"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, 15)
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, 9)
+        process.wait(timeout=5)
+    except ProcessLookupError:
+        pass
+
+
+class OfficeWorker:
+    """One headless soffice process with its own profile, driven over a named UNO pipe"""
+
+    def __init__(self, index, soffice_path, pipe_name):
+        self.index = index
+        self.soffice_path = soffice_path
+        # Named after the owning process, so pools in separate app workers never share a soffice
+        self.pipe_name = pipe_name
+        # LibreOffice allows one running instance per user profile
+        self.profile_dir = tempfile.mkdtemp(prefix=f"docease_office_{index}_")
+        self.process = None
+        self.desktop = None
+        self.busy_since = None
+        # Set when the process has to be (re)started before taking work
+        self.needs_start = True
+        self.starts = 0
+        self.conversions = 0
+
+    @property
+    def restarts(self):
+        return max(0, self.starts - 1)
+
+    def start(self):
+        """Launch soffice, replacing any previous process, and wait until its UNO pipe resolves"""
+        self.stop()
+        self.starts += 1
+        command = [
+            self.soffice_path, '--headless', '--invisible', '--nologo', '--nodefault',
+            '--norestore', '--nolockcheck',
+            f'-env:UserInstallation=file://{self.profile_dir}',
+            f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext',
+        ]
+        self.process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                self.desktop = self._connect()
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice worker {self.index} failed to start on pipe {self.pipe_name}")
+                time.sleep(0.25)
+
+        self.needs_start = False
+        logger.info(f"LibreOffice worker {self.index} ready on pipe {self.pipe_name} (pid {self.process.pid})")
+
+    def _connect(self):
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        context = resolver.resolve(
+            f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+        )
+        return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def is_healthy(self):
+        """The process is alive and answers a UNO round trip"""
+        if self.needs_start or self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            self.desktop.getFrames()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, input_path, output_path):
+        """Open a document hidden, export it with the Writer PDF filter and close it"""
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), "_blank", 0,
+            (_property("Hidden", True), _property("ReadOnly", True))
+        )
+        if document is None:
+            raise ValueError(f"LibreOffice could not open {os.path.basename(input_path)}")
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                (_property("FilterName", "writer_pdf_Export"),)
+            )
+        finally:
+            document.close(True)
+        self.conversions += 1
+
+    def stop(self):
+        self.desktop = None
+        _kill_process_group(self.process)
+        self.process = None
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class OfficePool:
+    """
+    Pool of pre-started LibreOffice workers.
+
+    Idle workers wait on a queue and each conversion takes one. A monitor
+    thread kills workers stuck on one document for longer than the timeout,
+    checks idle workers every health_interval seconds, and restarts broken
+    ones before returning them to the queue.
+    """
+
+    def __init__(self, soffice_path, size, timeout, health_interval):
+        self.soffice_path = soffice_path
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.pid = os.getpid()
+        self.workers = [
+            OfficeWorker(index, soffice_path, f"docease-{self.pid}-{index}") for index in range(size)
+        ]
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._monitor = threading.Thread(target=self._monitor_loop, name="office-pool-monitor", daemon=True)
+
+    def start(self):
+        """Start the monitor thread, which launches the workers so app startup does not wait on soffice"""
+        self._monitor.start()
+
+    def convert(self, input_path, output_path):
+        """Convert on the next idle worker, waiting up to the timeout for one"""
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("No LibreOffice worker became available")
+
+        worker.busy_since = time.monotonic()
+        started = worker.busy_since
+        try:
+            worker.convert(input_path, output_path)
+            logger.info(
+                f"Word to PDF on LibreOffice worker {worker.index}: "
+                f"{os.path.basename(input_path)} in {time.monotonic() - started:.2f}s"
+            )
+        except Exception:
+            # A dead or killed soffice raises here; a bad document leaves it healthy
+            if not worker.is_healthy():
+                worker.needs_start = True
+            raise
+        finally:
+            with self._lock:
+                worker.busy_since = None
+            if not worker.needs_start:
+                self._idle.put(worker)
+
+    def _monitor_loop(self):
+        last_health_check = time.monotonic()
+        while not self._stopped.is_set():
+            now = time.monotonic()
+
+            with self._lock:
+                for worker in self.workers:
+                    if worker.busy_since is not None and now - worker.busy_since > self.timeout:
+                        logger.warning(f"LibreOffice worker {worker.index} stuck for {self.timeout}s, killing it")
+                        worker.needs_start = True
+                        worker.stop()
+
+            if now - last_health_check >= self.health_interval:
+                last_health_check = now
+                # Check idle workers out of the queue so no request picks one mid-check
+                idle = []
+                while True:
+                    try:
+                        idle.append(self._idle.get_nowait())
+                    except queue.Empty:
+                        break
+                for worker in idle:
+                    if worker.is_healthy():
+                        self._idle.put(worker)
+                    else:
+                        logger.warning(f"LibreOffice worker {worker.index} failed its health check")
+                        worker.needs_start = True
+
+            for worker in self.workers:
+                if worker.needs_start and worker.busy_since is None and not self._stopped.is_set():
+                    try:
+                        worker.start()
+                        self._idle.put(worker)
+                    except Exception as e:
+                        logger.error(f"LibreOffice worker {worker.index} restart failed: {str(e)}")
+
+            self._stopped.wait(1)
+
+    def stats(self):
+        return {
+            'size': len(self.workers),
+            'idle': self._idle.qsize(),
+            'workers': [
+                {
+                    'index': worker.index,
+                    'pid': worker.process.pid if worker.process else None,
+                    'busy': worker.busy_since is not None,
+                    'conversions': worker.conversions,
+                    'restarts': worker.restarts,
+                }
+                for worker in self.workers
+            ],
+        }
+
+    def shutdown(self):
+        self._stopped.set()
+        for worker in self.workers:
+            worker.close()
+
+
+def convert_cold(soffice_path, input_path, output_path, timeout):
+    """Convert with a one-off soffice process and a throwaway profile"""
+    with tempfile.TemporaryDirectory(prefix="docease_office_") as work_dir:
+        command = [
+            soffice_path, '--headless', '--norestore', '--nolockcheck',
+            f'-env:UserInstallation=file://{os.path.join(work_dir, "profile")}',
+            '--convert-to', 'pdf', '--outdir', work_dir, os.path.abspath(input_path),
+        ]
+        process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            raise RuntimeError(f"LibreOffice timed out after {timeout}s")
+
+        converted = os.path.join(work_dir, os.path.splitext(os.path.basename(input_path))[0] + '.pdf')
+        if not os.path.exists(converted):
+            raise RuntimeError(f"LibreOffice exited with code {process.returncode} and no PDF")
+        shutil.move(converted, output_path)
+
+
+def start_office_pool(config):
+    """
+    Record the pool settings; the pool itself starts in the process that first converts.
+
+    Starting on first use rather than at import keeps soffice processes and
+    the monitor thread out of a parent that forks its app workers, and gives
+    every worker process a pool of its own. The UNO pool is opt-in through
+    WORD_TO_PDF_POOL; when it is off, without the UNO bridge, or with
+    WORD_TO_PDF_POOL_SIZE set to 0, conversions fall back to a one-off
+    soffice process each.
+    """
+    global _config
+    _config = config
+    if not config.get('WORD_TO_PDF_POOL'):
+        return
+    if find_soffice(config.get('LIBREOFFICE_PATH')) and uno is None:
+        logger.info("UNO bridge not installed; Word to PDF will start LibreOffice per file")
+
+
+def _current_pool():
+    """This process's pool, started on first call; None when the pool is unavailable"""
+    global _pool
+    if _pool is not None and _pool.pid == os.getpid():
+        return _pool
+
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            return _pool
+        # A pool inherited through fork belongs to the parent; its threads did not survive
+        _pool = None
+        soffice_path = find_soffice(_config.get('LIBREOFFICE_PATH'))
+        size = _config.get('WORD_TO_PDF_POOL_SIZE', 2)
+        if not _config.get('WORD_TO_PDF_POOL') or soffice_path is None or uno is None or size < 1:
+            return None
+
+        _pool = OfficePool(
+            soffice_path, size,
+            timeout=_config.get('WORD_TO_PDF_TIMEOUT', 120),
+            health_interval=_config.get('WORD_TO_PDF_HEALTH_INTERVAL', 30),
+        )
+        _pool.start()
+        logger.info(f"Starting LibreOffice pool with {size} workers in process {_pool.pid}")
+        return _pool
+
+
+def is_available():
+    """Word to PDF through LibreOffice is possible on this machine"""
+    return find_soffice(_config.get('LIBREOFFICE_PATH')) is not None
+
+
+def convert_word_to_pdf(input_path, output_path):
+    """Convert through the warm pool when it is running, else with a one-off soffice"""
+    pool = _current_pool()
+    if pool is not None:
+        pool.convert(input_path, output_path)
+        return output_path
+
+    soffice_path = find_soffice(_config.get('LIBREOFFICE_PATH'))
+    if soffice_path is None:
+        raise RuntimeError("LibreOffice is not installed")
+    started = time.monotonic()
+    convert_cold(soffice_path, input_path, output_path, _config.get('WORD_TO_PDF_TIMEOUT', 120))
+    logger.info(
+        f"Word to PDF with a one-off LibreOffice: {os.path.basename(input_path)} "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    return output_path
+
+
+def shutdown_office_pool():
+    global _pool
+    # Only the process that started the soffice workers stops them
+    if _pool is not None and _pool.pid == os.getpid():
+        _pool.shutdown()
+    _pool = None
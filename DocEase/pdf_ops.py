@@ -5,40 +5,182 @@ import logging
 import csv
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from io import BytesIO
+from reportlab.lib.pagesizes import letter, A4, landscape
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from io import BytesIO, StringIO
 import uuid
+import time
+import hashlib
+import gc
+import contextlib
+import functools
+import glob
+import itertools
+import shutil
+import zlib
+from PyPDF2.errors import DependencyError
+from PyPDF2.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject,
+    StreamObject
+)
+from PIL import Image, ImageOps
+from security import validate_upload_path, is_valid_pdf
+from result_cache import cached_operation
+from process_pools import map_ordered
 
 logger = logging.getLogger(__name__)
 
+# Number of rendered watermark stamps kept in memory
+WATERMARK_CACHE_SIZE = int(os.getenv('WATERMARK_CACHE_SIZE', 128))
+
+# CSV rows sampled for column widths, and pages per reportlab canvas before it is flushed
+CSV_PDF_SAMPLE_ROWS = int(os.getenv('CSV_PDF_SAMPLE_ROWS', 1000))
+CSV_PDF_PART_PAGES = int(os.getenv('CSV_PDF_PART_PAGES', 500))
+# Parallel CSV rendering: processes in the shared CSV pool (1 renders on the calling thread),
+# minimum file size, and rows per chunk read by a worker
+CSV_PDF_WORKERS = int(os.getenv('CSV_PDF_WORKERS', 1))
+CSV_PDF_PARALLEL_MIN_MB = float(os.getenv('CSV_PDF_PARALLEL_MIN_MB', 2))
+CSV_PDF_CHUNK_ROWS = int(os.getenv('CSV_PDF_CHUNK_ROWS', 5000))
+
+# Image to PDF: resolution assumed for images without DPI, and the resolution large images are reduced to
+IMAGE_PDF_DEFAULT_DPI = int(os.getenv('IMAGE_PDF_DEFAULT_DPI', 100))
+IMAGE_PDF_TARGET_DPI = int(os.getenv('IMAGE_PDF_TARGET_DPI', 150))
+
+# Batch encrypt/decrypt ZIP uploads: most PDFs taken from one archive, and most bytes extracted from it
+BATCH_ZIP_MAX_ENTRIES = int(os.getenv('BATCH_ZIP_MAX_ENTRIES', 500))
+BATCH_ZIP_MAX_TOTAL_MB = int(os.getenv('BATCH_ZIP_MAX_TOTAL_MB', 1024))
+
+
+class _ZipStreamSink:
+    """Unseekable file object for ZipFile that tees output to disk and a chunk buffer"""
+
+    def __init__(self, disk_file=None):
+        self._disk_file = disk_file
+        self._chunks = []
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        if self._disk_file is not None:
+            self._disk_file.write(data)
+        return len(data)
+
+    def flush(self):
+        if self._disk_file is not None:
+            self._disk_file.flush()
+
+    def drain(self):
+        """Return and clear the bytes written since the last drain"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _copy_document(reader):
+    """
+    Return a PdfWriter holding the reader's pages, outlines, named destinations and metadata.
+
+    PyPDF2 3.0.1 cannot clone a document in one step: clone_reader_document_root
+    leaves the writer with an empty page tree, and clone_document_from_reader
+    copies page by page as well. PdfWriter.append is a little slower than an
+    add_page loop (see 'python benchmarks.py clone') but is the only public
+    copy that keeps outlines and named destinations. Pages arrive with their
+    inherited /Rotate, /MediaBox and /Resources applied.
+    """
+    writer = PdfWriter()
+    writer.append(reader)
+    if reader.metadata:
+        writer.add_metadata(reader.metadata)
+    return writer
+
+
+def _split_chunk_worker(pdf_path, base_filename, start_page, end_page):
+    """Process-pool worker: open the source PDF and split one chunk of pages"""
+    reader = PdfReader(pdf_path)
+    return list(PDFOperations._iter_page_pdfs(reader, base_filename, start_page, end_page))
+
 
 class PDFOperations:
     """Core PDF operations"""
     
     @staticmethod
+    def _resolve_page_range(pdf_path, total_pages, start_page=None, end_page=None):
+        """Validate a 1-based page range and return it, or None if invalid"""
+        if total_pages == 0:
+            logger.warning(f"PDF is empty: {os.path.basename(pdf_path)}")
+            return None
+
+        start_page = start_page or 1
+        end_page = end_page or total_pages
+
+        if start_page < 1 or end_page > total_pages or start_page > end_page:
+            logger.error(f"Invalid page range: {start_page}-{end_page}. PDF has {total_pages} pages.")
+            return None
+
+        return start_page, end_page
+
+    @staticmethod
+    def _iter_page_pdfs(reader, base_filename, start_page, end_page):
+        """Yield (archive name, PDF bytes) for each page in the range, built in memory"""
+        for page_num in range(start_page - 1, end_page):
+            writer = PdfWriter()
+            writer.add_page(reader.pages[page_num])
+
+            buffer = BytesIO()
+            writer.write(buffer)
+
+            individual_filename = f"{base_filename}_page_{page_num + 1}.pdf"
+            logger.debug(f"Created PDF page {page_num + 1}: {individual_filename}")
+            yield individual_filename, buffer.getvalue()
+
+    @staticmethod
+    def _iter_split_entries(pdf_path, reader, app_config, base_filename, start_page, end_page):
+        """
+        Yield (archive name, PDF bytes) for the page range in page order.
+
+        Large ranges are divided into SPLIT_CHUNK_PAGES chunks and split on the
+        shared split pool of SPLIT_WORKERS processes; each worker opens the
+        source PDF itself. Small ranges, or a single worker, stay on the
+        calling thread. Closing the generator cancels chunks not yet started.
+        """
+        workers = app_config.get('SPLIT_WORKERS') or 1
+        chunk_pages = max(1, app_config.get('SPLIT_CHUNK_PAGES') or 50)
+        page_count = end_page - start_page + 1
+
+        if workers <= 1 or page_count < app_config.get('SPLIT_PARALLEL_MIN_PAGES', 200):
+            yield from PDFOperations._iter_page_pdfs(reader, base_filename, start_page, end_page)
+            return
+
+        chunks = [
+            (chunk_start, min(chunk_start + chunk_pages - 1, end_page))
+            for chunk_start in range(start_page, end_page + 1, chunk_pages)
+        ]
+        logger.info(f"Parallel split: {page_count} pages in {len(chunks)} chunks on {workers} workers")
+
+        results = map_ordered(
+            'split', workers, _split_chunk_worker,
+            [pdf_path] * len(chunks),
+            [base_filename] * len(chunks),
+            [chunk[0] for chunk in chunks],
+            [chunk[1] for chunk in chunks],
+        )
+        try:
+            for entries in results:
+                yield from entries
+        finally:
+            results.close()
+
+    @staticmethod
+    @cached_operation('split_pdf', inputs='pdf_path', ignore=('app_config',))
     def split_pdf(pdf_path, app_config, start_page=None, end_page=None):
         """Split PDF into individual pages and return as ZIP file"""
         try:
             with open(pdf_path, "rb") as f:
                 reader = PdfReader(f)
-                total_pages = len(reader.pages)
-                
-                if total_pages == 0:
-                    logger.warning(f"PDF is empty: {os.path.basename(pdf_path)}")
-                    return None
-                
-                # Validate page range
-                start_page = start_page or 1
-                end_page = end_page or total_pages
-                
-                # Convert to 0-based indexing
-                start_idx = start_page - 1
-                end_idx = end_page - 1
-                
-                # Validate range
-                if start_idx < 0 or end_idx >= total_pages or start_idx > end_idx:
-                    logger.error(f"Invalid page range: {start_page}-{end_page}. PDF has {total_pages} pages.")
+                page_range = PDFOperations._resolve_page_range(pdf_path, len(reader.pages), start_page, end_page)
+                if page_range is None:
                     return None
+                start_page, end_page = page_range
                 
                 # Create a zip file to store all split PDFs
                 base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
@@ -46,28 +188,13 @@ class PDFOperations:
                 
                 logger.info(f"Starting PDF split: pages {start_page}-{end_page} from {base_filename}")
                 
+                entries = PDFOperations._iter_split_entries(
+                    pdf_path, reader, app_config, base_filename, start_page, end_page
+                )
                 with zipfile.ZipFile(zip_filename, 'w') as zip_file:
-                    # Split each page in the range into a separate PDF
-                    for page_num in range(start_idx, end_idx + 1):
-                        select_page = reader.pages[page_num]
-                        
-                        writer = PdfWriter()
-                        writer.add_page(select_page)
-                        
-                        # Create individual PDF file
-                        individual_filename = f"{base_filename}_page_{page_num + 1}.pdf"
-                        individual_path = os.path.join(app_config['UPLOAD_FOLDER'], individual_filename)
-                        
-                        with open(individual_path, "wb") as out:
-                            writer.write(out)
-                        
-                        # Add to zip file
-                        zip_file.write(individual_path, individual_filename)
-                        
-                        # Clean up individual file
-                        os.remove(individual_path)
-                        
-                        logger.debug(f"Created PDF page {page_num + 1}: {individual_filename}")
+                    # Serialize each page straight into the archive, no per-page temp files
+                    for individual_filename, data in entries:
+                        zip_file.writestr(individual_filename, data)
                 
                 logger.info(f"PDF split successful. Pages {start_page}-{end_page} saved to: {zip_filename}")
                 return zip_filename
@@ -77,13 +204,413 @@ class PDFOperations:
             return None
 
     @staticmethod
-    def merge_pdfs(pdf_files, app_config):
+    def split_pdf_stream(pdf_path, app_config, start_page=None, end_page=None):
+        """
+        Split PDF into individual pages as a streamed ZIP.
+
+        The page range is validated up front; the returned generator then
+        produces ZIP bytes as each page is serialized, so the client starts
+        receiving data before later pages are split. The same bytes are
+        written to the ZIP in UPLOAD_FOLDER so history re-downloads still work.
+
+        Returns:
+            tuple or None: (zip path, generator of bytes) or None if error.
+        """
+        try:
+            reader = PdfReader(pdf_path)
+            page_range = PDFOperations._resolve_page_range(pdf_path, len(reader.pages), start_page, end_page)
+            if page_range is None:
+                return None
+            start_page, end_page = page_range
+        except Exception as e:
+            logger.error(f"PDF splitting error: {str(e)}", exc_info=True)
+            return None
+
+        base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
+        zip_filename = os.path.join(app_config['UPLOAD_FOLDER'], f"{base_filename}_pages_{start_page}-{end_page}.zip")
+
+        def generate():
+            logger.info(f"Starting streamed PDF split: pages {start_page}-{end_page} from {base_filename}")
+            try:
+                with open(zip_filename, 'wb') as disk_file:
+                    sink = _ZipStreamSink(disk_file)
+                    entries = PDFOperations._iter_split_entries(
+                        pdf_path, reader, app_config, base_filename, start_page, end_page
+                    )
+                    try:
+                        with zipfile.ZipFile(sink, 'w') as zip_file:
+                            for individual_filename, data in entries:
+                                zip_file.writestr(individual_filename, data)
+                                yield sink.drain()
+                        yield sink.drain()
+                    finally:
+                        # A client that disconnects closes this generator; stop queued split work with it
+                        entries.close()
+                logger.info(f"Streamed PDF split successful. Pages {start_page}-{end_page} saved to: {zip_filename}")
+            except Exception as e:
+                logger.error(f"Streamed PDF splitting error: {str(e)}", exc_info=True)
+                raise
+
+        return zip_filename, generate()
+
+    @staticmethod
+    def _parse_range_spec(range_spec, total_pages):
+        """
+        Parse a page range spec such as "1-10,11-40,41-" into 1-based (start, end) tuples.
+
+        A bare number selects one page and an open end ("41-") runs to the last page.
+        Raises ValueError for malformed or out-of-bounds ranges.
+        """
+        ranges = []
+        for part in range_spec.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                start_str, end_str = (value.strip() for value in part.split('-', 1))
+                start = int(start_str) if start_str else 1
+                end = int(end_str) if end_str else total_pages
+            else:
+                start = end = int(part)
+            if start < 1 or end > total_pages or start > end:
+                raise ValueError(f"Invalid page range '{part}'. PDF has {total_pages} pages.")
+            ranges.append((start, end))
+
+        if not ranges:
+            raise ValueError("Empty page range spec")
+        return ranges
+
+    @staticmethod
+    def _iter_size_chunks(reader, max_chunk_bytes):
+        """
+        Yield (start, end) ranges whose estimated PDF size stays under max_chunk_bytes.
+
+        Each page is sized as a standalone one-page PDF. That counts shared fonts
+        and images once per page, so the estimate errs on the large side and the
+        real chunk comes out under the limit. A single page larger than the
+        limit still becomes its own chunk.
+        """
+        chunk_start = 1
+        chunk_bytes = 0
+        for page_num, page in enumerate(reader.pages, start=1):
+            writer = PdfWriter()
+            writer.add_page(page)
+            buffer = BytesIO()
+            writer.write(buffer)
+            page_bytes = buffer.tell()
+
+            if page_num > chunk_start and chunk_bytes + page_bytes > max_chunk_bytes:
+                yield chunk_start, page_num - 1
+                chunk_start = page_num
+                chunk_bytes = 0
+            chunk_bytes += page_bytes
+
+        yield chunk_start, len(reader.pages)
+
+    @staticmethod
+    @cached_operation('split_pdf_ranges', inputs='pdf_path', ignore=('app_config',))
+    def split_pdf_ranges(pdf_path, app_config, range_spec=None, every_pages=None, max_chunk_mb=None):
+        """
+        Split a PDF into multi-page documents from a single PdfReader pass.
+
+        Exactly one of the modes is used:
+            range_spec (str): explicit ranges, e.g. "1-10,11-40,41-"
+            every_pages (int): consecutive documents of N pages each
+            max_chunk_mb (float): consecutive documents under the given size
+
+        Returns:
+            str or None: Path to a ZIP holding one PDF per range or None if error.
+        """
+        try:
+            reader = PdfReader(pdf_path)
+            total_pages = len(reader.pages)
+            if total_pages == 0:
+                logger.warning(f"PDF is empty: {os.path.basename(pdf_path)}")
+                return None
+
+            base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
+
+            if range_spec:
+                ranges = PDFOperations._parse_range_spec(range_spec, total_pages)
+                zip_suffix = "ranges"
+            elif every_pages:
+                if every_pages < 1:
+                    raise ValueError(f"Invalid page count per document: {every_pages}")
+                ranges = [
+                    (start, min(start + every_pages - 1, total_pages))
+                    for start in range(1, total_pages + 1, every_pages)
+                ]
+                zip_suffix = f"every_{every_pages}"
+            elif max_chunk_mb:
+                if max_chunk_mb <= 0:
+                    raise ValueError(f"Invalid chunk size: {max_chunk_mb} MB")
+                ranges = PDFOperations._iter_size_chunks(reader, max_chunk_mb * 1024 * 1024)
+                zip_suffix = f"chunks_{max_chunk_mb:g}mb"
+            else:
+                raise ValueError("No split mode given")
+
+            zip_filename = os.path.join(app_config['UPLOAD_FOLDER'], f"{base_filename}_{zip_suffix}.zip")
+            logger.info(f"Starting multi-range PDF split ({zip_suffix}) from {base_filename}")
+
+            document_count = 0
+            with zipfile.ZipFile(zip_filename, 'w') as zip_file:
+                for start, end in ranges:
+                    writer = PdfWriter()
+                    for page_num in range(start - 1, end):
+                        writer.add_page(reader.pages[page_num])
+
+                    buffer = BytesIO()
+                    writer.write(buffer)
+                    zip_file.writestr(f"{base_filename}_pages_{start}-{end}.pdf", buffer.getvalue())
+                    document_count += 1
+                    logger.debug(f"Created PDF for pages {start}-{end}")
+
+            logger.info(f"Multi-range PDF split successful: {document_count} documents saved to: {zip_filename}")
+            return zip_filename
+
+        except ValueError as e:
+            logger.error(f"Invalid PDF range split request: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"PDF range splitting error: {str(e)}", exc_info=True)
+            return None
+
+    # Shared resources worth writing once: fonts, images and form XObjects, plus
+    # the embedded font files and ICC profiles they point to
+    DEDUP_TYPES = {'/Font', '/FontDescriptor', '/XObject'}
+    DEDUP_RESOURCE_KEYS = ('/Font', '/XObject')
+    FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+
+    @staticmethod
+    def _remap_references(obj, remap, visited):
+        """Renumber indirect references through remap, in place, visiting each container once"""
+        if id(obj) in visited:
+            return
+        visited.add(id(obj))
+        items = obj.items() if isinstance(obj, DictionaryObject) else enumerate(obj)
+        for key, value in list(items):
+            if isinstance(value, IndirectObject):
+                if value.idnum in remap:
+                    obj[key] = IndirectObject(remap[value.idnum], 0, value.pdf)
+            elif isinstance(value, (DictionaryObject, ArrayObject)):
+                PDFOperations._remap_references(value, remap, visited)
+
+    @staticmethod
+    def _iter_containers(obj):
+        """Yield obj and every dictionary or array nested in it, without following indirect references"""
+        stack = [obj]
+        while stack:
+            item = stack.pop()
+            yield item
+            values = item.values() if isinstance(item, DictionaryObject) else item
+            stack.extend(value for value in values if isinstance(value, (DictionaryObject, ArrayObject)))
+
+    @staticmethod
+    def _has_object_table(writer):
+        """
+        Whether writer exposes the PyPDF2 3.0 internals deduplication rewrites.
+
+        PyPDF2 has no public API for this (compress_identical_objects arrived
+        in pypdf 3.17), so the object list, catalog and info references are
+        checked before they are touched.
+        """
+        return (
+            isinstance(getattr(writer, '_objects', None), list)
+            and isinstance(getattr(writer, '_root', None), IndirectObject)
+            and isinstance(getattr(writer, '_info', None), IndirectObject)
+        )
+
+    @staticmethod
+    def _dedup_candidates(writer):
+        """
+        Object numbers of the fonts, images, form XObjects, font files and ICC profiles in a writer.
+
+        Image XObjects, font files and ICC profiles often have no /Type, so
+        they are found through what refers to them: resource dictionaries,
+        font descriptors and [/ICCBased ref] color spaces.
+        """
+        candidates = set()
+        for index, obj in enumerate(writer._objects):
+            if not isinstance(obj, (DictionaryObject, ArrayObject)):
+                continue
+            if isinstance(obj, DictionaryObject) and obj.get('/Type') in PDFOperations.DEDUP_TYPES:
+                candidates.add(index + 1)
+            for item in PDFOperations._iter_containers(obj):
+                if isinstance(item, ArrayObject):
+                    if len(item) == 2 and item[0] == '/ICCBased' and isinstance(item[1], IndirectObject):
+                        candidates.add(item[1].idnum)
+                    continue
+                for key in PDFOperations.FONT_FILE_KEYS:
+                    if isinstance(item.raw_get(key) if key in item else None, IndirectObject):
+                        candidates.add(item.raw_get(key).idnum)
+                for key in PDFOperations.DEDUP_RESOURCE_KEYS:
+                    # /Font in an ExtGState is an array, not a resource dictionary
+                    resources = item.get(key)
+                    if isinstance(resources, DictionaryObject):
+                        candidates.update(
+                            value.idnum for value in resources.values() if isinstance(value, IndirectObject)
+                        )
+        return candidates
+
+    @staticmethod
+    def _reachable_objects(writer):
+        """Object numbers reachable from the writer's catalog and info dictionary"""
+        reachable = set()
+        stack = [writer._root.idnum, writer._info.idnum]
+        while stack:
+            idnum = stack.pop()
+            if idnum in reachable or not 0 < idnum <= len(writer._objects):
+                continue
+            reachable.add(idnum)
+            obj = writer._objects[idnum - 1]
+            if isinstance(obj, IndirectObject):
+                stack.append(obj.idnum)
+            elif isinstance(obj, (DictionaryObject, ArrayObject)):
+                for item in PDFOperations._iter_containers(obj):
+                    values = item.values() if isinstance(item, DictionaryObject) else item
+                    stack.extend(value.idnum for value in values if isinstance(value, IndirectObject))
+        return reachable
+
+    @staticmethod
+    def _deduplicate_objects(writer):
+        """
+        Write identical shared fonts, images, form XObjects, font files and ICC profiles only once.
+
+        Candidates are hashed on their serialized dictionary plus stream data,
+        and every reference to a duplicate is pointed at the first copy.
+        Deduplicating font files makes their descriptors identical, so this
+        repeats until nothing else collapses. A duplicate is only dropped
+        once nothing reachable from the catalog refers to it; one still
+        referenced through a path the remapping missed is written as is.
+
+        Relies on PyPDF2 internals; when the writer lacks them nothing is
+        changed and the document is written as it is.
+
+        Returns:
+            tuple: (objects removed, bytes saved)
+        """
+        if not PDFOperations._has_object_table(writer):
+            logger.warning("This PyPDF2 version lacks the writer internals deduplication uses; merging without it")
+            return 0, 0
+
+        objects = writer._objects
+        candidates = PDFOperations._dedup_candidates(writer)
+        data_digests = {}
+        duplicates = {}
+
+        while True:
+            canonical = {}
+            remap = {}
+            for idnum in sorted(candidates):
+                obj = objects[idnum - 1]
+                if not isinstance(obj, DictionaryObject):
+                    continue
+
+                buffer = BytesIO()
+                if isinstance(obj, StreamObject):
+                    data = getattr(obj, '_data', None)
+                    if not isinstance(data, bytes):
+                        # Stream data stored some other way; keep this object as it is
+                        continue
+                    DictionaryObject.write_to_stream(obj, buffer, None)
+                    size = buffer.tell() + len(data)
+                    if idnum not in data_digests:
+                        data_digests[idnum] = hashlib.sha256(data).digest()
+                    buffer.write(data_digests[idnum])
+                else:
+                    obj.write_to_stream(buffer, None)
+                    size = buffer.tell()
+                key = hashlib.sha256(buffer.getvalue()).digest()
+
+                if key in canonical:
+                    remap[idnum] = canonical[key]
+                    duplicates[idnum] = size
+                else:
+                    canonical[key] = idnum
+
+            if not remap:
+                break
+
+            candidates.difference_update(remap)
+            visited = set()
+            for obj in objects:
+                if isinstance(obj, (DictionaryObject, ArrayObject)):
+                    PDFOperations._remap_references(obj, remap, visited)
+
+        reachable = PDFOperations._reachable_objects(writer)
+        removed = 0
+        bytes_saved = 0
+        for idnum, size in duplicates.items():
+            if idnum in reachable:
+                logger.debug(f"Keeping duplicate object {idnum}: still referenced")
+                continue
+            # Unreferenced now, so a null placeholder keeps the xref numbering without changing the document
+            objects[idnum - 1] = NullObject()
+            removed += 1
+            bytes_saved += size
+        return removed, bytes_saved
+
+    @staticmethod
+    def preparse_pdf(pdf_path):
+        """
+        Open a PDF lazily and parse its xref and page tree.
+
+        The reader keeps its file handle open so pages are read on demand;
+        close it with reader.stream.close() once the reader is done.
+
+        Returns:
+            PdfReader or None: The reader, or None if the PDF is unreadable.
+        """
+        f = open(pdf_path, "rb")
+        try:
+            reader = PdfReader(f)
+            logger.debug(f"Pre-parsed {len(reader.pages)} pages from {os.path.basename(pdf_path)}")
+            return reader
+        except Exception as e:
+            f.close()
+            logger.warning(f"Unable to parse PDF {os.path.basename(pdf_path)}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _open_merge_input(stack, pdf_file, reader=None):
+        """
+        Return a pre-parsed reader, or open pdf_file lazily on the ExitStack; None if missing.
+
+        Raises:
+            ValueError: The input is encrypted; its pages cannot be copied.
+        """
+        if reader is None:
+            if not os.path.exists(pdf_file):
+                logger.warning(f"Skipping missing file: {pdf_file}")
+                return None
+            reader = PdfReader(stack.enter_context(open(pdf_file, "rb")))
+        if reader.is_encrypted:
+            raise ValueError(f"{os.path.basename(pdf_file)} is encrypted; decrypt it before merging")
+        return reader
+
+    @staticmethod
+    def _release_merge_input(readers, index):
+        """Close a handed-over reader and drop the list's reference, so its objects can be freed"""
+        if readers and readers[index] is not None:
+            readers[index].stream.close()
+            readers[index] = None
+
+    @staticmethod
+    @cached_operation('merge_pdfs', inputs='pdf_files', ignore=('app_config', 'readers'))
+    def merge_pdfs(pdf_files, app_config, deduplicate=False, readers=None):
         """
         Merge multiple PDF files into a single PDF.
         
         Args:
             pdf_files (list): List of file paths to PDF files.
             app_config (dict): Flask app config
+            deduplicate (bool): Share identical fonts, images and form XObjects
+                across inputs instead of writing one copy per input.
+            readers (list): Optional readers from preparse_pdf, aligned with
+                pdf_files, so each input is parsed only once. Ownership passes
+                to the merge: each reader is closed and its slot set to None
+                once its pages are copied. The caller closes whatever is left
+                if the merge is not started.
             
         Returns:
             str or None: Path to the merged PDF file or None if error.
@@ -92,25 +619,40 @@ class PDFOperations:
             if not pdf_files or len(pdf_files) < 2:
                 logger.warning("Need at least 2 PDF files to merge.")
                 return None
+
+            total_bytes = sum(os.path.getsize(pdf_file) for pdf_file in pdf_files if os.path.exists(pdf_file))
+            if total_bytes > app_config.get('MERGE_STREAMING_THRESHOLD_MB', 100) * 1024 * 1024:
+                # Too large to hold every input in one writer; flush per input instead
+                if deduplicate:
+                    logger.info("Streaming merge selected for large inputs; resource deduplication skipped")
+                return PDFOperations.merge_pdfs_streaming(pdf_files, app_config, readers)
             
             logger.info(f"Starting PDF merge for {len(pdf_files)} files")
             writer = PdfWriter()
 
-            for pdf_file in pdf_files:
-                if not os.path.exists(pdf_file):
-                    logger.warning(f"Skipping missing file: {pdf_file}")
-                    continue
-
-                with open(pdf_file, "rb") as f:
-                    reader = PdfReader(f)
+            for index, pdf_file in enumerate(pdf_files):
+                with contextlib.ExitStack() as stack:
+                    reader = PDFOperations._open_merge_input(stack, pdf_file, readers[index] if readers else None)
+                    if reader is None:
+                        continue
                     for page in reader.pages:
                         writer.add_page(page)
                     logger.debug(f"Added {len(reader.pages)} pages from {os.path.basename(pdf_file)}")
+                    # The writer holds copies of the pages now
+                    PDFOperations._release_merge_input(readers, index)
             
             if not writer.pages:
                 logger.error("No valid pages found to merge.")
                 return None
 
+            if deduplicate:
+                started = time.perf_counter()
+                removed, bytes_saved = PDFOperations._deduplicate_objects(writer)
+                logger.info(
+                    f"Merge deduplication removed {removed} duplicate objects, "
+                    f"saved {bytes_saved} bytes in {time.perf_counter() - started:.3f}s"
+                )
+
             # Create unique output filename to avoid overwriting
             output_filename = os.path.join(
                 app_config['UPLOAD_FOLDER'], 
@@ -123,27 +665,160 @@ class PDFOperations:
             logger.info(f"PDF merge successful: {output_filename}")
             return output_filename
 
+        except ValueError as e:
+            logger.error(f"PDF merge rejected: {str(e)}")
+            return None
         except Exception as e:
             logger.error(f"PDF merging error: {str(e)}", exc_info=True)
             return None
 
+    @staticmethod
+    def merge_pdfs_streaming(pdf_files, app_config, readers=None):
+        """
+        Merge PDFs with memory bounded by the largest input, not the sum of inputs.
+
+        Pages are copied in batches into a scratch PdfWriter whose objects are
+        renumbered and written straight to the output file, after which the
+        batch and its source reader are dropped. The page tree, catalog and
+        xref table are written last. Inputs larger than MERGE_MEMORY_BUDGET_MB
+        are flushed in proportionally smaller page batches; shared fonts and
+        images are then written once per batch.
+
+        Args:
+            pdf_files (list): List of file paths to PDF files.
+            app_config (dict): Flask app config
+            readers (list): Optional lazy readers from preparse_pdf, aligned with
+                pdf_files. Each is closed and its slot set to None once flushed.
+
+        Returns:
+            str or None: Path to the merged PDF file or None if error.
+        """
+        output_filename = os.path.join(
+            app_config['UPLOAD_FOLDER'],
+            f"merged_pdf_{uuid.uuid4().hex}.pdf"
+        )
+        budget_bytes = app_config.get('MERGE_MEMORY_BUDGET_MB', 256) * 1024 * 1024
+
+        # Object 1 is the catalog and object 2 the page tree root, both written last
+        catalog_id, pages_id = 1, 2
+        next_id = 3
+        offsets = {}
+        kids = []
+
+        try:
+            logger.info(f"Starting streaming PDF merge for {len(pdf_files)} files")
+
+            with open(output_filename, "wb") as output_file:
+                output_file.write(b"%PDF-1.7\n%\xE2\xE3\xCF\xD3\n")
+
+                for index, pdf_file in enumerate(pdf_files):
+                    # A file handle keeps PdfReader lazy instead of loading the whole input
+                    with contextlib.ExitStack() as stack:
+                        reader = PDFOperations._open_merge_input(stack, pdf_file, readers[index] if readers else None)
+                        if reader is None:
+                            continue
+                        page_count = len(reader.pages)
+                        file_size = os.path.getsize(pdf_file)
+                        batch_pages = page_count
+                        if file_size > budget_bytes:
+                            batch_pages = max(1, page_count * budget_bytes // file_size)
+
+                        for batch_start in range(0, page_count, batch_pages):
+                            batch = PdfWriter()
+                            for page_num in range(batch_start, min(batch_start + batch_pages, page_count)):
+                                batch.add_page(reader.pages[page_num])
+
+                            skipped = {batch._pages.idnum, batch._info.idnum, batch._root.idnum}
+                            remap = {batch._pages.idnum: pages_id}
+                            for idnum in range(1, len(batch._objects) + 1):
+                                if idnum not in skipped:
+                                    remap[idnum] = next_id
+                                    next_id += 1
+
+                            kids.extend(remap[ref.idnum] for ref in batch.get_object(batch._pages)['/Kids'])
+
+                            visited = set()
+                            for idnum, obj in enumerate(batch._objects, start=1):
+                                if idnum in skipped:
+                                    continue
+                                if isinstance(obj, (DictionaryObject, ArrayObject)):
+                                    PDFOperations._remap_references(obj, remap, visited)
+                                offsets[remap[idnum]] = output_file.tell()
+                                output_file.write(f"{remap[idnum]} 0 obj\n".encode())
+                                obj.write_to_stream(output_file, None)
+                                output_file.write(b"\nendobj\n")
+
+                            # Drop the flushed batch and anything the reader cached for it
+                            del batch
+                            reader.resolved_objects.clear()
+
+                        logger.debug(f"Flushed {page_count} pages from {os.path.basename(pdf_file)}")
+                        PDFOperations._release_merge_input(readers, index)
+                        del reader
+                    gc.collect()
+
+                if not kids:
+                    raise ValueError("No valid pages found to merge.")
+
+                offsets[pages_id] = output_file.tell()
+                kid_refs = " ".join(f"{kid} 0 R" for kid in kids)
+                output_file.write(
+                    f"{pages_id} 0 obj\n<< /Type /Pages /Count {len(kids)} /Kids [ {kid_refs} ] >>\nendobj\n".encode()
+                )
+                offsets[catalog_id] = output_file.tell()
+                output_file.write(f"{catalog_id} 0 obj\n<< /Type /Catalog /Pages {pages_id} 0 R >>\nendobj\n".encode())
+
+                xref_location = output_file.tell()
+                output_file.write(f"xref\n0 {next_id}\n0000000000 65535 f \n".encode())
+                for idnum in range(1, next_id):
+                    output_file.write(f"{offsets[idnum]:0>10} 00000 n \n".encode())
+                output_file.write(
+                    f"trailer\n<< /Size {next_id} /Root {catalog_id} 0 R >>\nstartxref\n{xref_location}\n%%EOF\n".encode()
+                )
+
+            logger.info(f"Streaming PDF merge successful: {len(kids)} pages saved to: {output_filename}")
+            return output_filename
+
+        except Exception as e:
+            if isinstance(e, ValueError):
+                logger.error(f"Streaming PDF merge rejected: {str(e)}")
+            else:
+                logger.error(f"Streaming PDF merging error: {str(e)}", exc_info=True)
+            if os.path.exists(output_filename):
+                os.remove(output_filename)
+            return None
+
 
 class EncryptOps:
     """Encryption operations"""
+
+    # RC4 variants are written by PyPDF2; AES needs PyMuPDF, which pdf2docx installs
+    ALGORITHMS = ('RC4-40', 'RC4-128', 'AES-128', 'AES-256')
     
     @staticmethod
-    def encrypt(input_path, output_path, password):
-        """Encrypt a PDF with password protection"""
+    def encrypt(input_path, output_path, password, algorithm=None):
+        """Encrypt a PDF with password protection (RC4-128 unless another algorithm is given)"""
         try:
             logger.info(f"Processing PDF encryption: {os.path.basename(input_path)}")
+
+            if algorithm in ('AES-128', 'AES-256'):
+                import fitz
+
+                doc = fitz.open(input_path)
+                doc.save(
+                    output_path,
+                    encryption=fitz.PDF_ENCRYPT_AES_256 if algorithm == 'AES-256' else fitz.PDF_ENCRYPT_AES_128,
+                    user_pw=password,
+                    owner_pw=password,
+                )
+                doc.close()
+                logger.info(f"PDF encrypted successfully ({algorithm}): {output_path}")
+                return True
             
             reader = PdfReader(input_path)
-            writer = PdfWriter()
-
-            for page in reader.pages:
-                writer.add_page(page)
+            writer = _copy_document(reader)
 
-            writer.encrypt(password)
+            writer.encrypt(password, use_128bit=algorithm != 'RC4-40')
 
             with open(output_path, 'wb') as f:
                 writer.write(f)
@@ -165,16 +840,18 @@ class DecryptOps:
         try:
             logger.info(f"Processing PDF decryption: {os.path.basename(input_path)}")
 
-            reader = PdfReader(input_path)
+            try:
+                reader = PdfReader(input_path)
 
-            if reader.is_encrypted:
-                if not reader.decrypt(password):
-                    logger.warning(f"Decryption failed - incorrect password: {os.path.basename(input_path)}")
-                    return False, "Incorrect password"
+                if reader.is_encrypted:
+                    if not reader.decrypt(password):
+                        logger.warning(f"Decryption failed - incorrect password: {os.path.basename(input_path)}")
+                        return False, "Incorrect password"
+            except DependencyError:
+                # PyPDF2 needs PyCryptodome for AES; PyMuPDF handles it natively
+                return DecryptOps._decrypt_aes(input_path, output_path, password)
 
-            writer = PdfWriter()
-            for page in reader.pages:
-                writer.add_page(page)
+            writer = _copy_document(reader)
 
             with open(output_path, 'wb') as f:
                 writer.write(f)
@@ -185,36 +862,348 @@ class DecryptOps:
         except Exception as e:
             logger.error(f"PDF decryption error: {str(e)}")
             return False, str(e)
-        
-class WatermarkOps:
+
     @staticmethod
-    def add_text_watermark(input_path, output_path, text, opacity=0.2):
+    def _decrypt_aes(input_path, output_path, password):
+        """Decrypt an AES-encrypted PDF with PyMuPDF"""
+        import fitz
+
+        doc = fitz.open(input_path)
         try:
-            from PyPDF2 import PdfReader, PdfWriter
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.pagesizes import A4
-            import io
+            if doc.needs_pass and not doc.authenticate(password):
+                logger.warning(f"Decryption failed - incorrect password: {os.path.basename(input_path)}")
+                return False, "Incorrect password"
+            doc.save(output_path, encryption=fitz.PDF_ENCRYPT_NONE)
+        finally:
+            doc.close()
 
-            reader = PdfReader(input_path)
-            writer = PdfWriter()
+        logger.info(f"PDF decrypted successfully (AES): {output_path}")
+        return True, "Success"
+
+
+def _batch_crypto_worker(mode, name, input_path, output_path, password, algorithm):
+    """Process-pool worker: encrypt or decrypt one file and time it"""
+    started = time.perf_counter()
+    if not password:
+        ok, error = False, "No password given"
+    elif mode == 'encrypt':
+        ok = EncryptOps.encrypt(input_path, output_path, password, algorithm)
+        error = None if ok else "Encryption failed"
+    else:
+        ok, message = DecryptOps.decrypt(input_path, output_path, password)
+        error = None if ok else message
+    return {
+        'file': name,
+        'output_path': output_path if ok else None,
+        'ok': ok,
+        'seconds': round(time.perf_counter() - started, 3),
+        'error': error,
+    }
+
+
+def _unique_name(name, used_names):
+    """Return name, or 'stem (2).ext' and so on if it is taken; records the result in used_names"""
+    stem, extension = os.path.splitext(name)
+    candidate = name
+    number = 2
+    while candidate in used_names:
+        candidate = f"{stem} ({number}){extension}"
+        number += 1
+    used_names.add(candidate)
+    return candidate
+
+
+class BatchCryptoOps:
+    """Batch encryption and decryption on a shared process pool"""
+
+    @staticmethod
+    def extract_pdfs(zip_path, upload_folder, max_size):
+        """
+        Extract the PDFs from an uploaded ZIP into upload_folder.
+
+        Entries are flattened to secure basenames, each extracted to its own
+        path, copied in chunks and dropped if they grow past max_size or are
+        not PDFs. Repeated basenames get a numbered display name.
+
+        Returns:
+            list: (display name, extracted path) tuples.
 
-            packet = io.BytesIO()
-            c = canvas.Canvas(packet, pagesize=A4)
-            c.setFillAlpha(opacity)
-            c.setFont("Helvetica-Bold", 40)
-            c.drawCentredString(300, 400, text)
-            c.save()
+        Raises:
+            ValueError: The archive has more than BATCH_ZIP_MAX_ENTRIES PDFs or
+                expands past BATCH_ZIP_MAX_TOTAL_MB.
+        """
+        max_total = BATCH_ZIP_MAX_TOTAL_MB * 1024 * 1024
+        prefix = uuid.uuid4().hex[:8]
+        extracted = []
+        used_names = set()
+        total = 0
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                entries = [
+                    info for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith('.pdf')
+                ]
+                if len(entries) > BATCH_ZIP_MAX_ENTRIES:
+                    raise ValueError(f"ZIP holds {len(entries)} PDFs; the limit is {BATCH_ZIP_MAX_ENTRIES}")
+
+                for index, info in enumerate(entries):
+                    name = os.path.basename(info.filename)
+                    try:
+                        output_path = validate_upload_path(f"{prefix}_{index}_{name}", upload_folder)
+                    except ValueError as e:
+                        logger.warning(f"Skipping ZIP entry {info.filename}: {str(e)}")
+                        continue
+
+                    # Sizes in the ZIP directory can lie, so the bytes actually written are counted
+                    written = 0
+                    with archive.open(info) as source, open(output_path, 'wb') as target:
+                        while written <= max_size:
+                            chunk = source.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            target.write(chunk)
+                            written += len(chunk)
+                            if total + written > max_total:
+                                break
+
+                    if total + written > max_total:
+                        os.remove(output_path)
+                        raise ValueError(f"ZIP expands past {BATCH_ZIP_MAX_TOTAL_MB} MB")
+                    if written > max_size or not is_valid_pdf(output_path):
+                        os.remove(output_path)
+                        logger.warning(f"Skipping ZIP entry {info.filename}: too large or not a PDF")
+                        continue
+                    total += written
+                    extracted.append((_unique_name(name, used_names), output_path))
+        except (ValueError, zipfile.BadZipFile):
+            for _, path in extracted:
+                os.remove(path)
+            raise
+        return extracted
+
+    @staticmethod
+    def run(mode, input_files, app_config, password=None, password_map=None, algorithm=None):
+        """
+        Encrypt or decrypt many PDFs on the shared crypto pool and bundle them in one ZIP.
+
+        With CRYPTO_WORKERS set to 1 the files are processed on the calling thread.
+
+        Args:
+            mode (str): 'encrypt' or 'decrypt'
+            input_files (list): (display name, path) tuples
+            app_config (dict): Flask app config
+            password (str): Password for files missing from password_map
+            password_map (dict): Per-file passwords keyed by display name
+            algorithm (str): One of EncryptOps.ALGORITHMS when encrypting
+
+        Returns:
+            tuple or None: (ZIP path, per-file results) or None if error.
+            The ZIP includes batch_report.csv with timing and failures.
+        """
+        try:
+            if not input_files:
+                logger.warning("Batch crypto request with no input files")
+                return None
+
+            password_map = password_map or {}
+            batch_id = uuid.uuid4().hex[:8]
+            prefix = 'encrypted' if mode == 'encrypt' else 'decrypted'
+            jobs = [
+                (
+                    mode,
+                    name,
+                    path,
+                    os.path.join(app_config['UPLOAD_FOLDER'], f"{prefix}_{batch_id}_{index}_{os.path.basename(path)}"),
+                    password_map.get(name, password),
+                    algorithm,
+                )
+                for index, (name, path) in enumerate(input_files)
+            ]
+
+            workers = max(1, app_config.get('CRYPTO_WORKERS') or 1)
+            logger.info(f"Starting batch {mode} of {len(jobs)} files on {workers} workers ({algorithm or 'default'})")
+            started = time.perf_counter()
+
+            if workers == 1:
+                results = [_batch_crypto_worker(*job) for job in jobs]
+            else:
+                results = list(map_ordered('crypto', workers, _batch_crypto_worker, *zip(*jobs)))
+
+            zip_filename = os.path.join(app_config['UPLOAD_FOLDER'], f"batch_{prefix}_{batch_id}.zip")
+            report = StringIO()
+            report_writer = csv.writer(report)
+            report_writer.writerow(['file', 'status', 'seconds', 'error'])
+
+            used_names = set()
+            with zipfile.ZipFile(zip_filename, 'w') as zip_file:
+                for result in results:
+                    report_writer.writerow([
+                        result['file'], 'ok' if result['ok'] else 'failed', result['seconds'], result['error'] or ''
+                    ])
+                    if not result['ok']:
+                        logger.warning(f"Batch {mode} failed for {result['file']}: {result['error']}")
+                        continue
+
+                    archive_name = _unique_name(f"{prefix}_{result['file']}", used_names)
+                    zip_file.write(result['output_path'], archive_name)
+                    os.remove(result['output_path'])
+
+                zip_file.writestr('batch_report.csv', report.getvalue())
+
+            succeeded = sum(1 for result in results if result['ok'])
+            logger.info(
+                f"Batch {mode} finished in {time.perf_counter() - started:.2f}s: "
+                f"{succeeded} succeeded, {len(results) - succeeded} failed. Saved to: {zip_filename}"
+            )
+            return zip_filename, results
+
+        except Exception as e:
+            logger.error(f"Batch {mode} error: {str(e)}", exc_info=True)
+            return None
+
+
+@functools.lru_cache(maxsize=WATERMARK_CACHE_SIZE)
+def _render_watermark_stamp(text, opacity, font, box, rotation):
+    """
+    Render a watermark stamp as one-page PDF bytes, cached by its settings.
+
+    The text is centred on the page box (x0, y0, x1, y1) and turned against
+    the page's /Rotate so it reads upright once the viewer applies the
+    rotation. The font shrinks from 40pt when the text would overflow 80% of
+    the displayed page width.
+    """
+    x0, y0, x1, y1 = box
+    width, height = x1 - x0, y1 - y0
+    displayed_width = height if rotation in (90, 270) else width
+    font_size = min(40, 40 * displayed_width * 0.8 / max(stringWidth(text, font, 40), 1))
+
+    packet = BytesIO()
+    c = canvas.Canvas(packet, pagesize=(x1, y1))
+    c.setFillAlpha(opacity)
+    c.setFont(font, font_size)
+    c.translate(x0 + width / 2, y0 + height / 2)
+    c.rotate(rotation)
+    c.drawCentredString(0, -font_size / 3, text)
+    c.save()
+    return packet.getvalue()
+
+
+class WatermarkOps:
+    @staticmethod
+    def stamp_cache_info():
+        """Hit/miss counters and size of the rendered stamp cache"""
+        return _render_watermark_stamp.cache_info()
+
+    @staticmethod
+    def _add_stamp_xobject(writer, stamp_page):
+        """Register a stamp page once in the writer as a Form XObject and return its reference"""
+        xobject = DecodedStreamObject()
+        xobject.set_data(stamp_page.get_contents().get_data())
+        xobject = xobject.flate_encode()
+        xobject.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): ArrayObject(stamp_page.mediabox),
+            NameObject('/Resources'): stamp_page['/Resources'].clone(writer),
+        })
+        return writer._add_object(xobject)
+
+    @staticmethod
+    def _unused_xobject_names(pages):
+        """Yield /DocEaseWatermark0, 1, ... skipping names already in any page's /XObject resources"""
+        used = set()
+        for page in pages:
+            resources = page.get('/Resources')
+            if resources is not None and isinstance(resources.get('/XObject'), DictionaryObject):
+                used.update(resources['/XObject'].keys())
+        for number in itertools.count():
+            name = f"/DocEaseWatermark{number}"
+            if name not in used:
+                yield name
+
+    @staticmethod
+    def _content_stream(writer, data):
+        """Add a small shared content stream to the writer and return its reference"""
+        stream = DecodedStreamObject()
+        stream.set_data(data)
+        return writer._add_object(stream)
+
+    @staticmethod
+    def _stamp_with_xobject(writer, page, name, xobject_ref, prefix_ref, suffix_ref):
+        """
+        Draw a shared Form XObject on top of a page.
+
+        The page's own content is wrapped in q/Q so its graphics state cannot
+        leak into the stamp, and the stamp is invoked with a single Do. The
+        wrapper streams are shared by every page, so each page only gains a
+        resource entry and two array references.
+        """
+        if '/Resources' not in page:
+            page[NameObject('/Resources')] = DictionaryObject()
+        resources = page['/Resources']
+        if '/XObject' not in resources:
+            resources[NameObject('/XObject')] = DictionaryObject()
+        resources['/XObject'][NameObject(name)] = xobject_ref
+
+        contents = page.raw_get('/Contents') if '/Contents' in page else None
+        if contents is None:
+            original = []
+        elif isinstance(contents, IndirectObject) and isinstance(contents.get_object(), ArrayObject):
+            original = list(contents.get_object())
+        elif isinstance(contents, ArrayObject):
+            original = list(contents)
+        else:
+            original = [contents]
+        page[NameObject('/Contents')] = ArrayObject([prefix_ref, *original, suffix_ref])
+
+    @staticmethod
+    @cached_operation('watermark', inputs='input_path', output='output_path')
+    def add_text_watermark(input_path, output_path, text, opacity=0.2, font="Helvetica-Bold",
+                           shared_stamp=True):
+        """
+        Stamp text on every page.
 
-            packet.seek(0)
-            watermark = PdfReader(packet).pages[0]
+        With shared_stamp each distinct stamp is written once as a Form XObject
+        and pages reference it, keeping output size and time per page nearly
+        constant. Otherwise the stamp's content and resources are merged into
+        every page.
+        """
+        try:
+            reader = PdfReader(input_path)
+            writer = _copy_document(reader)
 
-            for page in reader.pages:
-                page.merge_page(watermark)
-                writer.add_page(page)
+            # One parsed stamp per distinct page box and rotation in this document
+            stamps = {}
+            if shared_stamp:
+                prefix_ref = WatermarkOps._content_stream(writer, b"q\n")
+                # The shared stamp streams name their XObject, so the name must be free on every page
+                stamp_names = WatermarkOps._unused_xobject_names(writer.pages)
+            for page in writer.pages:
+                box = tuple(round(float(value), 2) for value in page.mediabox)
+                rotation = int(page.get('/Rotate', 0)) % 360
+                if (box, rotation) not in stamps:
+                    stamp_pdf = _render_watermark_stamp(text, opacity, font, box, rotation)
+                    stamp_page = PdfReader(BytesIO(stamp_pdf)).pages[0]
+                    if shared_stamp:
+                        name = next(stamp_names)
+                        xobject_ref = WatermarkOps._add_stamp_xobject(writer, stamp_page)
+                        suffix_ref = WatermarkOps._content_stream(writer, f"Q\nq {name} Do Q\n".encode())
+                        stamp_page = (name, xobject_ref, suffix_ref)
+                    else:
+                        # Cloned into the writer first, so the merged page references the writer's copies
+                        stamp_page = stamp_page.clone(writer)
+                    stamps[(box, rotation)] = stamp_page
+
+                if shared_stamp:
+                    name, xobject_ref, suffix_ref = stamps[(box, rotation)]
+                    WatermarkOps._stamp_with_xobject(writer, page, name, xobject_ref, prefix_ref, suffix_ref)
+                else:
+                    page.merge_page(stamps[(box, rotation)])
 
             with open(output_path, "wb") as f:
                 writer.write(f)
 
+            logger.debug(f"Watermark stamp cache: {WatermarkOps.stamp_cache_info()}")
             return True
         except Exception as e:
             logger.error(f"WatermarkOps error: {str(e)}")
@@ -223,51 +1212,777 @@ class WatermarkOps:
 class RotateOps:
 
     @staticmethod
-    def rotate(input_path, output_path, angle):
+    def _rotation_targets(total_pages, pages):
+        """Return the 0-based indexes selected by a page spec such as "3, 7-9", or every page"""
+        if not pages or not pages.strip():
+            return set(range(total_pages))
+        # Accept en and em dashes typed or pasted into the form
+        spec = pages.replace('\u2013', '-').replace('\u2014', '-')
+        return {
+            page_num - 1
+            for start, end in PDFOperations._parse_range_spec(spec, total_pages)
+            for page_num in range(start, end + 1)
+        }
+
+    @staticmethod
+    @cached_operation('rotate', inputs='input_path', output='output_path')
+    def rotate(input_path, output_path, angle, pages=None, incremental=False):
+        """
+        Rotate the pages selected by a page spec (all pages when empty) by a multiple of 90 degrees.
+
+        With incremental the original bytes are kept and only the changed page
+        dictionaries plus a new cross-reference section are appended. Encrypted
+        files fall back to a full rewrite.
+        """
         try:
+            if angle % 90 != 0:
+                raise ValueError(f"Rotation angle must be a multiple of 90 degrees: {angle}")
+
+            if incremental:
+                try:
+                    result = RotateOps.rotate_incremental(input_path, output_path, angle, pages)
+                    if result is not None:
+                        return result
+                except Exception as e:
+                    # Malformed or unusual files still rotate with a full rewrite
+                    logger.warning(
+                        f"Incremental rotation failed, rewriting {os.path.basename(input_path)}: {str(e)}"
+                    )
+
             reader = PdfReader(input_path)
-            writer = PdfWriter()
+            writer = _copy_document(reader)
+            targets = RotateOps._rotation_targets(len(reader.pages), pages)
 
-            for page in reader.pages:
-                page.rotate(angle)
-                writer.add_page(page)
+            for index, page in enumerate(writer.pages):
+                if index in targets:
+                    page.rotate(angle)
 
             with open(output_path, "wb") as f:
                 writer.write(f)
 
             return True
-        except Exception:
+        except Exception as e:
+            logger.error(f"PDF rotation error: {str(e)}")
             return False
 
+    @staticmethod
+    def _page_tree_refs(reader):
+        """
+        Return (reference, effective /Rotate) for each page of a reader in order.
+
+        Reads the page tree directly instead of reader.pages, which parses
+        every page and copies inherited attributes between sibling subtrees.
+        """
+        refs = []
+        stack = [(reader.trailer['/Root'].raw_get('/Pages'), 0)]
+        while stack:
+            node_ref, rotation = stack.pop()
+            node = node_ref.get_object()
+            rotation = int(node.get('/Rotate', rotation))
+
+            if node.get('/Type') == '/Pages':
+                for kid in reversed(node['/Kids']):
+                    stack.append((kid, rotation))
+                continue
+            refs.append((node_ref, rotation))
+        return refs
+
+    @staticmethod
+    def rotate_incremental(input_path, output_path, angle, pages=None):
+        """
+        Write the rotation as an incremental update to a copy of the original file.
+
+        Returns None when the file cannot be updated incrementally (it is
+        encrypted), so the caller can rewrite it instead. Errors on
+        malformed files propagate and the caller rewrites it as well.
+        """
+        with open(input_path, "rb") as source:
+            # A file handle keeps the reader lazy: only the xref and page dicts are parsed
+            reader = PdfReader(source)
+            if reader.is_encrypted:
+                logger.info(f"Encrypted PDF, rotating with a full rewrite: {os.path.basename(input_path)}")
+                return None
+
+            page_refs = RotateOps._page_tree_refs(reader)
+            targets = RotateOps._rotation_targets(len(page_refs), pages)
+
+            source.seek(0, os.SEEK_END)
+            file_size = source.tell()
+            source.seek(max(0, file_size - 1024))
+            tail = source.read()
+            prev_offset = int(tail[tail.rindex(b"startxref") + 9:].split()[0])
+            source.seek(prev_offset)
+            uses_xref_stream = not source.read(4).startswith(b"xref")
+
+            updated = {}
+            for index in sorted(targets):
+                ref, rotation = page_refs[index]
+                page = DictionaryObject(ref.get_object())
+                page[NameObject('/Rotate')] = NumberObject((rotation + angle) % 360)
+                updated[ref.idnum] = (ref.generation, page)
+
+            trailer = reader.trailer
+            # Cross-reference stream trailers as read by PyPDF2 may lack /Size
+            size = max(
+                int(trailer.get('/Size', 0)),
+                max((idnum for entries in reader.xref.values() for idnum in entries), default=0) + 1,
+                max(reader.xref_objStm, default=0) + 1,
+            )
+
+            with open(output_path, "wb") as output:
+                source.seek(0)
+                shutil.copyfileobj(source, output)
+
+        with open(output_path, "ab") as output:
+            offset = file_size
+            if not tail.endswith((b"\n", b"\r")):
+                output.write(b"\n")
+                offset += 1
+
+            offsets = {}
+            for idnum, (generation, page) in sorted(updated.items()):
+                body = BytesIO()
+                body.write(f"{idnum} {generation} obj\n".encode())
+                page.write_to_stream(body, None)
+                body.write(b"\nendobj\n")
+                offsets[idnum] = (offset, generation)
+                output.write(body.getvalue())
+                offset += body.tell()
+
+            trailer_entries = DictionaryObject({NameObject('/Prev'): NumberObject(prev_offset)})
+            for key in ('/Root', '/Info', '/ID'):
+                if key in trailer:
+                    trailer_entries[NameObject(key)] = trailer.raw_get(key)
+
+            if uses_xref_stream:
+                # The update has to use the same cross-reference format as the original
+                xref_id = size
+                offsets[xref_id] = (offset, 0)
+                # Offset field wide enough for the largest offset, so inputs past 4 GB still fit
+                offset_width = max(4, (offset.bit_length() + 7) // 8)
+                index = ArrayObject()
+                data = BytesIO()
+                for idnum, (entry_offset, generation) in sorted(offsets.items()):
+                    index.extend([NumberObject(idnum), NumberObject(1)])
+                    data.write(
+                        b"\x01" + entry_offset.to_bytes(offset_width, "big") + generation.to_bytes(2, "big")
+                    )
+                stream = DecodedStreamObject()
+                stream.set_data(data.getvalue())
+                stream.update(trailer_entries)
+                stream.update({
+                    NameObject('/Type'): NameObject('/XRef'),
+                    NameObject('/Size'): NumberObject(xref_id + 1),
+                    NameObject('/W'): ArrayObject([NumberObject(1), NumberObject(offset_width), NumberObject(2)]),
+                    NameObject('/Index'): index,
+                })
+                body = BytesIO()
+                body.write(f"{xref_id} 0 obj\n".encode())
+                stream.write_to_stream(body, None)
+                body.write(b"\nendobj\n")
+                output.write(body.getvalue())
+            else:
+                output.write(b"xref\n")
+                for idnum, (entry_offset, generation) in sorted(offsets.items()):
+                    output.write(f"{idnum} 1\n{entry_offset:010d} {generation:05d} n\r\n".encode())
+                trailer_entries[NameObject('/Size')] = NumberObject(size)
+                body = BytesIO()
+                body.write(b"trailer\n")
+                trailer_entries.write_to_stream(body, None)
+                output.write(body.getvalue())
+
+            output.write(f"\nstartxref\n{offset}\n%%EOF\n".encode())
+
+        logger.info(f"PDF rotated incrementally ({len(updated)} pages): {output_path}")
+        return True
+
+
+@functools.lru_cache(maxsize=65536)
+def _text_width(text, font):
+    """Width of text at the CSV table font size; words repeat a lot across rows"""
+    return stringWidth(text, font, CSVToPDFOps.FONT_SIZE)
+
 
 class CSVToPDFOps:
     """CSV to PDF conversion operations"""
-    
+
+    FONT = "Helvetica"
+    HEADER_FONT = "Helvetica-Bold"
+    FONT_SIZE = 8
+    LEADING = 10
+    PADDING = 3
+    MARGIN = 36
+    FOOTER_HEIGHT = 18
+    MIN_COLUMN_WIDTH = 24
+    MAX_COLUMN_WIDTH = 220
+    # Wrapped cells are cut off after this many lines and end in an ellipsis
+    MAX_CELL_LINES = 4
+    ELLIPSIS = "\u2026"
+
+    @staticmethod
+    def _fit_text(text, width, font, max_lines):
+        """Wrap text on spaces into at most max_lines lines no wider than width, truncating the rest"""
+        words = text.split()
+        space = _text_width(" ", font)
+        lines = []
+        line = []
+        line_width = 0
+        truncated = False
+
+        for word in words:
+            word_width = _text_width(word, font)
+            if line and line_width + space + word_width <= width:
+                line.append(word)
+                line_width += space + word_width
+                continue
+            if line:
+                lines.append(" ".join(line))
+            # Break words that are wider than the column on their own
+            while word_width > width and len(lines) < max_lines:
+                cut = max(1, int(len(word) * width / word_width))
+                while cut > 1 and stringWidth(word[:cut], font, CSVToPDFOps.FONT_SIZE) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = _text_width(word, font)
+            if len(lines) >= max_lines:
+                truncated = True
+                break
+            line = [word]
+            line_width = word_width
+
+        if not truncated and line:
+            lines.append(" ".join(line))
+        if len(lines) > max_lines:
+            truncated = True
+        if not truncated:
+            return lines
+
+        # Out of lines: end the last kept line with an ellipsis that fits
+        lines = lines[:max_lines]
+        last = lines[-1]
+        while last and _text_width(last + CSVToPDFOps.ELLIPSIS, font) > width:
+            last = last[:-1]
+        lines[-1] = last + CSVToPDFOps.ELLIPSIS
+        return lines
+
+    @staticmethod
+    def measure_layout(header, sample_rows):
+        """
+        Choose page size and column widths from the header and a sample of rows.
+
+        Each column gets the width of its widest sampled cell within
+        MIN/MAX_COLUMN_WIDTH. Landscape is used when the columns do not fit
+        portrait, and columns are scaled down to fit when they still overflow.
+        """
+        size = CSVToPDFOps.FONT_SIZE
+        padding = 2 * CSVToPDFOps.PADDING
+        columns = max([len(header)] + [len(row) for row in sample_rows]) or 1
+        natural = [CSVToPDFOps.MIN_COLUMN_WIDTH] * columns
+        for font, rows in ((CSVToPDFOps.HEADER_FONT, [header]), (CSVToPDFOps.FONT, sample_rows)):
+            for row in rows:
+                for index, cell in enumerate(row):
+                    # Cells that hit the cap are not worth measuring in full
+                    width = stringWidth(cell[:80], font, size) + padding
+                    natural[index] = min(max(natural[index], width), CSVToPDFOps.MAX_COLUMN_WIDTH)
+
+        pagesize = A4
+        total = sum(natural)
+        if total > A4[0] - 2 * CSVToPDFOps.MARGIN:
+            pagesize = landscape(A4)
+        available = pagesize[0] - 2 * CSVToPDFOps.MARGIN
+        if total > available:
+            natural = [width * available / total for width in natural]
+
+        return {
+            'pagesize': pagesize,
+            'widths': natural,
+            'header': list(header) + [""] * (columns - len(header)),
+        }
+
+    @staticmethod
+    def _row_lines(row, layout, font):
+        """Wrapped lines for each cell of a row"""
+        inner = [width - 2 * CSVToPDFOps.PADDING for width in layout['widths']]
+        return [
+            CSVToPDFOps._fit_text(cell, inner[index], font, CSVToPDFOps.MAX_CELL_LINES)
+            for index, cell in enumerate(row[:len(inner)])
+        ]
+
+    @staticmethod
+    def _row_height(cells):
+        return max([len(lines) for lines in cells] + [1]) * CSVToPDFOps.LEADING + 2 * CSVToPDFOps.PADDING
+
+    @staticmethod
+    def _draw_row(c, cells, layout, y, height, font, fill=None):
+        """Draw one table row with its top edge at y"""
+        x = CSVToPDFOps.MARGIN
+        table_width = sum(layout['widths'])
+        if fill is not None:
+            c.setFillGray(fill)
+            c.rect(x, y - height, table_width, height, stroke=0, fill=1)
+            c.setFillGray(0)
+
+        # One text object per row keeps reportlab's per-string overhead down
+        text = c.beginText()
+        text.setFont(font, CSVToPDFOps.FONT_SIZE)
+        for index, lines in enumerate(cells):
+            text_y = y - CSVToPDFOps.PADDING - CSVToPDFOps.FONT_SIZE
+            for line in lines:
+                text.setTextOrigin(x + CSVToPDFOps.PADDING, text_y)
+                text.textOut(line)
+                text_y -= CSVToPDFOps.LEADING
+            x += layout['widths'][index]
+        c.drawText(text)
+        c.line(CSVToPDFOps.MARGIN, y - height, CSVToPDFOps.MARGIN + table_width, y - height)
+
+    @staticmethod
+    def _page_frame(layout):
+        """Return (header cells, header height, page top, lowest y a row may reach)"""
+        header_cells = CSVToPDFOps._row_lines(layout['header'], layout, CSVToPDFOps.HEADER_FONT)
+        top = layout['pagesize'][1] - CSVToPDFOps.MARGIN
+        bottom = CSVToPDFOps.MARGIN + CSVToPDFOps.FOOTER_HEIGHT
+        return header_cells, CSVToPDFOps._row_height(header_cells), top, bottom
+
     @staticmethod
-    def convert(csv_path, pdf_path):
-        """Convert CSV file to PDF"""
+    def render_rows(rows, layout, part_path, first_page=1, pages_per_part=None):
+        """
+        Render rows as table pages into one or more part PDFs.
+
+        Every page starts with the header row and ends with a page number
+        footer counted from first_page. A new part file is started every
+        pages_per_part pages, because a reportlab canvas keeps all of its
+        pages in memory until it is saved.
+
+        Args:
+            rows (iterable): CSV rows to draw.
+            layout (dict): Result of measure_layout.
+            part_path (callable): Returns the file path for a part index.
+            first_page (int): Page number printed on the first page.
+            pages_per_part (int): Pages per part file, CSV_PDF_PART_PAGES by default.
+
+        Returns:
+            tuple: (part paths, pages rendered, rows rendered)
+        """
+        pages_per_part = pages_per_part or CSV_PDF_PART_PAGES
+        width = layout['pagesize'][0]
+        header_cells, header_height, top, bottom = CSVToPDFOps._page_frame(layout)
+
+        parts = []
+        pages = 0
+        row_count = 0
+        c = None
+        y = bottom
+
+        def finish_page():
+            c.setFont(CSVToPDFOps.FONT, CSVToPDFOps.FONT_SIZE)
+            c.drawCentredString(width / 2, CSVToPDFOps.MARGIN, f"Page {first_page + pages - 1}")
+            c.showPage()
+
+        def start_page():
+            nonlocal c, pages, y
+            if c is not None:
+                finish_page()
+                if pages % pages_per_part == 0:
+                    c.save()
+                    c = None
+            if c is None:
+                parts.append(part_path(len(parts)))
+                c = canvas.Canvas(parts[-1], pagesize=layout['pagesize'])
+                c.setLineWidth(0.25)
+            pages += 1
+            CSVToPDFOps._draw_row(c, header_cells, layout, top, header_height, CSVToPDFOps.HEADER_FONT, fill=0.85)
+            y = top - header_height
+
+        for row in rows:
+            cells = CSVToPDFOps._row_lines(row, layout, CSVToPDFOps.FONT)
+            row_height = CSVToPDFOps._row_height(cells)
+            if c is None or y - row_height < bottom:
+                start_page()
+            CSVToPDFOps._draw_row(c, cells, layout, y, row_height, CSVToPDFOps.FONT)
+            y -= row_height
+            row_count += 1
+
+        if c is None:
+            # No data rows: still produce a page with the header
+            start_page()
+        finish_page()
+        c.save()
+        return parts, pages, row_count
+
+    @staticmethod
+    def _iter_chunk_ranges(csv_path, chunk_rows):
+        """
+        Yield the (start, end) byte ranges of the data rows in chunk_rows-row chunks.
+
+        Quoted fields may span lines, so record boundaries come from a csv
+        parse of the file; nothing is copied. Bytes are decoded as Latin-1,
+        which costs nothing and maps each byte to one character: the quotes,
+        commas and line breaks the parser looks at never occur inside a
+        multi-byte UTF-8 character.
+        """
+        with open(csv_path, 'rb') as file:
+            position = 0
+
+            def lines():
+                nonlocal position
+                for line in file:
+                    position += len(line)
+                    yield line.decode('latin-1')
+
+            # The reader pulls one line at a time, so position is the end of the last record read
+            reader = csv.reader(lines())
+            next(reader, None)
+            start = position
+            count = 0
+            for _ in reader:
+                count += 1
+                if count == chunk_rows:
+                    yield start, position
+                    start = position
+                    count = 0
+            if count:
+                yield start, position
+
+    @staticmethod
+    def _render_parallel(csv_path, layout, part_prefix, workers):
+        """
+        Render the data rows of csv_path on the shared CSV pool; returns the same tuple as render_rows.
+
+        The file is split into CSV_PDF_CHUNK_ROWS-row byte ranges whose row
+        heights are measured in the workers, each reading its range from the
+        original file. The page breaks are then laid out here in order,
+        exactly as render_rows would place them, and batches of whole pages
+        are rendered in the workers with their global first page number.
+        Joining the batch parts in order keeps headers and numbering intact.
+        """
+        chunk_ranges = list(CSVToPDFOps._iter_chunk_ranges(csv_path, CSV_PDF_CHUNK_ROWS))
+        chunk_heights = map_ordered(
+            'csv-to-pdf', workers, _csv_heights_worker,
+            [csv_path] * len(chunk_ranges),
+            [start for start, _ in chunk_ranges],
+            [end for _, end in chunk_ranges],
+            [layout] * len(chunk_ranges),
+        )
+
+        _, header_height, top, bottom = CSVToPDFOps._page_frame(layout)
+        page_starts = []
+        row_count = 0
+        y = None
+        for heights in chunk_heights:
+            for row_height in heights:
+                if y is None or y - row_height < bottom:
+                    page_starts.append(row_count)
+                    y = top - header_height
+                y -= row_height
+                row_count += 1
+
+        if not page_starts:
+            return CSVToPDFOps.render_rows([], layout, lambda index: f"{part_prefix}.part{index}.pdf")
+
+        # Several batches per worker so uneven pages still balance
+        batch_pages = max(1, min(CSV_PDF_PART_PAGES, -(-len(page_starts) // (workers * 4))))
+        firsts = list(range(0, len(page_starts), batch_pages))
+        row_ends = [page_starts[first] for first in firsts[1:]] + [row_count]
+        logger.info(
+            f"Parallel CSV render: {row_count} rows, {len(page_starts)} pages "
+            f"in batches of {batch_pages} on {workers} workers"
+        )
+        batches = map_ordered(
+            'csv-to-pdf', workers, _csv_render_worker,
+            [csv_path] * len(firsts),
+            [chunk_ranges] * len(firsts),
+            [page_starts[first] for first in firsts],
+            row_ends,
+            [layout] * len(firsts),
+            [first + 1 for first in firsts],
+            [f"{part_prefix}.batch{index}" for index in range(len(firsts))],
+        )
+
+        parts = []
+        for batch_parts, _, _ in batches:
+            parts.extend(batch_parts)
+        return parts, len(page_starts), row_count
+
+    @staticmethod
+    def _join_parts(parts, pdf_path):
+        """Join part PDFs in order into pdf_path and delete them"""
+        try:
+            if len(parts) == 1:
+                os.replace(parts[0], pdf_path)
+                return True
+            merged = PDFOperations.merge_pdfs_streaming(parts, {'UPLOAD_FOLDER': os.path.dirname(pdf_path) or '.'})
+            if not merged:
+                return False
+            os.replace(merged, pdf_path)
+            return True
+        finally:
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+
+    @staticmethod
+    def convert(csv_path, pdf_path, workers=None):
+        """
+        Convert a CSV file to a paginated table PDF.
+
+        Rows are streamed from the file and pages are flushed to part files
+        as they fill, so memory stays flat however long the CSV is. The first
+        row is the header and is repeated at the top of every page. CSVs of
+        CSV_PDF_PARALLEL_MIN_MB or more are rendered on the shared pool of
+        CSV_PDF_WORKERS processes when it is above 1.
+        """
+        workers = workers or CSV_PDF_WORKERS
+        part_prefix = f"{pdf_path}.{uuid.uuid4().hex}"
         try:
             logger.info(f"Starting CSV to PDF conversion: {os.path.basename(csv_path)}")
-            
-            c = canvas.Canvas(pdf_path, pagesize=A4)
-            width, height = A4
-            
-            y = height - 40
-            
-            with open(csv_path, newline='', encoding='utf-8') as file:
+            started = time.perf_counter()
+            parallel = workers > 1 and os.path.getsize(csv_path) >= CSV_PDF_PARALLEL_MIN_MB * 1024 * 1024
+
+            with open(csv_path, newline='', encoding='utf-8-sig') as file:
                 reader = csv.reader(file)
-                for row in reader:
-                    text = " | ".join(row)
-                    c.drawString(40, y, text)
-                    y -= 20
-                    
-                    if y < 40:
-                        c.showPage()
-                        y = height - 40
-            
-            c.save()
-            logger.info(f"CSV to PDF conversion successful: {pdf_path}")
+                header = next(reader, [])
+                sample = list(itertools.islice(reader, CSV_PDF_SAMPLE_ROWS))
+                layout = CSVToPDFOps.measure_layout(header, sample)
+                if parallel:
+                    parts, pages, row_count = CSVToPDFOps._render_parallel(csv_path, layout, part_prefix, workers)
+                else:
+                    parts, pages, row_count = CSVToPDFOps.render_rows(
+                        itertools.chain(sample, reader), layout, lambda index: f"{part_prefix}.part{index}.pdf"
+                    )
+
+            if not CSVToPDFOps._join_parts(parts, pdf_path):
+                logger.error(f"CSV to PDF conversion error: failed to join {len(parts)} parts")
+                return False
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"CSV to PDF conversion successful: {pdf_path} "
+                f"({row_count} rows, {pages} pages, {row_count / max(elapsed, 1e-6):.0f} rows/s"
+                f"{f', {workers} workers' if parallel else ''})"
+            )
             return True
         except Exception as e:
             logger.error(f"CSV to PDF conversion error: {str(e)}")
+            # Remove part files left behind by a failed render
+            for leftover in glob.glob(f"{glob.escape(part_prefix)}*.pdf"):
+                os.remove(leftover)
+            return False
+
+
+def _read_csv_range(csv_path, start, end):
+    """CSV rows stored in bytes [start, end) of csv_path, which begin and end on record boundaries"""
+    with open(csv_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return csv.reader(StringIO(data.decode('utf-8'), newline=''))
+
+
+def _csv_heights_worker(csv_path, start, end, layout):
+    """Process-pool worker: row heights of the CSV rows in one byte range"""
+    return [
+        CSVToPDFOps._row_height(CSVToPDFOps._row_lines(row, layout, CSVToPDFOps.FONT))
+        for row in _read_csv_range(csv_path, start, end)
+    ]
+
+
+def _csv_render_worker(csv_path, chunk_ranges, row_start, row_end, layout, first_page, part_prefix):
+    """Process-pool worker: render data rows [row_start, row_end) of csv_path, starting a fresh page"""
+    first_chunk = row_start // CSV_PDF_CHUNK_ROWS
+    last_chunk = (row_end - 1) // CSV_PDF_CHUNK_ROWS
+    offset = first_chunk * CSV_PDF_CHUNK_ROWS
+    # Consecutive chunks are contiguous in the file, so one read covers them
+    reader = _read_csv_range(csv_path, chunk_ranges[first_chunk][0], chunk_ranges[last_chunk][1])
+    rows = itertools.islice(reader, row_start - offset, row_end - offset)
+    return CSVToPDFOps.render_rows(rows, layout, lambda index: f"{part_prefix}.part{index}.pdf", first_page)
+
+
+class ImageToPDFOps:
+    """Image to PDF conversion operations"""
+
+    # PDF colour spaces for image modes that can be embedded as they are
+    COLOR_SPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}
+    # Content stream matrices that display an image with EXIF orientation 1, 3, 6 or 8 upright
+    ORIENTATION_MATRICES = {
+        1: "{w} 0 0 {h} 0 0",
+        3: "-{w} 0 0 -{h} {w} {h}",
+        6: "0 -{h} {w} 0 0 {h}",
+        8: "0 {h} -{w} 0 {w} 0",
+    }
+    JPEG_QUALITY = 85
+
+    @staticmethod
+    def _page_layout(image, orientation, target_dpi):
+        """
+        Return (page width, page height, pixel size to reduce to or None) for an image.
+
+        Pages keep the image's physical size at its DPI, shrunk to fit A4 in
+        the image's orientation. Images with more pixels than target_dpi
+        needs for that page size are reduced.
+        """
+        width_px, height_px = image.size
+        if orientation in (6, 8):
+            width_px, height_px = height_px, width_px
+
+        dpi = image.info.get('dpi', (IMAGE_PDF_DEFAULT_DPI,))[0] or IMAGE_PDF_DEFAULT_DPI
+        if dpi < 10:
+            dpi = IMAGE_PDF_DEFAULT_DPI
+        page_width = width_px * 72 / dpi
+        page_height = height_px * 72 / dpi
+
+        max_width, max_height = A4 if height_px >= width_px else landscape(A4)
+        scale = min(1, max_width / page_width, max_height / page_height)
+        page_width *= scale
+        page_height *= scale
+
+        target_width = round(page_width / 72 * target_dpi)
+        # A little slack so images just above the target are embedded untouched
+        if width_px <= target_width * 1.1:
+            return page_width, page_height, None
+        target_height = max(1, round(height_px * target_width / width_px))
+        return page_width, page_height, (target_width, target_height)
+
+    @staticmethod
+    def _decode_image(path, target_size, orientation):
+        """Decode, orient and flatten an image; returns (mode, size, filter, data)"""
+        with Image.open(path) as image:
+            if target_size:
+                # Let the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding
+                stored_size = target_size[::-1] if orientation in (6, 8) else target_size
+                image.draft(image.mode if image.mode in ('L', 'RGB') else 'RGB', stored_size)
+            source_format = image.format
+            image = ImageOps.exif_transpose(image)
+            if target_size:
+                # thumbnail() reduces by whole factors first, then resamples the rest
+                image.thumbnail(target_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('L', 'RGB'):
+            image = image.convert('L' if image.mode in ('1', 'I', 'I;16', 'F') else 'RGB')
+
+        if source_format == 'JPEG':
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=ImageToPDFOps.JPEG_QUALITY)
+            return image.mode, image.size, '/DCTDecode', buffer.getvalue()
+        return image.mode, image.size, '/FlateDecode', zlib.compress(image.tobytes(), 6)
+
+    @staticmethod
+    def convert(image_paths, pdf_path, target_dpi=None):
+        """
+        Combine images into one PDF with a page per image.
+
+        JPEGs that need no reduction are copied into the PDF without being
+        decoded, with EXIF rotation applied by the page's drawing matrix.
+        Other images are decoded one at a time, reduced to target_dpi with
+        draft() and reduce(), and embedded as JPEG or lossless Flate data.
+        Objects are written to the file as each image is processed.
+
+        Returns:
+            bool: True on success, False if error.
+        """
+        target_dpi = target_dpi or IMAGE_PDF_TARGET_DPI
+        started = time.perf_counter()
+        catalog_id, pages_id = 1, 2
+        next_id = 3
+        offsets = {}
+        kids = []
+        passthrough = 0
+
+        try:
+            logger.info(f"Starting image to PDF conversion: {len(image_paths)} images")
+
+            with open(pdf_path, "wb") as output_file:
+                output_file.write(b"%PDF-1.4\n%\xE2\xE3\xCF\xD3\n")
+
+                def write_object(body, stream=None, stream_path=None):
+                    nonlocal next_id
+                    obj_id = next_id
+                    next_id += 1
+                    offsets[obj_id] = output_file.tell()
+                    output_file.write(f"{obj_id} 0 obj\n{body}\n".encode())
+                    if stream is not None or stream_path is not None:
+                        output_file.write(b"stream\n")
+                        if stream_path is not None:
+                            with open(stream_path, "rb") as stream_file:
+                                shutil.copyfileobj(stream_file, output_file)
+                        else:
+                            output_file.write(stream)
+                        output_file.write(b"\nendstream")
+                    output_file.write(b"\nendobj\n")
+                    return obj_id
+
+                for image_path in image_paths:
+                    with Image.open(image_path) as image:
+                        orientation = image.getexif().get(0x0112, 1)
+                        page_width, page_height, target_size = ImageToPDFOps._page_layout(
+                            image, orientation, target_dpi
+                        )
+                        copy_jpeg = (
+                            image.format == 'JPEG'
+                            and target_size is None
+                            and image.mode in ImageToPDFOps.COLOR_SPACES
+                            and orientation in ImageToPDFOps.ORIENTATION_MATRICES
+                        )
+                        mode, size = image.mode, image.size
+                        # Adobe CMYK JPEGs store inverted ink values
+                        inverted = mode == 'CMYK' and 'adobe' in image.info
+
+                    if copy_jpeg:
+                        image_filter, data = '/DCTDecode', None
+                        passthrough += 1
+                    else:
+                        mode, size, image_filter, data = ImageToPDFOps._decode_image(
+                            image_path, target_size, orientation
+                        )
+                        orientation, inverted = 1, False
+
+                    length = os.path.getsize(image_path) if data is None else len(data)
+                    decode = f" /Decode [{' '.join(['1 0'] * 4)}]" if inverted else ""
+                    image_id = write_object(
+                        f"<< /Type /XObject /Subtype /Image /Width {size[0]} /Height {size[1]} "
+                        f"/ColorSpace {ImageToPDFOps.COLOR_SPACES[mode]} /BitsPerComponent 8 "
+                        f"/Filter {image_filter}{decode} /Length {length} >>",
+                        stream=data,
+                        stream_path=image_path if data is None else None,
+                    )
+
+                    matrix = ImageToPDFOps.ORIENTATION_MATRICES[orientation].format(
+                        w=f"{page_width:.4f}", h=f"{page_height:.4f}"
+                    )
+                    content = f"q {matrix} cm /Im0 Do Q".encode()
+                    content_id = write_object(f"<< /Length {len(content)} >>", stream=content)
+                    kids.append(write_object(
+                        f"<< /Type /Page /Parent {pages_id} 0 R "
+                        f"/MediaBox [0 0 {page_width:.4f} {page_height:.4f}] "
+                        f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+                    ))
+
+                offsets[pages_id] = output_file.tell()
+                kid_refs = " ".join(f"{kid} 0 R" for kid in kids)
+                output_file.write(
+                    f"{pages_id} 0 obj\n<< /Type /Pages /Kids [{kid_refs}] /Count {len(kids)} >>\nendobj\n".encode()
+                )
+                offsets[catalog_id] = output_file.tell()
+                output_file.write(f"{catalog_id} 0 obj\n<< /Type /Catalog /Pages {pages_id} 0 R >>\nendobj\n".encode())
+
+                xref_offset = output_file.tell()
+                output_file.write(f"xref\n0 {next_id}\n0000000000 65535 f\r\n".encode())
+                for obj_id in range(1, next_id):
+                    output_file.write(f"{offsets[obj_id]:010d} 00000 n\r\n".encode())
+                output_file.write(
+                    f"trailer\n<< /Size {next_id} /Root {catalog_id} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+                )
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Image to PDF conversion successful: {pdf_path} ({len(kids)} pages, "
+                f"{passthrough} JPEGs embedded as-is, {elapsed:.2f}s)"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Image to PDF conversion error: {str(e)}")
             return False
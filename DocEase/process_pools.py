@@ -0,0 +1,76 @@
+"""Process pools shared by the requests of one app process"""
+import os
+import threading
+import collections
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Pool name -> (owning pid, executor)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(name, workers):
+    """
+    Pool of at most workers processes for name, created on first use.
+
+    Concurrent requests queue on the same workers instead of each starting
+    a pool of its own, so the process count stays bounded under load. A
+    pool inherited through fork has no live workers, so a child process
+    creates its own.
+    """
+    with _pools_lock:
+        entry = _pools.get(name)
+        if entry is None or entry[0] != os.getpid():
+            entry = (os.getpid(), ProcessPoolExecutor(max_workers=max(1, workers)))
+            _pools[name] = entry
+            logger.info(f"Started {name} process pool with {max(1, workers)} workers")
+        return entry[1]
+
+
+def _discard_process_pool(name, pool):
+    """Drop a broken pool so the next request starts a fresh one"""
+    with _pools_lock:
+        entry = _pools.get(name)
+        if entry is not None and entry[1] is pool:
+            del _pools[name]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def map_ordered(name, workers, func, *iterables):
+    """
+    Yield func(*args) for the argument tuples of iterables, in order, computed on the shared pool.
+
+    At most workers + 1 calls are submitted ahead of the consumer, so one
+    request cannot fill the pool's queue and a slow reader holds back the
+    work instead of buffering finished results. Calls not yet started when
+    the generator is closed are cancelled.
+    """
+    pool = get_process_pool(name, workers)
+    pending = collections.deque()
+    try:
+        for args in zip(*iterables):
+            pending.append(pool.submit(func, *args))
+            if len(pending) > workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        logger.error(f"A worker of the {name} process pool died; the pool will be restarted")
+        _discard_process_pool(name, pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def shutdown_process_pools():
+    """Stop the pools this process started"""
+    with _pools_lock:
+        pools = [pool for pid, pool in _pools.values() if pid == os.getpid()]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,261 @@
+"""Content-addressed on-disk cache of conversion results"""
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import functools
+import threading
+import contextlib
+import logging
+
+# Advisory file locks are POSIX only; on Windows eviction is serialized per process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+
+# Lock file in the cache directory held while its size is checked
+LOCK_FILE = '.lock'
+
+
+# SHA-256 of files already hashed, keyed by path: (size, mtime_ns, digest)
+_known_digests = {}
+
+
+def remember_digest(path, digest):
+    """Record the digest of path so file_digest need not read it again while it is unchanged"""
+    stat = os.stat(path)
+    _known_digests[os.path.abspath(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+    if len(_known_digests) > 10000:
+        _known_digests.pop(next(iter(_known_digests)))
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks unless it was hashed before and has not changed since"""
+    known = _known_digests.get(os.path.abspath(path))
+    if known:
+        stat = os.stat(path)
+        if known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    remember_digest(path, digest.hexdigest())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Results stored as cache_dir/<key>/<original file name>, evicted least recently used.
+
+    Keys are SHA-256 over the input file digests, the operation name and its
+    parameters. Password-protected operations are not cached: the directory
+    outlives UPLOAD_FOLDER's cleanup, so a decrypted copy would stay on disk
+    after the upload is gone. Entry directories are touched on every hit, so the LRU
+    order lives on disk. The byte budget is checked against the directory
+    itself after every store, under a lock file, so app workers and forked
+    pool children sharing the directory stay within one budget together.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _directory_lock(self):
+        """Hold the cache directory's lock file; without fcntl only this process's threads are serialized"""
+        with self._lock:
+            if fcntl is None:
+                # Concurrent evictions then at worst remove a few more entries than needed
+                yield
+                return
+            with open(os.path.join(self.cache_dir, LOCK_FILE), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """(last used, key, bytes) for every entry on disk, least recently used first"""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            # Lock file and staging directories of stores in progress
+            if key.startswith('.'):
+                continue
+            entry_dir = os.path.join(self.cache_dir, key)
+            try:
+                files = os.listdir(entry_dir)
+                size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in files)
+                entries.append((os.path.getmtime(entry_dir), key, size))
+            except OSError:
+                # Evicted by another process while scanning
+                continue
+        return sorted(entries)
+
+    def _evict(self):
+        """Remove least recently used entries until the directory fits the byte budget"""
+        with self._directory_lock():
+            entries = self._scan()
+            total = sum(size for _, _, size in entries)
+            evicted = 0
+            for _, key, size in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+                total -= size
+                evicted += 1
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+            logger.info(f"Result cache evicted {evicted} entries, {total} bytes in use")
+
+    def make_key(self, operation, input_paths, params=None, input_digests=None):
+        """Cache key for an operation"""
+        digests = input_digests or [file_digest(path) for path in input_paths]
+        material = {
+            'operation': operation,
+            'inputs': digests,
+            'params': params or {},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entry_file(self, key):
+        entry_dir = os.path.join(self.cache_dir, key)
+        files = os.listdir(entry_dir)
+        return os.path.join(entry_dir, files[0])
+
+    def restore(self, key, output_path=None, output_dir=None):
+        """
+        Copy a cached result to output_path, or to its original name in output_dir.
+
+        Returns the restored path, or None on a miss.
+        """
+        try:
+            cached_file = self._entry_file(key)
+            output_path = output_path or os.path.join(output_dir, os.path.basename(cached_file))
+            # A copy, not a hard link: later operations overwrite output files in place
+            shutil.copyfile(cached_file, output_path)
+            os.utime(os.path.dirname(cached_file))
+        except (FileNotFoundError, IndexError):
+            # Never stored, or evicted
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.info(f"Result cache hit {key[:12]}: {os.path.basename(output_path)} ({self.hits} hits, {self.misses} misses)")
+        return output_path
+
+    def store(self, key, result_path):
+        """Copy a finished result into the cache and evict old entries over the byte budget"""
+        if os.path.getsize(result_path) > self.max_bytes:
+            return
+        entry_dir = os.path.join(self.cache_dir, key)
+        staging_dir = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.{threading.get_ident()}")
+        os.makedirs(staging_dir, exist_ok=True)
+        shutil.copyfile(result_path, os.path.join(staging_dir, os.path.basename(result_path)))
+        try:
+            os.rename(staging_dir, entry_dir)
+        except OSError:
+            # Another request stored the same result first
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+        self._evict()
+
+    def stats(self):
+        entries = self._scan()
+        with self._lock:
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for _, _, size in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def init_result_cache(config):
+    """Create the process-wide cache from app config; disabled when RESULT_CACHE_MAX_MB is 0"""
+    global _cache
+    if config.get('RESULT_CACHE_MAX_MB', 0) <= 0:
+        _cache = None
+        return None
+    _cache = ResultCache(config['RESULT_CACHE_DIR'], config['RESULT_CACHE_MAX_MB'] * 1024 * 1024)
+    logger.info(f"Result cache at {config['RESULT_CACHE_DIR']}: {_cache.stats()}")
+    return _cache
+
+
+def get_result_cache():
+    return _cache
+
+
+def cached_operation(operation, inputs, output=None, ignore=()):
+    """
+    Serve a function's result from the cache when the same inputs and parameters were seen before.
+
+    Functions given an output path return True on success, and True is
+    returned for them on a hit.
+
+    Args:
+        operation (str): Name that keeps results of different functions apart.
+        inputs (str): Argument holding the input path or list of paths.
+        output (str): Argument holding the output path. Without it the function
+            must return the path it wrote, and hits are restored under the
+            cached file name in app_config's UPLOAD_FOLDER, or next to the
+            first input.
+        ignore (tuple): Arguments that do not change the result.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = _cache
+            if cache is None:
+                return func(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            values = dict(arguments.arguments)
+            input_paths = values.pop(inputs)
+            input_paths = [input_paths] if isinstance(input_paths, str) else list(input_paths)
+            output_path = values.pop(output) if output else None
+            output_dir = (values.get('app_config') or {}).get('UPLOAD_FOLDER') or os.path.dirname(input_paths[0])
+            for name in ignore:
+                values.pop(name, None)
+
+            try:
+                key = cache.make_key(operation, input_paths, values)
+                restored = cache.restore(key, output_path, output_dir)
+            except Exception as e:
+                logger.error(f"Result cache lookup failed for {operation}: {str(e)}")
+                return func(*args, **kwargs)
+            if restored:
+                return True if output else restored
+
+            result = func(*args, **kwargs)
+            result_path = output_path if output else result
+            if result and result_path and os.path.isfile(result_path):
+                try:
+                    cache.store(key, result_path)
+                except Exception as e:
+                    logger.error(f"Result cache store failed for {operation}: {str(e)}")
+            return result
+
+        return wrapper
+
+    return decorator
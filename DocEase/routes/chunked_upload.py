@@ -0,0 +1,146 @@
+"""Chunked upload routes - Resumable uploads of large files"""
+from flask import request, jsonify, session, url_for, abort
+import os
+import re
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Conversions that can be started on a finalized upload; all run as background jobs
+CHUNKED_CONVERSIONS = {'pdf-to-word', 'word-to-pdf', 'image-to-pdf', 'csv-to-pdf', 'split-pdf'}
+
+# Limits on uploads open at once, per owner and across the server
+CHUNKED_UPLOAD_LIMIT_KEYS = (
+    'CHUNKED_UPLOAD_MAX_PER_OWNER', 'CHUNKED_UPLOAD_MAX_OWNER_MB', 'CHUNKED_UPLOAD_MAX_OPEN',
+    'CHUNKED_UPLOAD_MAX_RESERVED_MB',
+)
+
+
+def init_chunked_upload_routes(app, allowed_file, validate_upload_path, CONVERTER_EXTENSIONS, ChunkedUpload,
+                               UploadLimitExceeded, convert_file, split_pdf, queue_job):
+    """
+    Initialize chunked upload routes.
+
+    A client creates an upload with its file name and size, PUTs byte ranges
+    (in any order, in parallel, and again after a dropped connection), asks
+    which ranges are still missing, and finalizes. Finalizing can start a
+    conversion on the assembled file as a background job.
+    """
+
+    def error(message, status=400):
+        return jsonify(error=message), status
+
+    def owned_upload(upload_id):
+        upload = ChunkedUpload.load(app.config['UPLOAD_FOLDER'], upload_id)
+        if upload is None or (upload.user_id is not None and upload.user_id != session.get('user_id')):
+            abort(404)
+        return upload
+
+    def upload_owner():
+        # Signed-in users are limited per account; anonymous clients per session
+        if session.get('user_id') is not None:
+            return f"user:{session['user_id']}"
+        if 'upload_owner' not in session:
+            session['upload_owner'] = uuid.uuid4().hex
+        return f"session:{session['upload_owner']}"
+
+    def upload_status(upload):
+        received = upload.received_bytes()
+        return {
+            'upload_id': upload.upload_id,
+            'filename': upload.filename,
+            'size': upload.size,
+            'received': received,
+            'missing': upload.missing_ranges(),
+            'chunk_size': app.config['CHUNKED_UPLOAD_CHUNK_MB'] * 1024 * 1024,
+            'upload_url': url_for('chunked_upload', upload_id=upload.upload_id),
+            'finalize_url': url_for('finalize_chunked_upload', upload_id=upload.upload_id),
+        }
+
+    @app.route('/uploads/chunked', methods=['POST'])
+    def start_chunked_upload():
+        data = request.get_json(silent=True) or request.form
+        filename = data.get('filename', '')
+        try:
+            size = int(data.get('size', 0))
+        except (TypeError, ValueError):
+            return error('size must be a whole number of bytes')
+
+        if not allowed_file(filename, CONVERTER_EXTENSIONS):
+            return error(f'Invalid file type: {filename}')
+        try:
+            validate_upload_path(filename, app.config['UPLOAD_FOLDER'])
+        except ValueError as e:
+            return error(str(e))
+        if size <= 0 or size > app.config['CHUNKED_UPLOAD_MAX_MB'] * 1024 * 1024:
+            return error(f"size must be between 1 byte and {app.config['CHUNKED_UPLOAD_MAX_MB']} MB", 413)
+
+        limits = {key: app.config[key] for key in CHUNKED_UPLOAD_LIMIT_KEYS}
+        try:
+            upload = ChunkedUpload.create(
+                app.config['UPLOAD_FOLDER'], filename, size, session.get('user_id'), upload_owner(), limits
+            )
+        except UploadLimitExceeded as e:
+            return error(str(e), 429)
+        return jsonify(upload_status(upload)), 201
+
+    @app.route('/uploads/chunked/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+    def chunked_upload(upload_id):
+        upload = owned_upload(upload_id)
+
+        if request.method == 'GET':
+            return jsonify(upload_status(upload))
+
+        if request.method == 'DELETE':
+            upload.discard()
+            return '', 204
+
+        # The offset comes from "Content-Range: bytes start-end/total" or ?offset=
+        content_range = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+|\*)', request.headers.get('Content-Range', ''))
+        length = request.content_length
+        if content_range:
+            offset = int(content_range.group(1))
+            if length != int(content_range.group(2)) - offset + 1:
+                return error('Content-Range does not match the body length')
+        else:
+            offset = request.args.get('offset', type=int)
+        if offset is None or not length:
+            return error('A chunk needs a Content-Length and a Content-Range header or offset parameter', 411)
+
+        try:
+            upload.write_chunk(offset, request.stream, length)
+        except ValueError as e:
+            logger.warning(f"Chunk rejected for upload {upload_id}: {str(e)}")
+            return error(str(e))
+        return jsonify(upload_id=upload_id, received=upload.received_bytes(), size=upload.size)
+
+    @app.route('/uploads/chunked/<upload_id>/finalize', methods=['POST'])
+    def finalize_chunked_upload(upload_id):
+        upload = owned_upload(upload_id)
+        data = request.get_json(silent=True) or request.form
+        conversion_type = data.get('conversion_type')
+        if conversion_type and conversion_type not in CHUNKED_CONVERSIONS:
+            return error(f'Unsupported conversion: {conversion_type}')
+
+        save_path = validate_upload_path(upload.filename, app.config['UPLOAD_FOLDER'])
+        try:
+            sha256 = upload.finalize(save_path)
+        except ValueError as e:
+            logger.warning(f"Finalize rejected for upload {upload_id}: {str(e)}")
+            return error(str(e), 409 if 'incomplete' in str(e) else 400)
+
+        if not conversion_type:
+            return jsonify(filename=os.path.basename(save_path), size=upload.size, sha256=sha256)
+
+        try:
+            start_page = int(data.get('start_page') or 0) or None
+            end_page = int(data.get('end_page') or 0) or None
+        except ValueError:
+            return error('Page numbers must be whole numbers.')
+
+        if conversion_type == 'split-pdf':
+            return queue_job(conversion_type, lambda: split_pdf(save_path, start_page, end_page), upload.filename)
+        return queue_job(
+            conversion_type, lambda: convert_file(save_path, conversion_type, start_page, end_page), upload.filename
+        )
@@ -1,13 +1,17 @@
 """File Converter routes"""
-from flask import render_template, request, flash, redirect, url_for, send_file
+from flask import render_template, request, flash, redirect, url_for
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Converter tabs; the first is shown unless a request names another
+CONVERTER_TABS = ('pdf-to-word', 'word-to-pdf', 'image-to-pdf', 'csv-to-pdf')
+
 
 def init_converter_routes(app, UploadForm, allowed_file, validate_upload_path, validate_file_size,
-                          is_valid_pdf, CONVERTER_EXTENSIONS, convert_file, log_conversion):
+                          is_valid_pdf, CONVERTER_EXTENSIONS, convert_file, log_conversion, IMAGE_EXTENSIONS,
+                          respond_async, save_upload, send_download):
 
     @app.route('/file-converter', methods=['GET', 'POST'])
     def upload_file():
@@ -19,51 +23,94 @@ def init_converter_routes(app, UploadForm, allowed_file, validate_upload_path, v
             
             if not file:
                 flash('No file provided', 'error')
-                return redirect(url_for('upload_file'))
+                return redirect(url_for('upload_file', tab=conversion_type))
             
             filename = file.filename
             
             if not allowed_file(filename, CONVERTER_EXTENSIONS):
                 logger.warning(f"Invalid file type for converter: {filename}. Allowed: {CONVERTER_EXTENSIONS}")
                 flash('Invalid file type! Allowed: PDF, Word (docx/doc), or Image (jpg/jpeg/png)', 'error')
-                return redirect(url_for('upload_file'))
+                return redirect(url_for('upload_file', tab=conversion_type))
             
             try:
                 save_path = validate_upload_path(filename, app.config['UPLOAD_FOLDER'])
             except ValueError as e:
                 logger.error(f"Path validation failed: {str(e)}")
                 flash(str(e), 'error')
-                return redirect(url_for('upload_file'))
+                return redirect(url_for('upload_file', tab=conversion_type))
+
+            # Size, file signature and hash are checked while the upload streams to disk
+            try:
+                save_upload(file, save_path, app.config['MAX_CONTENT_LENGTH'])
+            except ValueError as e:
+                logger.warning(f"Upload rejected: {str(e)}")
+                flash(str(e), "error")
+                return redirect(url_for('upload_file', tab=conversion_type))
 
-            file.save(save_path)
+            # Image to PDF combines every selected image into one document
+            image_paths = [save_path]
+            if conversion_type == 'image-to-pdf':
+                for extra_file in request.files.getlist('file')[1:]:
+                    if not extra_file or not extra_file.filename:
+                        continue
+                    if not allowed_file(extra_file.filename, IMAGE_EXTENSIONS):
+                        flash(f'Only JPG and PNG images allowed. Skipped: {extra_file.filename}', 'error')
+                        continue
+                    try:
+                        extra_path = validate_upload_path(extra_file.filename, app.config['UPLOAD_FOLDER'])
+                    except ValueError as e:
+                        logger.error(f"Path validation failed: {str(e)}")
+                        flash(str(e), 'error')
+                        continue
+                    if extra_path in image_paths:
+                        extra_path = os.path.join(
+                            os.path.dirname(extra_path), f"{len(image_paths)}_{os.path.basename(extra_path)}"
+                        )
+                    try:
+                        save_upload(extra_file, extra_path, app.config['MAX_CONTENT_LENGTH'])
+                    except ValueError as e:
+                        flash(str(e), 'error')
+                        continue
+                    image_paths.append(extra_path)
 
-            if not validate_file_size(save_path, app.config['MAX_CONTENT_LENGTH']):
-                os.remove(save_path)
-                logger.warning(f"File too large: {filename}")
-                flash("File too large.", "error")
-                return redirect(url_for('upload_file'))
+            start_page = end_page = None
+            if conversion_type == 'pdf-to-word':
+                try:
+                    start_page = int(request.form.get('start_page') or 0) or None
+                    end_page = int(request.form.get('end_page') or 0) or None
+                except ValueError:
+                    os.remove(save_path)
+                    flash('Page numbers must be whole numbers.', 'error')
+                    return redirect(url_for('upload_file', tab=conversion_type))
 
-            if filename.lower().endswith(".pdf") and not is_valid_pdf(save_path):
-                os.remove(save_path)
-                logger.warning(f"Invalid PDF file: {filename}")
-                flash("Invalid or corrupted PDF file.", "error")
-                return redirect(url_for('upload_file'))
+            # Long conversions can run as a background job polled at /jobs/<id>
+            response = respond_async(
+                conversion_type,
+                lambda: convert_file(save_path, conversion_type, start_page, end_page, image_paths),
+                filename
+            )
+            if response is not None:
+                return response
 
-            output_path = convert_file(save_path, conversion_type)
+            output_path = convert_file(save_path, conversion_type, start_page, end_page, image_paths)
 
             # Check for deployment limitation marker
             if output_path == 'NOT_AVAILABLE_ON_DEPLOYMENT':
                 logger.warning(f"Word to PDF conversion not available on this deployment: {filename}")
                 flash('Word to PDF conversion is not available on this deployment.', 'warning')
-                return redirect(url_for('upload_file'))
+                return redirect(url_for('upload_file', tab=conversion_type))
 
             if output_path and os.path.isfile(output_path):
                 log_conversion(filename, conversion_type, output_path)
                 logger.info(f"Conversion successful: {filename} → {os.path.basename(output_path)}")
-                return send_file(output_path, as_attachment=True)
+                return send_download(output_path)
             else:
                 logger.error(f"Conversion failed for: {filename}")
                 flash('Conversion failed. Please try again.', 'error')
-                return redirect(url_for('upload_file'))
+                return redirect(url_for('upload_file', tab=conversion_type))
             
-        return render_template('converter.html', form=form, show_features_link=False)
+        # Reopen the tab of the conversion just tried, so only its own fields show
+        active_tab = request.form.get('conversion_type') or request.args.get('tab')
+        if active_tab not in CONVERTER_TABS:
+            active_tab = CONVERTER_TABS[0]
+        return render_template('converter.html', form=form, show_features_link=False, active_tab=active_tab)
@@ -0,0 +1,46 @@
+"""Background job routes - Status and result download"""
+from flask import jsonify, session, url_for, abort
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def init_job_routes(app, get_job, find_job_result, send_download):
+    """Initialize background job routes"""
+
+    def owned_job(job_id):
+        job = get_job(job_id)
+        # Jobs of signed-in users are private; anonymous jobs are reachable by their unguessable ID
+        if job is None or (job['user_id'] is not None and job['user_id'] != session.get('user_id')):
+            abort(404)
+        return job
+
+    @app.route('/jobs/<job_id>')
+    def job_status(job_id):
+        job = owned_job(job_id)
+        # Checked first so a job whose result is gone reports as failed
+        output_path = find_job_result(job) if job['status'] == 'finished' else None
+        status = {
+            'job_id': job['id'],
+            'operation': job['operation'],
+            'filename': job['filename'],
+            'status': job['status'],
+            'progress': job['progress'],
+            'message': job['message'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+        }
+        if output_path:
+            status['download_url'] = url_for('job_result', job_id=job_id)
+        return jsonify(status)
+
+    @app.route('/jobs/<job_id>/download')
+    def job_result(job_id):
+        job = owned_job(job_id)
+        if job['status'] != 'finished':
+            return jsonify(job_id=job_id, status=job['status'], error='Job has not finished'), 409
+
+        output_path = find_job_result(job)
+        if output_path is None:
+            abort(410)
+        return send_download(output_path)
@@ -1,7 +1,11 @@
 """PDF Editor routes - Merge, Split, Encrypt, Decrypt"""
-from flask import render_template, request, flash, redirect, url_for, send_file
+from flask import render_template, request, flash, redirect, url_for, stream_with_context
 from werkzeug.utils import secure_filename
+from concurrent.futures import ThreadPoolExecutor
 import os
+import json
+import uuid
+import zipfile
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,8 +14,14 @@ logger = logging.getLogger(__name__)
 def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, DecryptPDFForm,
                            allowed_file, validate_upload_path, validate_file_size, is_valid_pdf,
                            PDF_EDITOR_EXTENSIONS, split_pdf, merge_pdfs, convert_file, log_conversion,
-                           EncryptOps, DecryptOps, WatermarkOps, WatermarkPDFForm, RotateOps, RotatePDFForm):
+                           EncryptOps, DecryptOps, WatermarkOps, WatermarkPDFForm, RotateOps, RotatePDFForm,
+                           split_pdf_stream, split_pdf_ranges, preparse_pdf, BatchCryptoOps, BatchCryptoForm,
+                           respond_async, save_upload, send_download, stream_download):
     """Initialize PDF editor routes"""
+
+    def unique_upload_path(filename):
+        """Secure upload path with a random prefix, so concurrent or repeated names never collide"""
+        return validate_upload_path(f"{uuid.uuid4().hex}_{filename}", app.config['UPLOAD_FOLDER'])
     
     @app.route('/pdf-editor', methods=['GET', 'POST'])
     def pdf_editor():
@@ -24,7 +34,7 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
             logger.info(f"Number of files received: {len(files)}")
             
             # Filter out empty files - PDF editor only accepts PDF files
-            pdf_files = []
+            uploads = []
             for uploaded_file in files:
                 if not uploaded_file or not uploaded_file.filename:
                     continue
@@ -35,57 +45,103 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                     flash(f'Only PDF files allowed. Received: {uploaded_file.filename}', 'error')
                     continue
                 
-                # Validate file path
+                # Validate file path; uploads are saved concurrently, so repeated filenames need distinct paths
                 try:
-                    file_path = validate_upload_path(uploaded_file.filename, app.config['UPLOAD_FOLDER'])
+                    file_path = unique_upload_path(uploaded_file.filename)
                 except ValueError as e:
                     logger.error(f"Path validation failed: {str(e)}")
                     flash(str(e), 'error')
                     continue
-                
-                # Save file
-                uploaded_file.save(file_path)
-                
-                # Validate file size
-                if not validate_file_size(file_path, app.config['MAX_CONTENT_LENGTH']):
-                    os.remove(file_path)
-                    logger.warning(f"File too large: {uploaded_file.filename}")
-                    flash(f'File {uploaded_file.filename} is too large', 'error')
-                    continue
-                
-                # Validate PDF file integrity
-                if not is_valid_pdf(file_path):
-                    os.remove(file_path)
-                    logger.warning(f"Invalid PDF file: {uploaded_file.filename}")
-                    flash(f'File {uploaded_file.filename} is not a valid PDF', 'error')
-                    continue
-                
-                pdf_files.append(file_path)
+                uploads.append((uploaded_file, file_path))
+
+            def prepare_upload(upload):
+                """Save, validate and pre-parse one merge input; returns (path, reader, error)"""
+                uploaded_file, file_path = upload
+                try:
+                    # Save file, checking size and PDF signature as it is written
+                    try:
+                        save_upload(uploaded_file, file_path, app.config['MAX_CONTENT_LENGTH'])
+                    except ValueError as e:
+                        logger.warning(f"Upload rejected: {str(e)}")
+                        return None, None, str(e)
+
+                    # Parse it once for the merge
+                    reader = preparse_pdf(file_path)
+                    if reader is None:
+                        os.remove(file_path)
+                        logger.warning(f"Invalid PDF file: {uploaded_file.filename}")
+                        return None, None, f'File {uploaded_file.filename} is not a valid PDF'
+                except Exception as e:
+                    # Caught here so one failed upload cannot leave the other readers unclosed
+                    logger.error(f"Failed to prepare merge input {uploaded_file.filename}: {str(e)}", exc_info=True)
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                    return None, None, f'File {uploaded_file.filename} could not be processed'
+
                 logger.debug(f"Saved and validated PDF file: {file_path}")
+                return file_path, reader, None
+
+            workers = max(1, min(app.config.get('MERGE_UPLOAD_WORKERS', 8), len(uploads)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map() keeps results in upload order, which is the merge order
+                prepared = list(executor.map(prepare_upload, uploads))
+            for _, _, error in prepared:
+                if error:
+                    flash(error, 'error')
+            pdf_files = [file_path for file_path, _, error in prepared if not error]
+            # merge_pdfs takes over these and drops each one once its pages are copied
+            readers = [reader for _, reader, error in prepared if not error]
+            del prepared
             
             logger.info(f"Total valid PDF files: {len(pdf_files)}")
             
             if len(pdf_files) < 2:
+                for reader in readers:
+                    reader.stream.close()
                 logger.warning("Merge attempted with fewer than 2 PDF files")
                 flash('Please select at least 2 PDF files to merge', 'error')
                 return redirect(url_for('pdf_editor'))
             
-            # Merge the PDFs
-            logger.info("Starting PDF merge process...")
-            output_path = merge_pdfs(pdf_files)
-            
-            if output_path:
-                logger.info(f"Merge successful, output: {output_path}")
-                log_conversion('MERGE', 'merge-pdf', output_path)
-                # Clean up individual files after merging
+            deduplicate = bool(request.form.get('deduplicate'))
+
+            def clean_up_inputs():
+                """Clean up individual files after merging"""
                 for pdf_file in pdf_files:
                     try:
                         os.remove(pdf_file)
                         logger.debug(f"Cleaned up: {pdf_file}")
                     except Exception as e:
                         logger.error(f"Failed to clean up file {pdf_file}: {str(e)}")
+
+            def merge_in_background():
+                output_path = merge_pdfs(pdf_files, deduplicate)
+                if output_path:
+                    clean_up_inputs()
+                return output_path
+
+            response = respond_async('merge-pdf', merge_in_background, 'MERGE')
+            if response is not None:
+                # The job parses the inputs again on its own thread
+                for reader in readers:
+                    reader.stream.close()
+                return response
+
+            # Merge the PDFs
+            logger.info("Starting PDF merge process...")
+            try:
+                output_path = merge_pdfs(pdf_files, deduplicate, readers)
+            finally:
+                # Left over only when the merge stopped early or was served from the cache
+                for reader in readers:
+                    if reader is not None:
+                        reader.stream.close()
+            
+            if output_path:
+                logger.info(f"Merge successful, output: {output_path}")
+                log_conversion('MERGE', 'merge-pdf', output_path)
+                clean_up_inputs()
                 
-                return send_file(output_path, as_attachment=True)
+                return send_download(output_path)
             else:
                 logger.error("PDF merge failed")
                 flash('PDF merging failed. Please try again.', 'error')
@@ -114,24 +170,45 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 flash(str(e), 'error')
                 return redirect(url_for('pdf_editor'))
             
-            file.save(file_path)
-            
-            # Validate file size
-            if not validate_file_size(file_path, app.config['MAX_CONTENT_LENGTH']):
-                os.remove(file_path)
-                logger.warning(f"File too large: {file.filename}")
-                flash('File is too large', 'error')
-                return redirect(url_for('pdf_editor'))
-            
-            # Validate PDF integrity
-            if not is_valid_pdf(file_path):
-                os.remove(file_path)
-                logger.warning(f"Invalid PDF file: {file.filename}")
-                flash('Invalid or corrupted PDF file', 'error')
+            # Size and PDF signature are checked while the upload streams to disk
+            try:
+                save_upload(file, file_path, app.config['MAX_CONTENT_LENGTH'])
+            except ValueError as e:
+                logger.warning(f"Upload rejected: {str(e)}")
+                flash(str(e), 'error')
                 return redirect(url_for('pdf_editor'))
             
             filename = file.filename
-            if conversion_type == 'split-pdf':
+            if conversion_type == 'split-pdf' and request.form.get('split_mode', 'pages') != 'pages':
+                # Handle multi-page documents: custom ranges, every N pages or size-capped chunks
+                split_mode = request.form.get('split_mode')
+                range_spec = every_pages = max_chunk_mb = None
+                try:
+                    if split_mode == 'ranges':
+                        range_spec = request.form.get('range_spec', '').strip()
+                    elif split_mode == 'every':
+                        every_pages = int(request.form.get('every_pages', ''))
+                    elif split_mode == 'size':
+                        max_chunk_mb = float(request.form.get('max_chunk_mb', ''))
+                except ValueError:
+                    flash('Invalid split settings. Please enter a valid number.', 'error')
+                    return redirect(url_for('pdf_editor'))
+
+                response = respond_async(
+                    conversion_type, lambda: split_pdf_ranges(file_path, range_spec, every_pages, max_chunk_mb),
+                    filename
+                )
+                if response is not None:
+                    return response
+
+                output_path = split_pdf_ranges(file_path, range_spec, every_pages, max_chunk_mb)
+                if output_path:
+                    log_conversion(filename, conversion_type, output_path)
+                    return send_download(output_path)
+                else:
+                    flash('PDF splitting failed. Please check your split settings and try again.', 'error')
+                    return redirect(url_for('pdf_editor'))
+            elif conversion_type == 'split-pdf':
                 # Handle PDF splitting with page range
                 start_page = request.form.get('start_page')
                 end_page = request.form.get('end_page')
@@ -139,20 +216,45 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 # Convert empty strings to None
                 start_page = int(start_page) if start_page else None
                 end_page = int(end_page) if end_page else None
-                
+
+                response = respond_async(conversion_type, lambda: split_pdf(file_path, start_page, end_page), filename)
+                if response is not None:
+                    return response
+                
+                if app.config.get('STREAM_SPLIT_ZIP'):
+                    # Stream the ZIP while later pages are still being split
+                    result = split_pdf_stream(file_path, start_page, end_page)
+                    if result:
+                        output_path, chunks = result
+
+                        def stream_and_log():
+                            yield from chunks
+                            # Reached only when the whole ZIP was produced and sent
+                            log_conversion(filename, conversion_type, output_path)
+
+                        return stream_download(
+                            stream_with_context(stream_and_log()), os.path.basename(output_path), 'application/zip'
+                        )
+                    flash('PDF splitting failed. Please check your page range and try again.', 'error')
+                    return redirect(url_for('pdf_editor'))
+
                 output_path = split_pdf(file_path, start_page, end_page)
                 if output_path:
                     log_conversion(filename, conversion_type, output_path)
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
                 else:
                     flash('PDF splitting failed. Please check your page range and try again.', 'error')
                     return redirect(url_for('pdf_editor'))
             else:
+                response = respond_async(conversion_type, lambda: convert_file(file_path, conversion_type), filename)
+                if response is not None:
+                    return response
+
                 output_path = convert_file(file_path, conversion_type)
                 
                 if output_path:
                     log_conversion(filename, conversion_type, output_path)
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
                 else:
                     flash('Conversion failed. Please try again.', 'error')
                     return redirect(url_for('pdf_editor'))
@@ -186,29 +288,29 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 
                 output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"encrypted_{__import__('werkzeug.utils', fromlist=['secure_filename']).secure_filename(filename)}")
                 
-                pdf_file.save(input_path)
-                
-                # Validate file size
-                if not validate_file_size(input_path, app.config['MAX_CONTENT_LENGTH']):
-                    os.remove(input_path)
-                    logger.warning(f"File too large: {filename}")
-                    flash("File too large.", "error")
-                    return redirect(url_for('encrypt_pdf'))
-                
-                # Validate PDF integrity
-                if not is_valid_pdf(input_path):
-                    os.remove(input_path)
-                    logger.warning(f"Invalid PDF file: {filename}")
-                    flash("Invalid or corrupted PDF file.", "error")
+                # Size and PDF signature are checked while the upload streams to disk
+                try:
+                    save_upload(pdf_file, input_path, app.config['MAX_CONTENT_LENGTH'])
+                except ValueError as e:
+                    logger.warning(f"Upload rejected: {str(e)}")
+                    flash(str(e), "error")
                     return redirect(url_for('encrypt_pdf'))
                 
+                response = respond_async(
+                    'encrypt-pdf',
+                    lambda: output_path if EncryptOps.encrypt(input_path, output_path, password) else None,
+                    filename
+                )
+                if response is not None:
+                    return response
+
                 # Use EncryptOps class
                 result = EncryptOps.encrypt(input_path, output_path, password)
                 
                 if result:
                     log_conversion(filename, 'encrypt-pdf', output_path)
                     logger.info(f"PDF encrypted successfully: {output_path}")
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
                 else:
                     flash('Encryption failed.', 'error')
                     return redirect(url_for('encrypt_pdf'))
@@ -247,29 +349,29 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 
                 output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"decrypted_{__import__('werkzeug.utils', fromlist=['secure_filename']).secure_filename(filename)}")
 
-                pdf_file.save(input_path)
-                
-                # Validate file size
-                if not validate_file_size(input_path, app.config['MAX_CONTENT_LENGTH']):
-                    os.remove(input_path)
-                    logger.warning(f"File too large: {filename}")
-                    flash("File too large.", "error")
-                    return redirect(url_for('decrypt_pdf'))
-                
-                # Validate PDF integrity
-                if not is_valid_pdf(input_path):
-                    os.remove(input_path)
-                    logger.warning(f"Invalid PDF file: {filename}")
-                    flash("Invalid or corrupted PDF file.", "error")
+                # Size and PDF signature are checked while the upload streams to disk
+                try:
+                    save_upload(pdf_file, input_path, app.config['MAX_CONTENT_LENGTH'])
+                except ValueError as e:
+                    logger.warning(f"Upload rejected: {str(e)}")
+                    flash(str(e), "error")
                     return redirect(url_for('decrypt_pdf'))
                 
+                response = respond_async(
+                    'decrypt-pdf',
+                    lambda: output_path if DecryptOps.decrypt(input_path, output_path, password)[0] else None,
+                    filename
+                )
+                if response is not None:
+                    return response
+
                 # Use DecryptOps class
                 success, message = DecryptOps.decrypt(input_path, output_path, password)
                 
                 if success:
                     log_conversion(filename, 'decrypt-pdf', output_path)
                     logger.info(f"PDF decrypted successfully: {output_path}")
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
                 else:
                     if message == "Incorrect password":
                         logger.warning(f"Decryption failed - incorrect password: {filename}")
@@ -320,22 +422,23 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 
                 output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"watermarked_{__import__('werkzeug.utils', fromlist=['secure_filename']).secure_filename(filename)}")
 
-                pdf_file.save(input_path)
-                
-                # Validate file size
-                if not validate_file_size(input_path, app.config['MAX_CONTENT_LENGTH']):
-                    os.remove(input_path)
-                    logger.warning(f"File too large: {filename}")
-                    flash("File too large.", "error")
-                    return redirect(url_for('watermark_pdf'))
-                
-                # Validate PDF integrity
-                if not is_valid_pdf(input_path):
-                    os.remove(input_path)
-                    logger.warning(f"Invalid PDF file: {filename}")
-                    flash("Invalid or corrupted PDF file.", "error")
+                # Size and PDF signature are checked while the upload streams to disk
+                try:
+                    save_upload(pdf_file, input_path, app.config['MAX_CONTENT_LENGTH'])
+                except ValueError as e:
+                    logger.warning(f"Upload rejected: {str(e)}")
+                    flash(str(e), "error")
                     return redirect(url_for('watermark_pdf'))
                 
+                def watermark():
+                    if WatermarkOps.add_text_watermark(input_path, output_path, watermark_text, opacity):
+                        return output_path
+                    return None
+
+                response = respond_async('watermark-pdf', watermark, filename)
+                if response is not None:
+                    return response
+
                 # Use WatermarkOps class
                 result = WatermarkOps.add_text_watermark(input_path, output_path, watermark_text, opacity)
                 
@@ -348,7 +451,7 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                         logger.debug(f"Cleaned up: {input_path}")
                     except Exception as e:
                         logger.error(f"Failed to clean up file {input_path}: {str(e)}")
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
                 else:
                     flash('Watermarking failed.', 'error')
                     return redirect(url_for('watermark_pdf'))
@@ -368,6 +471,7 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
             try:
                 pdf_file = form.pdf.data
                 angle = int(form.angle.data)
+                pages = (form.pages.data or '').strip() or None
 
                 if not allowed_file(pdf_file.filename, PDF_EDITOR_EXTENSIONS):
                     flash("Only PDF files are allowed", "error")
@@ -380,14 +484,28 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                     f"rotated_{filename}"
                 )
 
-                pdf_file.save(input_path)
+                try:
+                    save_upload(pdf_file, input_path, app.config['MAX_CONTENT_LENGTH'])
+                except ValueError as e:
+                    flash(str(e), "error")
+                    return redirect(url_for('rotate_pdf'))
+
+                incremental = form.incremental.data
 
-                if not is_valid_pdf(input_path):
+                def rotate():
+                    if not RotateOps.rotate(input_path, output_path, angle, pages=pages, incremental=incremental):
+                        return None
                     os.remove(input_path)
-                    flash("Invalid PDF file", "error")
-                    return redirect(url_for('rotate_pdf'))
+                    return output_path
 
-                result = RotateOps.rotate(input_path, output_path, angle)
+                response = respond_async('rotate-pdf', rotate, filename)
+                if response is not None:
+                    return response
+
+                result = RotateOps.rotate(
+                    input_path, output_path, angle,
+                    pages=pages, incremental=incremental
+                )
 
                 if result:
                     log_conversion(filename, 'rotate-pdf', output_path)
@@ -396,7 +514,7 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                         os.remove(input_path)
                     except Exception as e:
                         logger.error(f"Failed to remove input file: {str(e)}")
-                    return send_file(output_path, as_attachment=True)
+                    return send_download(output_path)
 
                 flash("PDF rotation failed", "error")
                 return redirect(url_for('rotate_pdf'))
@@ -407,3 +525,95 @@ def init_pdf_editor_routes(app, get_db_connection, UploadForm, EncryptPDFForm, D
                 return redirect(url_for('rotate_pdf'))
 
         return render_template('rotate.html', form=form)
+
+    @app.route('/batch-crypto', methods=['GET', 'POST'])
+    def batch_crypto():
+        form = BatchCryptoForm()
+
+        if form.validate_on_submit():
+            mode = form.mode.data
+            password = form.password.data or None
+
+            try:
+                password_map = json.loads(form.password_map.data) if form.password_map.data else {}
+                if not isinstance(password_map, dict):
+                    raise ValueError("Password map must be a JSON object")
+            except ValueError:
+                flash('Per-file passwords must be a JSON object such as {"report.pdf": "secret"}', 'error')
+                return redirect(url_for('batch_crypto'))
+
+            if not password and not password_map:
+                flash('Enter a password or per-file passwords', 'error')
+                return redirect(url_for('batch_crypto'))
+
+            saved_paths = []
+            input_files = []
+            try:
+                for uploaded_file in form.files.data:
+                    if not uploaded_file or not uploaded_file.filename:
+                        continue
+
+                    filename = uploaded_file.filename
+                    if not allowed_file(filename, PDF_EDITOR_EXTENSIONS | {'zip'}):
+                        logger.warning(f"Invalid file type for batch {mode}: {filename}")
+                        flash(f'Only PDF or ZIP files allowed. Received: {filename}', 'error')
+                        continue
+
+                    try:
+                        # Files of the same name in one batch must not overwrite each other
+                        input_path = unique_upload_path(filename)
+                    except ValueError as e:
+                        logger.error(f"Path validation failed: {str(e)}")
+                        flash(str(e), 'error')
+                        continue
+
+                    try:
+                        save_upload(uploaded_file, input_path, app.config['MAX_CONTENT_LENGTH'])
+                    except ValueError as e:
+                        logger.warning(f"Upload rejected: {str(e)}")
+                        flash(str(e), 'error')
+                        continue
+                    saved_paths.append(input_path)
+
+                    if filename.lower().endswith('.zip'):
+                        try:
+                            extracted = BatchCryptoOps.extract_pdfs(
+                                input_path, app.config['UPLOAD_FOLDER'], app.config['MAX_CONTENT_LENGTH']
+                            )
+                        except (ValueError, zipfile.BadZipFile) as e:
+                            logger.warning(f"ZIP rejected for batch {mode}: {filename}: {str(e)}")
+                            flash(f'{filename}: {str(e)}', 'error')
+                            continue
+                        saved_paths.extend(path for _, path in extracted)
+                        input_files.extend(extracted)
+                    else:
+                        input_files.append((filename, input_path))
+
+                if not input_files:
+                    flash('No valid PDF files to process', 'error')
+                    return redirect(url_for('batch_crypto'))
+
+                result = BatchCryptoOps.run(
+                    mode, input_files, app.config, password, password_map, form.algorithm.data
+                )
+            finally:
+                for path in saved_paths:
+                    try:
+                        os.remove(path)
+                    except Exception as e:
+                        logger.error(f"Failed to clean up file {path}: {str(e)}")
+
+            if not result:
+                flash(f'Batch {mode} failed. Please try again.', 'error')
+                return redirect(url_for('batch_crypto'))
+
+            output_path, results = result
+            succeeded = sum(1 for item in results if item['ok'])
+            log_conversion(f'BATCH ({len(results)} files)', f'batch-{mode}-pdf', output_path)
+
+            response = send_download(output_path)
+            response.headers['X-Batch-Succeeded'] = str(succeeded)
+            response.headers['X-Batch-Failed'] = str(len(results) - succeeded)
+            return response
+
+        return render_template('batch_crypto.html', form=form)
@@ -1,11 +1,28 @@
 """Utility routes - Home, Convert, Logs, Uploads"""
-from flask import render_template, flash, redirect, url_for, session, send_from_directory
+from flask import render_template, flash, redirect, url_for, session, abort, request, jsonify
+from werkzeug.security import safe_join
+from datetime import date, timedelta
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Conversion types recorded in the history, in the order the filter lists them
+HISTORY_TYPES = [
+    'pdf-to-word', 'word-to-pdf', 'image-to-pdf', 'csv-to-pdf', 'merge-pdf', 'split-pdf',
+    'encrypt-pdf', 'decrypt-pdf', 'watermark-pdf', 'rotate-pdf', 'batch-encrypt-pdf', 'batch-decrypt-pdf',
+]
 
-def init_utility_routes(app, get_db_connection):
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD query parameter; None when missing or malformed"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def init_utility_routes(app, get_db_connection, send_download, collect_stats):
     """Initialize utility routes"""
     
     @app.route('/')
@@ -22,11 +39,72 @@ def init_utility_routes(app, get_db_connection):
         if not user_id:
             flash('Please log in to view your history.', 'error')
             return redirect(url_for('login'))
+
+        conversion_type = request.args.get('type', '')
+        date_from = parse_date(request.args.get('from'))
+        date_to = parse_date(request.args.get('to'))
+        # Keyset cursor: the (timestamp, id) of the last row on the previous page
+        before_time = request.args.get('before_time')
+        before_id = request.args.get('before_id', type=int)
+
+        # Every filter narrows the (user_id, timestamp, id) index range, so a page
+        # costs the same however long the history is
+        conditions = ['user_id = ?']
+        params = [user_id]
+        if conversion_type in HISTORY_TYPES:
+            conditions.append('conversion_type = ?')
+            params.append(conversion_type)
+        else:
+            conversion_type = ''
+        if date_from:
+            conditions.append('timestamp >= ?')
+            params.append(date_from.isoformat())
+        if date_to:
+            conditions.append('timestamp < ?')
+            params.append((date_to + timedelta(days=1)).isoformat())
+        if before_time and before_id is not None:
+            conditions.append('(timestamp, id) < (?, ?)')
+            params.extend([before_time, before_id])
+
+        page_size = app.config['HISTORY_PAGE_SIZE']
         conn = get_db_connection()
-        logs = conn.execute('SELECT * FROM conversions WHERE user_id = ? ORDER BY timestamp DESC', (user_id,)).fetchall()
+        # One extra row tells whether an older page exists
+        logs = conn.execute(
+            f'SELECT * FROM conversions WHERE {" AND ".join(conditions)} '
+            'ORDER BY timestamp DESC, id DESC LIMIT ?',
+            (*params, page_size + 1)
+        ).fetchall()
         conn.close()
-        return render_template('logs.html', logs=logs)
+
+        filters = {
+            'type': conversion_type,
+            'from': date_from.isoformat() if date_from else '',
+            'to': date_to.isoformat() if date_to else '',
+        }
+        active_filters = {name: value for name, value in filters.items() if value}
+        older_url = None
+        if len(logs) > page_size:
+            logs = logs[:page_size]
+            older_url = url_for(
+                'view_logs', before_time=logs[-1]['timestamp'], before_id=logs[-1]['id'], **active_filters
+            )
+        newest_url = url_for('view_logs', **active_filters) if before_id is not None else None
+        return render_template(
+            'logs.html', logs=logs, filters=filters, history_types=HISTORY_TYPES,
+            older_url=older_url, newest_url=newest_url
+        )
 
     @app.route('/uploads/<path:filename>')
     def uploaded_file(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        path = safe_join(app.config['UPLOAD_FOLDER'], filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        # History re-downloads revalidate with the ETag and resume with Range requests
+        return send_download(path, as_attachment=False)
+
+    @app.route('/stats')
+    def stats():
+        # Operational counters for monitoring on the host, not for site visitors
+        if request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(404)
+        return jsonify(collect_stats())
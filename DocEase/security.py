@@ -9,6 +9,18 @@ CSV_EXTENSIONS = {'csv'}
 CONVERTER_EXTENSIONS = {'pdf', 'docx', 'doc', 'jpg', 'jpeg', 'png', 'csv'}
 PDF_EDITOR_EXTENSIONS = {'pdf'}  # PDF editor only works with PDFs
 
+# Leading bytes of each accepted file type; CSV is plain text and has none
+MAGIC_BYTES = {
+    'pdf': (b'%PDF',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'docx': (b'PK\x03\x04',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'zip': (b'PK\x03\x04', b'PK\x05\x06'),
+}
+MAGIC_BYTES_LENGTH = max(len(magic) for signatures in MAGIC_BYTES.values() for magic in signatures)
+
 
 def validate_upload_path(filename, upload_folder):
     """Validate and secure the upload path to prevent path traversal attacks."""
@@ -36,6 +48,12 @@ def is_valid_pdf(file_path):
         return False
 
 
+def matches_magic_bytes(extension, header):
+    """Check that a file's first bytes fit its extension; types without a signature always pass."""
+    signatures = MAGIC_BYTES.get(extension)
+    return signatures is None or any(header.startswith(magic) for magic in signatures)
+
+
 def validate_file_size(file_path, max_size):
     """Validate that file doesn't exceed maximum size."""
     try:
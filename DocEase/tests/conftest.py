@@ -0,0 +1,86 @@
+"""Shared fixtures for the PDF operation tests"""
+import os
+import sys
+
+import pytest
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_pdf(path, texts, pagesize=A4, image=None):
+    """Write a PDF with one page per text, optionally drawing the same image on every page"""
+    c = canvas.Canvas(str(path), pagesize=pagesize)
+    for text in texts:
+        c.setFont("Helvetica", 24)
+        c.drawString(72, 700, text)
+        if image is not None:
+            c.drawImage(str(image), 72, 400, width=100, height=100)
+        c.showPage()
+    c.save()
+    return str(path)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Factory for text PDFs in the test's temporary directory"""
+    def factory(name, texts, **kwargs):
+        return write_pdf(tmp_path / name, texts, **kwargs)
+    return factory
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """The subset of the Flask config the PDF operations read"""
+    return {
+        'UPLOAD_FOLDER': str(tmp_path),
+        'MERGE_STREAMING_THRESHOLD_MB': 100,
+        'MERGE_MEMORY_BUDGET_MB': 256,
+        'SPLIT_WORKERS': 1,
+        'SPLIT_CHUNK_PAGES': 50,
+        'SPLIT_PARALLEL_MIN_PAGES': 200,
+    }
+
+
+@pytest.fixture
+def make_image_pdf(tmp_path):
+    """Factory for PDFs with a distinct noise image per page, large enough to exceed a megabyte budget"""
+    from PIL import Image
+
+    def factory(name, texts, image_size=400):
+        c = canvas.Canvas(str(tmp_path / name), pagesize=A4)
+        for index, text in enumerate(texts):
+            image_path = tmp_path / f"{name}_{index}.png"
+            Image.effect_noise((image_size, image_size), 96).convert('RGB').save(image_path)
+            c.setFont("Helvetica", 24)
+            c.drawString(72, 700, text)
+            c.drawImage(str(image_path), 72, 200, width=400, height=400)
+            c.showPage()
+        c.save()
+        return str(tmp_path / name)
+    return factory
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A migrated database in the test's temporary directory, used by every get_db_connection call"""
+    import database
+
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'conversions.db'))
+    pool = database.ConnectionPool(database.DB_PATH, 2, 5000, 'NORMAL')
+    monkeypatch.setattr(database, '_pool', pool)
+    database.run_migrations()
+    return pool
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    """A bare Flask app with the upload request class and config, for testing one route at a time"""
+    from flask import Flask
+    from uploads import StreamingRequest
+
+    app = Flask(__name__)
+    app.request_class = StreamingRequest
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), MAX_CONTENT_LENGTH=1024 * 1024, TESTING=True)
+    return app
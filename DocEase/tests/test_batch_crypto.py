@@ -0,0 +1,108 @@
+"""Batch encryption and decryption on the shared crypto pool"""
+import csv
+import io
+import os
+import zipfile
+
+import fitz
+import pytest
+
+import pdf_ops
+import process_pools
+from pdf_ops import BatchCryptoOps
+
+
+@pytest.fixture(autouse=True)
+def stop_pools():
+    yield
+    process_pools.shutdown_process_pools()
+
+
+def archive_contents(zip_path):
+    """(archive names without the report, report rows)"""
+    with zipfile.ZipFile(zip_path) as archive:
+        names = sorted(name for name in archive.namelist() if name != 'batch_report.csv')
+        report = list(csv.DictReader(io.StringIO(archive.read('batch_report.csv').decode())))
+    return names, report
+
+
+def opens_with(data, password):
+    doc = fitz.open(stream=data, filetype='pdf')
+    try:
+        return doc.needs_pass and doc.authenticate(password) > 0 and 'one' in doc[0].get_text()
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_encrypt_with_per_file_passwords(make_pdf, app_config, workers):
+    inputs = [
+        ('report.pdf', make_pdf('a.pdf', ['one'])),
+        ('report.pdf', make_pdf('b.pdf', ['one'])),
+        ('notes.pdf', make_pdf('c.pdf', ['one'])),
+    ]
+    app_config['CRYPTO_WORKERS'] = workers
+
+    zip_path, _ = BatchCryptoOps.run(
+        'encrypt', inputs, app_config, password='shared', password_map={'notes.pdf': 'own'}, algorithm='AES-256'
+    )
+
+    assert ('crypto' in process_pools._pools) == (workers > 1)
+    names, report = archive_contents(zip_path)
+    assert names == ['encrypted_notes.pdf', 'encrypted_report (2).pdf', 'encrypted_report.pdf']
+    assert [row['status'] for row in report] == ['ok', 'ok', 'ok']
+    with zipfile.ZipFile(zip_path) as archive:
+        assert opens_with(archive.read('encrypted_report.pdf'), 'shared')
+        assert opens_with(archive.read('encrypted_notes.pdf'), 'own')
+        assert not opens_with(archive.read('encrypted_notes.pdf'), 'shared')
+    # Only the ZIP is left; the per-file outputs were moved into it
+    assert [name for name in os.listdir(app_config['UPLOAD_FOLDER']) if name.startswith('encrypted_')] == []
+
+
+def test_batch_decrypt_reports_failures_without_stopping(make_pdf, app_config, tmp_path):
+    encrypted = []
+    for name, password in [('first.pdf', 'right'), ('second.pdf', 'other')]:
+        path = str(tmp_path / f'enc_{name}')
+        assert pdf_ops.EncryptOps.encrypt(make_pdf(name, ['one']), path, password)
+        encrypted.append((name, path))
+    encrypted.append(('third.pdf', str(tmp_path / 'enc_first.pdf')))
+
+    zip_path, _ = BatchCryptoOps.run(
+        'decrypt', encrypted, app_config, password='right', password_map={'third.pdf': ''}
+    )
+
+    names, report = archive_contents(zip_path)
+    assert names == ['decrypted_first.pdf']
+    assert [(row['file'], row['status']) for row in report] == [
+        ('first.pdf', 'ok'), ('second.pdf', 'failed'), ('third.pdf', 'failed')
+    ]
+    assert report[1]['error'] == 'Incorrect password' and report[2]['error'] == 'No password given'
+
+
+def test_zip_extraction_flattens_names_and_skips_non_pdfs(make_pdf, tmp_path):
+    upload_folder = tmp_path / 'uploads'
+    upload_folder.mkdir()
+    zip_path = tmp_path / 'batch.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        archive.write(make_pdf('a.pdf', ['one']), 'q1/report.pdf')
+        archive.write(make_pdf('b.pdf', ['two']), 'q2/report.pdf')
+        archive.writestr('../../escape.pdf', open(make_pdf('c.pdf', ['three']), 'rb').read())
+        archive.writestr('fake.pdf', b'not a pdf')
+        archive.writestr('readme.txt', b'hello')
+
+    extracted = BatchCryptoOps.extract_pdfs(str(zip_path), str(upload_folder), 1024 * 1024)
+
+    assert [name for name, _ in extracted] == ['report.pdf', 'report (2).pdf', 'escape.pdf']
+    assert all(os.path.dirname(path) == str(upload_folder) for _, path in extracted)
+    assert sorted(os.listdir(upload_folder)) == sorted(os.path.basename(path) for _, path in extracted)
+
+
+def test_zip_with_too_many_pdfs_is_refused(make_pdf, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_ops, 'BATCH_ZIP_MAX_ENTRIES', 2)
+    zip_path = tmp_path / 'batch.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        for index in range(3):
+            archive.write(make_pdf(f'{index}.pdf', ['page']), f'{index}.pdf')
+
+    with pytest.raises(ValueError, match='limit is 2'):
+        BatchCryptoOps.extract_pdfs(str(zip_path), str(tmp_path), 1024 * 1024)
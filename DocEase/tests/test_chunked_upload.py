@@ -0,0 +1,69 @@
+"""Limits on open chunked uploads and expiry of idle ones"""
+import os
+import time
+
+import pytest
+
+import uploads
+from uploads import ChunkedUpload, UploadLimitExceeded, CHUNKED_UPLOAD_DIR
+
+MB = 1024 * 1024
+LIMITS = {
+    'CHUNKED_UPLOAD_MAX_PER_OWNER': 2,
+    'CHUNKED_UPLOAD_MAX_OWNER_MB': 10,
+    'CHUNKED_UPLOAD_MAX_OPEN': 3,
+    'CHUNKED_UPLOAD_MAX_RESERVED_MB': 11,
+}
+
+
+def start(folder, owner, size=MB):
+    return ChunkedUpload.create(str(folder), 'input.pdf', size, owner=owner, limits=LIMITS)
+
+
+def upload_files(folder):
+    return sorted(os.listdir(os.path.join(folder, CHUNKED_UPLOAD_DIR)))
+
+
+def test_owner_limits(tmp_path):
+    start(tmp_path, 'session:a')
+    start(tmp_path, 'session:a')
+    before = upload_files(tmp_path)
+    with pytest.raises(UploadLimitExceeded, match='At most 2 uploads'):
+        start(tmp_path, 'session:a')
+    # A refused upload leaves nothing behind
+    assert upload_files(tmp_path) == before
+
+    with pytest.raises(UploadLimitExceeded, match='at most 10 MB'):
+        start(tmp_path, 'session:b', size=11 * MB)
+    start(tmp_path, 'session:b', size=9 * MB)
+
+
+def test_server_limits(tmp_path):
+    for owner in ('session:a', 'session:b', 'session:c'):
+        start(tmp_path, owner)
+    with pytest.raises(UploadLimitExceeded, match='too many uploads'):
+        start(tmp_path, 'session:d')
+
+    finished = ChunkedUpload.open_uploads(str(tmp_path))[0]
+    finished.discard()
+    with pytest.raises(UploadLimitExceeded, match='too many uploads'):
+        start(tmp_path, 'session:d', size=10 * MB)
+    start(tmp_path, 'session:d', size=9 * MB)
+
+
+def test_idle_uploads_expire(tmp_path, monkeypatch):
+    idle = start(tmp_path, 'session:a')
+    active = start(tmp_path, 'session:a')
+    stale = time.time() - 3600
+    for suffix in ('part', 'ranges', 'json'):
+        os.utime(idle._path(suffix), (stale, stale))
+        os.utime(active._path(suffix), (stale, stale))
+    # A chunk written recently keeps an upload open
+    with open(active._path('part'), 'rb') as f:
+        active.write_chunk(0, f, 1024)
+
+    monkeypatch.setattr(uploads, 'CHUNKED_UPLOAD_IDLE_MINUTES', 30)
+    assert [upload.upload_id for upload in ChunkedUpload.open_uploads(str(tmp_path))] == [active.upload_id]
+    assert not any(idle.upload_id in name for name in upload_files(tmp_path))
+    # The expired upload no longer counts against its owner
+    start(tmp_path, 'session:a')
@@ -0,0 +1,83 @@
+"""Batched conversion history writes"""
+import pytest
+
+import conversion_log
+from conversion_log import ConversionLogWriter, record_conversion, start_conversion_log, stop_conversion_log
+from database import get_db_connection
+
+
+def history():
+    conn = get_db_connection()
+    rows = conn.execute('SELECT filename, conversion_type, user_id FROM conversions ORDER BY id').fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+@pytest.fixture
+def writer(db):
+    writer = ConversionLogWriter(batch_size=100, flush_interval=1, max_queue=100)
+    yield writer
+    writer.stop()
+
+
+def test_burst_is_written_in_one_batch(writer):
+    for index in range(50):
+        writer.record(f'file{index}.pdf', 'merge-pdf', f'out{index}.pdf', 7)
+    assert history() == []
+
+    writer.flush()
+
+    assert history() == [(f'file{index}.pdf', 'merge-pdf', 7) for index in range(50)]
+    assert writer.stats()['batches'] == 1 and writer.stats()['written'] == 50
+
+
+def test_full_batches_are_written_without_waiting(db):
+    writer = ConversionLogWriter(batch_size=10, flush_interval=60, max_queue=100)
+    for index in range(20):
+        writer.record(f'file{index}.pdf', 'split-pdf', 'out.pdf', None)
+
+    writer.flush()
+
+    assert len(history()) == 20
+    assert writer.stats()['batches'] == 2
+    writer.stop()
+
+
+def test_stop_writes_queued_records_and_later_ones_directly(writer):
+    writer.record('queued.pdf', 'rotate-pdf', 'out.pdf', 1)
+    writer.stop()
+    writer.record('late.pdf', 'rotate-pdf', 'out.pdf', 1)
+
+    assert history() == [('queued.pdf', 'rotate-pdf', 1), ('late.pdf', 'rotate-pdf', 1)]
+
+
+def test_full_queue_falls_back_to_a_direct_write(db, monkeypatch):
+    writer = ConversionLogWriter(batch_size=100, flush_interval=1, max_queue=2)
+    # No writer thread, so the queue only fills
+    monkeypatch.setattr(writer, '_ensure_thread', lambda: None)
+
+    for index in range(3):
+        writer.record(f'file{index}.pdf', 'merge-pdf', 'out.pdf', None)
+
+    assert history() == [('file2.pdf', 'merge-pdf', None)]
+    assert writer.stats()['overflow'] == 1 and writer.stats()['queue_depth'] == 2
+
+
+def test_failed_batches_are_counted(writer, monkeypatch):
+    def fail(rows):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(conversion_log, 'write_conversions', fail)
+    writer.record('file.pdf', 'merge-pdf', 'out.pdf', None)
+    writer.flush()
+
+    assert writer.stats()['failed'] == 1 and writer.stats()['written'] == 0
+
+
+def test_batch_size_of_one_writes_synchronously(db):
+    assert start_conversion_log({'CONVERSION_LOG_BATCH_SIZE': 1}) is None
+    try:
+        record_conversion('file.pdf', 'csv-to-pdf', 'out.pdf', 3)
+        assert history() == [('file.pdf', 'csv-to-pdf', 3)]
+    finally:
+        stop_conversion_log()
@@ -0,0 +1,43 @@
+"""Encrypt and decrypt round trips"""
+import os
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdf_ops import EncryptOps, DecryptOps
+
+
+def test_round_trip_keeps_pages_outline_and_metadata(make_pdf, tmp_path):
+    writer = PdfWriter()
+    writer.append(make_pdf('plain.pdf', ['intro', 'details']))
+    writer.add_outline_item('Intro', 0)
+    writer.add_outline_item('Details', 1)
+    writer.add_metadata({'/Title': 'Quarterly report'})
+    source = str(tmp_path / 'source.pdf')
+    with open(source, 'wb') as f:
+        writer.write(f)
+    encrypted = str(tmp_path / 'encrypted.pdf')
+    decrypted = str(tmp_path / 'decrypted.pdf')
+
+    assert EncryptOps.encrypt(source, encrypted, 'secret1')
+    assert PdfReader(encrypted).is_encrypted
+    assert DecryptOps.decrypt(encrypted, decrypted, 'wrong') == (False, 'Incorrect password')
+    assert DecryptOps.decrypt(encrypted, decrypted, 'secret1') == (True, 'Success')
+
+    reader = PdfReader(decrypted)
+    assert [page.extract_text().strip() for page in reader.pages] == ['intro', 'details']
+    assert [item.title for item in reader.outline] == ['Intro', 'Details']
+    assert reader.metadata.title == 'Quarterly report'
+
+
+def test_crypto_results_are_not_cached(make_pdf, tmp_path, monkeypatch):
+    import result_cache
+
+    cache = result_cache.ResultCache(str(tmp_path / 'cache'), 10 * 1024 * 1024)
+    monkeypatch.setattr(result_cache, '_cache', cache)
+    source = make_pdf('source.pdf', ['secret page'])
+    encrypted = str(tmp_path / 'encrypted.pdf')
+    decrypted = str(tmp_path / 'decrypted.pdf')
+
+    assert EncryptOps.encrypt(source, encrypted, 'pw')
+    assert DecryptOps.decrypt(encrypted, decrypted, 'pw') == (True, "Success")
+    assert os.listdir(tmp_path / 'cache') == []
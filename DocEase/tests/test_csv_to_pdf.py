@@ -0,0 +1,75 @@
+"""Parallel CSV to PDF rendering from byte ranges of the original file"""
+import csv
+import random
+
+import pytest
+
+from PyPDF2 import PdfReader
+
+import pdf_ops
+import process_pools
+from pdf_ops import CSVToPDFOps
+
+
+@pytest.fixture(autouse=True)
+def stop_pools():
+    yield
+    process_pools.shutdown_process_pools()
+
+
+def write_csv(path, rows):
+    rng = random.Random(0)
+    words = ['alpha', 'béta', 'line\nbreak', 'q"uote', 'comma,', '\r\nwindows']
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'notes'])
+        for index in range(rows):
+            writer.writerow([index, f'Customer {index} ✓', ' '.join(rng.choices(words, k=rng.randint(0, 30)))])
+    return str(path)
+
+
+def pdf_text(path):
+    reader = PdfReader(path)
+    return len(reader.pages), [page.extract_text() for page in reader.pages]
+
+
+def test_chunk_ranges_follow_records_across_lines(tmp_path):
+    csv_path = write_csv(tmp_path / 'input.csv', 250)
+    ranges = list(CSVToPDFOps._iter_chunk_ranges(csv_path, 100))
+
+    assert [end - start > 0 for start, end in ranges] == [True] * 3
+    assert all(ranges[index][1] == ranges[index + 1][0] for index in range(len(ranges) - 1))
+    rows = [row for start, end in ranges for row in pdf_ops._read_csv_range(csv_path, start, end)]
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        assert rows == list(csv.reader(f))[1:]
+
+
+def test_parallel_render_matches_serial(tmp_path, monkeypatch):
+    csv_path = write_csv(tmp_path / 'input.csv', 1500)
+    monkeypatch.setattr(pdf_ops, 'CSV_PDF_PARALLEL_MIN_MB', 0)
+    monkeypatch.setattr(pdf_ops, 'CSV_PDF_CHUNK_ROWS', 200)
+
+    assert CSVToPDFOps.convert(csv_path, str(tmp_path / 'serial.pdf'), workers=1)
+    assert CSVToPDFOps.convert(csv_path, str(tmp_path / 'parallel.pdf'), workers=2)
+    assert pdf_text(str(tmp_path / 'parallel.pdf')) == pdf_text(str(tmp_path / 'serial.pdf'))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['input.csv', 'parallel.pdf', 'serial.pdf']
+
+
+def test_conversions_share_one_csv_pool(tmp_path, monkeypatch):
+    csv_path = write_csv(tmp_path / 'input.csv', 600)
+    monkeypatch.setattr(pdf_ops, 'CSV_PDF_PARALLEL_MIN_MB', 0)
+    monkeypatch.setattr(pdf_ops, 'CSV_PDF_CHUNK_ROWS', 200)
+
+    assert CSVToPDFOps.convert(csv_path, str(tmp_path / 'first.pdf'), workers=2)
+    pool = process_pools.get_process_pool('csv-to-pdf', 2)
+    assert CSVToPDFOps.convert(csv_path, str(tmp_path / 'second.pdf'), workers=2)
+
+    assert process_pools.get_process_pool('csv-to-pdf', 2) is pool
+
+
+def test_default_renders_on_the_calling_thread(tmp_path, monkeypatch):
+    csv_path = write_csv(tmp_path / 'input.csv', 600)
+    monkeypatch.setattr(pdf_ops, 'CSV_PDF_PARALLEL_MIN_MB', 0)
+
+    assert CSVToPDFOps.convert(csv_path, str(tmp_path / 'output.pdf'))
+    assert 'csv-to-pdf' not in process_pools._pools
@@ -0,0 +1,50 @@
+"""Connection pooling across forked worker processes, and the loopback-only /stats route"""
+import os
+
+import database
+from database import get_db_connection, get_db_stats
+from routes.utility import init_utility_routes
+
+
+def test_forked_process_opens_its_own_connections(db):
+    conn = get_db_connection()
+    conn.execute("INSERT INTO users (username, password) VALUES ('parent', 'x')")
+    conn.commit()
+    inherited = conn._connection
+    conn.close()
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            child = get_db_connection()
+            fresh = database._current_pool() is not db and child._connection is not inherited
+            count = child.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            child.close()
+            os.write(write_end, f"{fresh} {count}".encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_end) as f:
+        assert f.read() == 'True 1'
+
+    # The parent keeps its own pool and idle connection
+    assert database._current_pool() is db
+    conn = get_db_connection()
+    assert conn._connection is inherited
+    conn.close()
+
+
+def test_stats_are_served_to_loopback_clients_only(flask_app, db):
+    init_utility_routes(
+        flask_app, get_db_connection, send_download=None, collect_stats=lambda: {'db': get_db_stats()}
+    )
+    client = flask_app.test_client()
+
+    for address in ('127.0.0.1', '::1'):
+        response = client.get('/stats', environ_base={'REMOTE_ADDR': address})
+        assert response.status_code == 200
+        assert 'db' in response.get_json()
+    for address in ('10.0.0.5', '192.168.1.20', '::ffff:10.0.0.5'):
+        assert client.get('/stats', environ_base={'REMOTE_ADDR': address}).status_code == 404
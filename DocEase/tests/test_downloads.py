@@ -0,0 +1,83 @@
+"""Downloads with content ETags, byte ranges and front-end offload"""
+import hashlib
+
+import pytest
+
+from downloads import send_download
+
+DATA = bytes(range(256)) * 16
+
+
+@pytest.fixture
+def result(tmp_path):
+    path = tmp_path / 'result.pdf'
+    path.write_bytes(DATA)
+    return path
+
+
+@pytest.fixture
+def client(flask_app, result):
+    flask_app.config.update(DOWNLOAD_OFFLOAD='', DOWNLOAD_ACCEL_PREFIX='/protected-uploads/')
+
+    @flask_app.route('/download')
+    def download():
+        return send_download(str(result))
+
+    return flask_app.test_client()
+
+
+def test_full_download_has_a_content_etag(client):
+    response = client.get('/download')
+
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.headers['ETag'] == f'"{hashlib.sha256(DATA).hexdigest()}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = client.get('/download').headers['ETag']
+
+    response = client.get('/download', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/download', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_range_resumes_a_download(client):
+    response = client.get('/download', headers={'Range': 'bytes=1000-1999'})
+
+    assert response.status_code == 206
+    assert response.data == DATA[1000:2000]
+    assert response.headers['Content-Range'] == f'bytes 1000-1999/{len(DATA)}'
+
+
+def test_if_range_with_a_changed_file_sends_it_whole(client, result):
+    etag = client.get('/download').headers['ETag']
+    result.write_bytes(DATA[::-1])
+
+    response = client.get('/download', headers={'Range': 'bytes=0-99', 'If-Range': etag})
+
+    assert response.status_code == 200
+    assert response.data == DATA[::-1]
+
+
+def test_unsatisfiable_range(client):
+    response = client.get('/download', headers={'Range': f'bytes={len(DATA)}-'})
+
+    assert response.status_code == 416
+
+
+def test_x_accel_offload_sends_headers_only(client, flask_app):
+    flask_app.config['DOWNLOAD_OFFLOAD'] = 'x-accel'
+
+    response = client.get('/download')
+
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == '/protected-uploads/result.pdf'
+    assert response.headers['ETag'] == f'"{hashlib.sha256(DATA).hexdigest()}"'
+    etag = response.headers['ETag']
+    assert client.get('/download', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,104 @@
+"""Keyset-paginated conversion history"""
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+import routes.utility
+from database import get_db_connection, release_db_connection
+from routes.utility import init_utility_routes
+
+USER_ID = 7
+
+
+def page_context(template, logs, filters, older_url, newest_url, **context):
+    return {
+        'logs': [dict(row) for row in logs], 'filters': filters, 'older_url': older_url, 'newest_url': newest_url
+    }
+
+
+@pytest.fixture
+def client(flask_app, db, monkeypatch):
+    flask_app.config.update(SECRET_KEY='test', HISTORY_PAGE_SIZE=3)
+    flask_app.teardown_appcontext(release_db_connection)
+    # The page context is what matters here, not the site templates
+    monkeypatch.setattr(routes.utility, 'render_template', page_context)
+    init_utility_routes(flask_app, get_db_connection, send_download=None, collect_stats=dict)
+    flask_app.add_url_rule('/login', 'login', lambda: 'login')
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = USER_ID
+    return client
+
+
+def add_conversions(rows):
+    """Insert (timestamp, conversion type, user) rows; returns their IDs"""
+    conn = get_db_connection()
+    ids = [
+        conn.execute(
+            'INSERT INTO conversions (filename, conversion_type, output_file, user_id, timestamp) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (f'file{index}.pdf', conversion_type, f'out{index}.pdf', user_id, timestamp)
+        ).lastrowid
+        for index, (timestamp, conversion_type, user_id) in enumerate(rows)
+    ]
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def walk(client, url):
+    """IDs on every page from url onwards, and the query of each page after the first"""
+    pages, queries = [], []
+    while url:
+        context = client.get(url).get_json()
+        pages.append([row['id'] for row in context['logs']])
+        url = context['older_url']
+        if url:
+            queries.append(parse_qs(urlsplit(url).query))
+    return pages, queries
+
+
+def test_pages_cover_rows_sharing_a_timestamp_exactly_once(client):
+    ids = add_conversions([('2024-05-01 10:00:00', 'merge-pdf', USER_ID)] * 5 + [
+        ('2024-05-02 10:00:00', 'split-pdf', USER_ID),
+        ('2024-05-01 09:00:00', 'split-pdf', USER_ID),
+        ('2024-05-03 10:00:00', 'split-pdf', USER_ID + 1),
+    ])
+
+    pages, queries = walk(client, '/logs')
+
+    newest_first = [ids[5], *reversed(ids[:5]), ids[6]]
+    assert pages == [newest_first[:3], newest_first[3:6], newest_first[6:]]
+    assert queries[0] == {'before_time': ['2024-05-01 10:00:00'], 'before_id': [str(ids[3])]}
+
+
+def test_last_full_page_has_no_older_link(client):
+    add_conversions([(f'2024-05-0{day} 10:00:00', 'merge-pdf', USER_ID) for day in range(1, 7)])
+
+    pages, _ = walk(client, '/logs')
+
+    assert [len(page) for page in pages] == [3, 3]
+
+
+def test_filters_are_kept_across_pages(client):
+    ids = add_conversions([
+        (f'2024-05-{day:02d} 10:00:00', 'split-pdf' if day % 2 else 'merge-pdf', USER_ID) for day in range(1, 15)
+    ])
+
+    pages, queries = walk(client, '/logs?type=split-pdf&from=2024-05-02&to=2024-05-11')
+
+    # Odd days 3 to 11; the end date is inclusive
+    assert pages == [[ids[10], ids[8], ids[6]], [ids[4], ids[2]]]
+    assert queries[0]['type'] == ['split-pdf']
+    assert queries[0]['from'] == ['2024-05-02'] and queries[0]['to'] == ['2024-05-11']
+
+
+def test_unknown_type_and_malformed_dates_are_ignored(client):
+    add_conversions([('2024-05-01 10:00:00', 'merge-pdf', USER_ID)])
+
+    context = client.get('/logs?type=drop-table&from=yesterday').get_json()
+
+    assert len(context['logs']) == 1
+    assert context['filters'] == {'type': '', 'from': '', 'to': ''}
+    assert context['newest_url'] is None
@@ -0,0 +1,102 @@
+"""Multi-image PDFs with JPEG passthrough and downscaling"""
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from pdf_ops import ImageToPDFOps
+
+
+def save_image(path, size, mode='RGB', dpi=(72, 72), orientation=None, **kwargs):
+    image = Image.effect_noise(size, 64).convert(mode)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(path, dpi=dpi, exif=exif, **kwargs)
+    return str(path)
+
+
+def page_image(page):
+    return page['/Resources']['/XObject']['/Im0']
+
+
+@pytest.fixture
+def output(tmp_path):
+    return str(tmp_path / 'output.pdf')
+
+
+def test_small_jpeg_is_embedded_without_decoding(tmp_path, output):
+    jpeg = save_image(tmp_path / 'photo.jpg', (300, 200), quality=90)
+
+    assert ImageToPDFOps.convert([jpeg], output)
+
+    page = PdfReader(output).pages[0]
+    image = page_image(page)
+    assert image['/Filter'] == '/DCTDecode'
+    assert image._data == open(jpeg, 'rb').read()
+    # 72 DPI keeps one point per pixel
+    assert [float(value) for value in page.mediabox] == [0, 0, 300, 200]
+
+
+def test_large_image_is_reduced_to_the_target_dpi(tmp_path, output):
+    jpeg = save_image(tmp_path / 'scan.jpg', (3000, 4000), dpi=(600, 600))
+
+    assert ImageToPDFOps.convert([jpeg], output, target_dpi=150)
+
+    page = PdfReader(output).pages[0]
+    image = page_image(page)
+    # 5 x 6.67 inches at 150 DPI
+    assert (image['/Width'], image['/Height']) == (750, 1000)
+    assert image['/Filter'] == '/DCTDecode'
+    assert round(float(page.mediabox.width)) == 360
+
+
+def test_oversized_page_shrinks_to_fit_a4(tmp_path, output):
+    png = save_image(tmp_path / 'poster.png', (2000, 1000), dpi=(72, 72))
+
+    assert ImageToPDFOps.convert([png], output)
+
+    width, height = (float(value) for value in PdfReader(output).pages[0].mediabox[2:])
+    # Landscape A4 is 841.89 x 595.28 points
+    assert round(width, 2) == 841.89 and round(height, 2) == 420.94
+
+
+def test_transparent_png_is_flattened_losslessly(tmp_path, output):
+    png = save_image(tmp_path / 'logo.png', (120, 80), mode='RGBA')
+
+    assert ImageToPDFOps.convert([png], output)
+
+    image = page_image(PdfReader(output).pages[0])
+    assert image['/Filter'] == '/FlateDecode'
+    assert image['/ColorSpace'] == '/DeviceRGB'
+
+
+def test_exif_rotation_turns_the_page(tmp_path, output):
+    jpeg = save_image(tmp_path / 'phone.jpg', (400, 300), orientation=6)
+
+    assert ImageToPDFOps.convert([jpeg], output)
+
+    page = PdfReader(output).pages[0]
+    # Stored landscape, displayed portrait; the JPEG itself is still copied as is
+    assert [float(value) for value in page.mediabox[2:]] == [300, 400]
+    assert page_image(page)._data == open(jpeg, 'rb').read()
+
+
+def test_one_page_per_image_in_order(tmp_path, output):
+    images = [
+        save_image(tmp_path / 'a.jpg', (100, 100)),
+        save_image(tmp_path / 'b.png', (200, 100), mode='L'),
+        save_image(tmp_path / 'c.jpg', (100, 300), mode='CMYK'),
+    ]
+
+    assert ImageToPDFOps.convert(images, output)
+
+    reader = PdfReader(output)
+    assert [round(float(page.mediabox.width)) for page in reader.pages] == [100, 200, 100]
+    assert [page_image(page)['/ColorSpace'] for page in reader.pages] == ['/DeviceRGB', '/DeviceGray', '/DeviceCMYK']
+
+
+def test_unreadable_image_fails(tmp_path, output):
+    broken = tmp_path / 'broken.jpg'
+    broken.write_bytes(b'not an image')
+
+    assert ImageToPDFOps.convert([str(broken)], output) is False
@@ -0,0 +1,90 @@
+"""Reconciling jobs left unfinished by a crash or restart, and keeping their results"""
+import os
+import subprocess
+import sys
+import time
+
+import job_queue
+from database import get_db_connection
+from job_queue import JobQueue, get_job, job_result, reconcile_stale_jobs, _process_owner
+
+
+def insert_job(job_id, status, owner):
+    conn = get_db_connection()
+    conn.execute(
+        'INSERT INTO jobs (id, operation, filename, status, owner) VALUES (?, ?, ?, ?, ?)',
+        (job_id, 'pdf-to-word', 'input.pdf', status, owner)
+    )
+    conn.commit()
+    conn.close()
+
+
+def job_statuses():
+    conn = get_db_connection()
+    try:
+        return {row['id']: row['status'] for row in conn.execute('SELECT id, status FROM jobs')}
+    finally:
+        conn.close()
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_reconcile_fails_jobs_of_exited_processes(db):
+    host = _process_owner().rpartition(':')[0]
+    dead_owner = f"{host}:{exited_pid()}"
+    insert_job('queued-dead', 'queued', dead_owner)
+    insert_job('running-dead', 'running', dead_owner)
+    insert_job('legacy', 'running', None)
+    insert_job('finished-dead', 'finished', dead_owner)
+    insert_job('running-live', 'running', _process_owner())
+    insert_job('other-host', 'running', f"elsewhere.invalid:{os.getpid()}")
+
+    assert reconcile_stale_jobs() == 3
+    assert job_statuses() == {
+        'queued-dead': 'failed',
+        'running-dead': 'failed',
+        'legacy': 'failed',
+        'finished-dead': 'finished',
+        'running-live': 'running',
+        'other-host': 'running',
+    }
+    assert reconcile_stale_jobs() == 0
+
+
+def wait_for(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job['status'] in ('finished', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_results_outlive_upload_cleanup_and_expire(db, tmp_path, monkeypatch):
+    results_dir = tmp_path / 'uploads' / 'jobs'
+    results_dir.mkdir(parents=True)
+    queue = JobQueue({}, 1, str(results_dir), 24)
+    monkeypatch.setattr(job_queue, '_queue', queue)
+
+    def work():
+        output_path = tmp_path / 'uploads' / 'report.docx'
+        output_path.write_bytes(b'result')
+        return str(output_path)
+
+    job = wait_for(queue.submit('pdf-to-word', work, 'report.pdf'))
+    assert job['status'] == 'finished'
+    # cleanup_uploads only removes files directly in the upload folder
+    assert not (tmp_path / 'uploads' / 'report.docx').exists()
+    assert job_result(job) == str(results_dir / job['id'] / 'report.docx')
+
+    old = time.time() - 25 * 3600
+    os.utime(results_dir / job['id'], (old, old))
+    queue.remove_expired_results()
+    assert job_result(get_job(job['id'])) is None
+    assert get_job(job['id'])['status'] == 'failed'
+    queue.shutdown()
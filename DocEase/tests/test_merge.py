@@ -0,0 +1,73 @@
+"""Merging, with resource deduplication"""
+import os
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from pdf_ops import PDFOperations
+
+
+@pytest.fixture
+def logo(tmp_path):
+    path = tmp_path / 'logo.png'
+    Image.effect_noise((120, 120), 64).convert('RGB').save(path)
+    return path
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def test_deduplicated_merge_shares_fonts_and_images(make_pdf, logo, app_config):
+    first = make_pdf('first.pdf', ['first 1', 'first 2'], image=logo)
+    second = make_pdf('second.pdf', ['second 1'], image=logo)
+
+    plain = PDFOperations.merge_pdfs([first, second], app_config)
+    deduplicated = PDFOperations.merge_pdfs([first, second], app_config, deduplicate=True)
+
+    assert os.path.getsize(deduplicated) < os.path.getsize(plain)
+    assert page_texts(deduplicated) == ['first 1', 'first 2', 'second 1']
+
+    reader = PdfReader(deduplicated)
+    images = {
+        page['/Resources']['/XObject'].raw_get(name).idnum
+        for page in reader.pages
+        for name in page['/Resources']['/XObject']
+    }
+    assert len(images) == 1
+    fonts = {
+        page['/Resources']['/Font'].raw_get(name).idnum
+        for page in reader.pages
+        for name in page['/Resources']['/Font']
+    }
+    assert len(fonts) == 1
+
+
+def test_deduplication_keeps_duplicates_that_are_still_referenced(make_pdf, logo, app_config, monkeypatch):
+    first = make_pdf('first.pdf', ['first'], image=logo)
+    second = make_pdf('second.pdf', ['second'], image=logo)
+
+    # A remapping that misses every reference leaves all duplicates in use
+    monkeypatch.setattr(PDFOperations, '_remap_references', staticmethod(lambda obj, remap, visited: None))
+    output = PDFOperations.merge_pdfs([first, second], app_config, deduplicate=True)
+
+    reader = PdfReader(output)
+    assert page_texts(output) == ['first', 'second']
+    for page in reader.pages:
+        for name in page['/Resources']['/XObject']:
+            assert page['/Resources']['/XObject'][name]['/Subtype'] == '/Image'
+
+
+def test_deduplication_falls_back_to_a_plain_write_without_writer_internals(make_pdf, logo, app_config, monkeypatch):
+    first = make_pdf('first.pdf', ['first'], image=logo)
+    second = make_pdf('second.pdf', ['second'], image=logo)
+    plain = PDFOperations.merge_pdfs([first, second], app_config)
+
+    assert PDFOperations._deduplicate_objects(object()) == (0, 0)
+
+    monkeypatch.setattr(PDFOperations, '_has_object_table', staticmethod(lambda writer: False))
+    output = PDFOperations.merge_pdfs([first, second], app_config, deduplicate=True)
+
+    assert page_texts(output) == ['first', 'second']
+    assert os.path.getsize(output) == os.path.getsize(plain)
@@ -0,0 +1,80 @@
+"""Round trips through the streaming merge, which writes objects and the xref table itself"""
+import os
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdf_ops import PDFOperations
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def test_streaming_merge_keeps_every_page_in_order(make_pdf, app_config):
+    inputs = [
+        make_pdf('a.pdf', ['a1', 'a2', 'a3']),
+        make_pdf('b.pdf', ['b1']),
+        make_pdf('c.pdf', ['c1', 'c2']),
+    ]
+
+    output = PDFOperations.merge_pdfs_streaming(inputs, app_config)
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 6
+    assert reader.trailer['/Root']['/Pages']['/Count'] == 6
+    assert page_texts(output) == ['a1', 'a2', 'a3', 'b1', 'c1', 'c2']
+
+
+def test_streaming_merge_xref_offsets_point_at_their_objects(make_pdf, app_config):
+    output = PDFOperations.merge_pdfs_streaming(
+        [make_pdf('a.pdf', ['a1']), make_pdf('b.pdf', ['b1'])], app_config
+    )
+
+    with open(output, 'rb') as f:
+        data = f.read()
+    xref = data.rindex(b'\nxref\n') + 1
+    assert int(data[data.rindex(b'startxref') + 9:].split()[0]) == xref
+    lines = data[xref:].split(b'\n')
+    count = int(lines[1].split()[1])
+    for idnum, line in enumerate(lines[3:3 + count - 1], start=1):
+        offset = int(line.split()[0])
+        assert data[offset:].startswith(f"{idnum} 0 obj".encode())
+
+
+def test_streaming_merge_flushes_large_inputs_in_batches(make_pdf, make_image_pdf, app_config, monkeypatch):
+    large = make_image_pdf('large.pdf', [f"large {n}" for n in range(1, 7)])
+    assert os.path.getsize(large) > 1024 * 1024
+    app_config['MERGE_MEMORY_BUDGET_MB'] = 1
+    small = make_pdf('small.pdf', ['small 1'])
+
+    batches = []
+    original = PdfWriter.add_page
+
+    def counting_add_page(writer, page, *args, **kwargs):
+        if not batches or batches[-1][0] is not writer:
+            batches.append([writer, 0])
+        batches[-1][1] += 1
+        return original(writer, page, *args, **kwargs)
+
+    monkeypatch.setattr(PdfWriter, 'add_page', counting_add_page)
+    output = PDFOperations.merge_pdfs_streaming([small, large], app_config)
+
+    # The large input is split across batches smaller than its page count
+    assert len(batches) > 2
+    assert max(count for _, count in batches[1:]) < 6
+    assert page_texts(output) == ['small 1'] + [f"large {n}" for n in range(1, 7)]
+
+
+def test_streaming_merge_rejects_encrypted_input_cleanly(make_pdf, app_config, tmp_path):
+    plain = make_pdf('plain.pdf', ['plain'])
+    writer = PdfWriter()
+    writer.append(make_pdf('secret_source.pdf', ['secret']))
+    writer.encrypt('secret1')
+    encrypted = str(tmp_path / 'encrypted.pdf')
+    with open(encrypted, 'wb') as f:
+        writer.write(f)
+    before = set(os.listdir(tmp_path))
+
+    assert PDFOperations.merge_pdfs_streaming([plain, encrypted], app_config) is None
+    assert PDFOperations.merge_pdfs([plain, encrypted], app_config) is None
+    assert set(os.listdir(tmp_path)) == before
@@ -0,0 +1,80 @@
+"""Schema versioning and migrations"""
+import sqlite3
+
+import pytest
+
+import database
+from database import MIGRATIONS, SCHEMA_VERSION, check_schema, run_migrations
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """An unmigrated database path used by every get_db_connection call"""
+    path = str(tmp_path / 'conversions.db')
+    monkeypatch.setattr(database, 'DB_PATH', path)
+    monkeypatch.setattr(database, '_pool', database.ConnectionPool(path, 2, 5000, 'NORMAL'))
+    return path
+
+
+def query(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def columns(path, table):
+    return [row[1] for row in query(path, f'PRAGMA table_info({table})')]
+
+
+def test_new_database_gets_every_migration(db_path):
+    assert run_migrations() == SCHEMA_VERSION
+
+    assert [row[0] for row in query(db_path, 'SELECT version FROM schema_version ORDER BY version')] == [
+        version for version, _, _ in MIGRATIONS
+    ]
+    assert 'owner' in columns(db_path, 'jobs')
+    assert query(db_path, "SELECT name FROM sqlite_master WHERE name = 'idx_conversions_user_timestamp'")
+    # A second run finds nothing to do
+    assert run_migrations() == SCHEMA_VERSION
+    assert len(query(db_path, 'SELECT * FROM schema_version')) == len(MIGRATIONS)
+
+
+def test_database_from_before_versioning_is_upgraded_in_place(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE conversions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL, conversion_type TEXT NOT NULL,
+        output_file TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.execute(
+        "INSERT INTO conversions (filename, conversion_type, output_file) VALUES ('a.pdf', 'merge-pdf', 'b.pdf')"
+    )
+    conn.commit()
+    conn.close()
+
+    assert run_migrations() == SCHEMA_VERSION
+
+    assert 'user_id' in columns(db_path, 'conversions')
+    assert query(db_path, 'SELECT filename, user_id FROM conversions') == [('a.pdf', None)]
+
+
+def test_outdated_schema_is_left_alone_without_auto_migrate(db_path):
+    assert check_schema(auto_migrate=False) == 0
+    assert query(db_path, "SELECT name FROM sqlite_master WHERE name = 'conversions'") == []
+
+    assert check_schema(auto_migrate=True) == SCHEMA_VERSION
+    assert check_schema(auto_migrate=False) == SCHEMA_VERSION
+
+
+def test_failed_migration_rolls_back_the_whole_run(db_path, monkeypatch):
+    def fail(conn):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(database, 'MIGRATIONS', MIGRATIONS + [(SCHEMA_VERSION + 1, 'Broken', fail)])
+
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations()
+
+    assert query(db_path, 'SELECT version FROM schema_version') == []
+    assert query(db_path, "SELECT name FROM sqlite_master WHERE name = 'conversions'") == []
@@ -0,0 +1,41 @@
+"""Word to PDF through LibreOffice: the warm UNO pool stays off unless enabled"""
+import pytest
+
+import office_pool
+
+
+@pytest.fixture
+def soffice(monkeypatch):
+    """Pretend LibreOffice and the UNO bridge are installed, and record one-off conversions"""
+    cold = []
+    monkeypatch.setattr(office_pool, 'find_soffice', lambda configured_path=None: '/usr/bin/soffice')
+    monkeypatch.setattr(office_pool, 'uno', object())
+    monkeypatch.setattr(office_pool, 'convert_cold', lambda *args: cold.append(args))
+    monkeypatch.setattr(office_pool, '_pool', None)
+    monkeypatch.setattr(office_pool, '_config', {})
+    yield cold
+    office_pool.shutdown_office_pool()
+
+
+def test_pool_is_off_by_default(soffice, monkeypatch):
+    started = []
+    monkeypatch.setattr(office_pool.OfficePool, 'start', lambda pool: started.append(pool))
+    office_pool.start_office_pool({'WORD_TO_PDF_POOL_SIZE': 2})
+
+    assert office_pool.convert_word_to_pdf('in.docx', 'out.pdf') == 'out.pdf'
+    assert started == []
+    assert soffice == [('/usr/bin/soffice', 'in.docx', 'out.pdf', 120)]
+
+
+def test_enabled_pool_starts_on_first_conversion(soffice, monkeypatch):
+    started = []
+    monkeypatch.setattr(office_pool.OfficePool, 'start', lambda pool: started.append(pool))
+    monkeypatch.setattr(office_pool.OfficePool, 'convert', lambda pool, input_path, output_path: None)
+    office_pool.start_office_pool({'WORD_TO_PDF_POOL': True, 'WORD_TO_PDF_POOL_SIZE': 2})
+
+    assert started == []
+    office_pool.convert_word_to_pdf('in.docx', 'out.pdf')
+    office_pool.convert_word_to_pdf('in.docx', 'out.pdf')
+
+    assert len(started) == 1 and len(started[0].workers) == 2
+    assert soffice == []
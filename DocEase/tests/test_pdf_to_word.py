@@ -0,0 +1,46 @@
+"""Page-ranged PDF to Word, on the calling thread and on the shared worker pool"""
+import pytest
+from docx import Document
+
+import converter_ops
+import process_pools
+from converter_ops import convert_pdf_to_word
+
+
+@pytest.fixture(autouse=True)
+def stop_pools():
+    yield
+    process_pools.shutdown_process_pools()
+
+
+def docx_text(path):
+    return [paragraph.text.strip() for paragraph in Document(path).paragraphs if paragraph.text.strip()]
+
+
+@pytest.fixture
+def five_pages(make_pdf):
+    return make_pdf('doc.pdf', [f"Section {n}" for n in range(1, 6)])
+
+
+def test_only_the_requested_pages_are_converted(five_pages, tmp_path):
+    output = convert_pdf_to_word(five_pages, str(tmp_path / 'doc.docx'), 2, 4, workers=1)
+
+    assert docx_text(output) == ['Section 2', 'Section 3', 'Section 4']
+
+
+def test_worker_processes_produce_the_same_document(five_pages, tmp_path, monkeypatch):
+    monkeypatch.setattr(converter_ops, 'PDF_TO_WORD_PARALLEL_MIN_PAGES', 1)
+
+    serial = convert_pdf_to_word(five_pages, str(tmp_path / 'serial.docx'), workers=1)
+    parallel = convert_pdf_to_word(five_pages, str(tmp_path / 'parallel.docx'), workers=2)
+
+    assert docx_text(parallel) == docx_text(serial) == [f"Section {n}" for n in range(1, 6)]
+    assert 'pdf-to-word' in process_pools._pools
+    # The per-run JSON files live in a temp directory that is removed afterwards
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['doc.pdf', 'parallel.docx', 'serial.docx']
+
+
+@pytest.mark.parametrize('start_page, end_page', [(-1, 2), (3, 6), (4, 2)])
+def test_invalid_ranges_are_refused(five_pages, tmp_path, start_page, end_page):
+    with pytest.raises(ValueError, match='Invalid page range'):
+        convert_pdf_to_word(five_pages, str(tmp_path / 'doc.docx'), start_page, end_page)
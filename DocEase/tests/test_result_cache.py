@@ -0,0 +1,41 @@
+"""Result cache byte budget shared by every process using the directory"""
+import os
+
+from result_cache import ResultCache
+
+
+def write_result(path, size):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+    return str(path)
+
+
+def directory_bytes(cache_dir):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(cache_dir) for name in names if name != '.lock'
+    )
+
+
+def test_budget_covers_entries_stored_by_other_processes(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    # Two instances on one directory stand in for two worker processes
+    first = ResultCache(cache_dir, 3000)
+    second = ResultCache(cache_dir, 3000)
+
+    first.store('a', write_result(tmp_path / 'a.pdf', 1000))
+    second.store('b', write_result(tmp_path / 'b.pdf', 1000))
+    first.store('c', write_result(tmp_path / 'c.pdf', 1000))
+    assert directory_bytes(cache_dir) == 3000
+
+    # A hit in one process refreshes the entry for all of them
+    now = os.path.getmtime(os.path.join(cache_dir, 'c'))
+    for age, key in ((30, 'a'), (20, 'b'), (10, 'c')):
+        os.utime(os.path.join(cache_dir, key), (now - age, now - age))
+    assert second.restore('a', str(tmp_path / 'restored.pdf'))
+
+    second.store('d', write_result(tmp_path / 'd.pdf', 1000))
+    assert directory_bytes(cache_dir) <= 3000
+    assert sorted(name for name in os.listdir(cache_dir) if not name.startswith('.')) == ['a', 'c', 'd']
+    assert first.restore('b', output_dir=str(tmp_path)) is None
+    assert first.stats()['entries'] == 3 and first.stats()['bytes'] == 3000
@@ -0,0 +1,53 @@
+"""Rotation with and without incremental updates"""
+import os
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdf_ops import RotateOps
+
+
+def rotations(path):
+    reader = PdfReader(path)
+    return [int(page.get('/Rotate', 0)) for page in reader.pages]
+
+
+def test_incremental_rotation_appends_to_the_original(make_pdf, tmp_path):
+    source = make_pdf('source.pdf', ['one', 'two', 'three'])
+    output = str(tmp_path / 'rotated.pdf')
+
+    assert RotateOps.rotate(source, output, 90, pages='2-3', incremental=True)
+
+    with open(source, 'rb') as original, open(output, 'rb') as rotated:
+        assert rotated.read(os.path.getsize(source)) == original.read()
+    assert rotations(output) == [0, 90, 90]
+    assert [page.extract_text().strip() for page in PdfReader(output).pages] == ['one', 'two', 'three']
+
+
+def test_incremental_rotation_of_a_cross_reference_stream_file(make_pdf, tmp_path):
+    fitz = pytest.importorskip('fitz')
+    plain = make_pdf('plain.pdf', ['one', 'two'])
+    source = str(tmp_path / 'xref_stream.pdf')
+    with fitz.open(plain) as document:
+        document.save(source, use_objstms=1)
+    with open(source, 'rb') as f:
+        assert b'/XRef' in f.read()
+    output = str(tmp_path / 'rotated.pdf')
+
+    assert RotateOps.rotate(source, output, 270, incremental=True)
+
+    with open(source, 'rb') as original, open(output, 'rb') as rotated:
+        assert rotated.read(os.path.getsize(source)) == original.read()
+    assert rotations(output) == [270, 270]
+
+
+def test_failed_incremental_rotation_falls_back_to_a_rewrite(make_pdf, tmp_path, monkeypatch):
+    source = make_pdf('source.pdf', ['one', 'two'])
+    output = str(tmp_path / 'rotated.pdf')
+
+    def broken(*args, **kwargs):
+        raise KeyError('/Kids')
+    monkeypatch.setattr(RotateOps, 'rotate_incremental', staticmethod(broken))
+
+    assert RotateOps.rotate(source, output, 180, incremental=True)
+    assert rotations(output) == [180, 180]
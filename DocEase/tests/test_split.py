@@ -0,0 +1,116 @@
+"""Splitting into single pages, serially and on the shared split pool, and into page ranges"""
+import io
+import zipfile
+
+import pytest
+from PyPDF2 import PdfReader
+
+import process_pools
+from pdf_ops import PDFOperations
+
+
+@pytest.fixture
+def parallel_config(app_config):
+    yield dict(app_config, SPLIT_WORKERS=2, SPLIT_CHUNK_PAGES=3, SPLIT_PARALLEL_MIN_PAGES=0)
+    process_pools.shutdown_process_pools()
+
+
+def zip_pages(zip_path):
+    with zipfile.ZipFile(zip_path) as archive:
+        return [
+            (name, PdfReader(io.BytesIO(archive.read(name))).pages[0].extract_text().strip())
+            for name in archive.namelist()
+        ]
+
+
+def test_parallel_split_matches_serial(make_pdf, app_config, parallel_config):
+    pdf_path = make_pdf('doc.pdf', [f"page {n}" for n in range(1, 12)])
+
+    serial = zip_pages(PDFOperations.split_pdf(pdf_path, app_config, 2, 10))
+    parallel = zip_pages(PDFOperations.split_pdf(pdf_path, parallel_config, 2, 10))
+
+    assert parallel == serial
+    assert [text for _, text in parallel] == [f"page {n}" for n in range(2, 11)]
+
+
+def test_requests_share_one_split_pool(make_pdf, parallel_config):
+    pdf_path = make_pdf('doc.pdf', [f"page {n}" for n in range(1, 8)])
+
+    PDFOperations.split_pdf(pdf_path, parallel_config)
+    pool = process_pools.get_process_pool('split', 2)
+    PDFOperations.split_pdf(pdf_path, parallel_config, 1, 6)
+
+    assert process_pools.get_process_pool('split', 2) is pool
+
+
+def test_closing_a_streamed_split_cancels_queued_chunks(make_pdf, parallel_config, monkeypatch):
+    pdf_path = make_pdf('doc.pdf', [f"page {n}" for n in range(1, 31)])
+    pool = process_pools.get_process_pool('split', 2)
+    pool_submit = pool.submit
+    futures = []
+
+    def submit(func, *args):
+        future = pool_submit(func, *args)
+        futures.append(future)
+        return future
+
+    monkeypatch.setattr(pool, 'submit', submit, raising=False)
+    _, chunks = PDFOperations.split_pdf_stream(pdf_path, parallel_config)
+    next(chunks)
+    chunks.close()
+
+    # Ten chunks of three pages, but only workers + 1 are submitted ahead of the reader
+    assert len(futures) == 3
+
+
+def zip_documents(zip_path):
+    """{archive name: page texts} for a ZIP of multi-page PDFs"""
+    with zipfile.ZipFile(zip_path) as archive:
+        return {
+            name: [page.extract_text().strip() for page in PdfReader(io.BytesIO(archive.read(name))).pages]
+            for name in archive.namelist()
+        }
+
+
+@pytest.fixture
+def ten_pages(make_pdf):
+    return make_pdf('doc.pdf', [f"page {n}" for n in range(1, 11)])
+
+
+def test_explicit_ranges_with_single_pages_and_an_open_end(ten_pages, app_config):
+    documents = zip_documents(PDFOperations.split_pdf_ranges(ten_pages, app_config, range_spec='1-3, 5, 8-'))
+
+    assert documents == {
+        'doc_pages_1-3.pdf': ['page 1', 'page 2', 'page 3'],
+        'doc_pages_5-5.pdf': ['page 5'],
+        'doc_pages_8-10.pdf': ['page 8', 'page 9', 'page 10'],
+    }
+
+
+@pytest.mark.parametrize('range_spec', ['0-2', '4-11', '6-3', 'a-b', ','])
+def test_invalid_ranges_are_refused(ten_pages, app_config, range_spec):
+    assert PDFOperations.split_pdf_ranges(ten_pages, app_config, range_spec=range_spec) is None
+
+
+def test_every_n_pages_keeps_the_remainder(ten_pages, app_config):
+    documents = zip_documents(PDFOperations.split_pdf_ranges(ten_pages, app_config, every_pages=4))
+
+    assert sorted(documents) == ['doc_pages_1-4.pdf', 'doc_pages_5-8.pdf', 'doc_pages_9-10.pdf']
+
+
+def test_size_capped_chunks_stay_under_the_limit(make_image_pdf, app_config):
+    pdf_path = make_image_pdf('images.pdf', [f"page {n}" for n in range(1, 7)])
+    limit_mb = 1.2
+
+    zip_path = PDFOperations.split_pdf_ranges(pdf_path, app_config, max_chunk_mb=limit_mb)
+
+    with zipfile.ZipFile(zip_path) as archive:
+        sizes = [info.file_size for info in archive.infolist()]
+        texts = [
+            page.extract_text().strip()
+            for name in archive.namelist()
+            for page in PdfReader(io.BytesIO(archive.read(name))).pages
+        ]
+    assert len(sizes) > 1
+    assert all(size <= limit_mb * 1024 * 1024 for size in sizes)
+    assert texts == [f"page {n}" for n in range(1, 7)]
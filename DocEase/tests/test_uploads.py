@@ -0,0 +1,74 @@
+"""Single-pass upload validation and hashing"""
+import hashlib
+import io
+import os
+
+import pytest
+from flask import request, jsonify
+
+from uploads import save_upload
+
+PDF = b'%PDF-1.4\n' + b'0' * 4096
+
+
+@pytest.fixture
+def client(flask_app, tmp_path):
+    @flask_app.route('/upload', methods=['POST'])
+    def upload():
+        file = request.files['file']
+        try:
+            digest = save_upload(file, os.path.join(str(tmp_path), 'saved_' + file.filename), 2048 * 4)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        return jsonify(sha256=digest)
+
+    return flask_app.test_client()
+
+
+def post(client, data, filename):
+    return client.post('/upload', data={'file': (io.BytesIO(data), filename)}, content_type='multipart/form-data')
+
+
+def leftovers(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith('.upload-'))
+
+
+def test_valid_upload_is_hashed_while_it_arrives(client, tmp_path):
+    response = post(client, PDF, 'input.pdf')
+
+    assert response.status_code == 200
+    assert response.get_json()['sha256'] == hashlib.sha256(PDF).hexdigest()
+    assert (tmp_path / 'saved_input.pdf').read_bytes() == PDF
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize('data, filename', [
+    (b'MZ\x90\x00' + b'0' * 4096, 'input.pdf'),
+    (PDF, 'photo.png'),
+    # Shorter than any signature
+    (b'%P', 'input.pdf'),
+])
+def test_content_not_matching_the_extension_is_rejected(client, tmp_path, data, filename):
+    response = post(client, data, filename)
+
+    assert response.status_code == 400
+    assert 'Invalid or corrupted' in response.get_json()['error']
+    assert not (tmp_path / f'saved_{filename}').exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_file_over_the_size_limit_is_rejected(client, tmp_path):
+    response = post(client, PDF * 3, 'input.pdf')
+
+    assert response.status_code == 400
+    assert 'too large' in response.get_json()['error']
+    assert leftovers(tmp_path) == []
+
+
+def test_body_over_max_content_length_aborts_the_request(client, flask_app, tmp_path):
+    flask_app.config['MAX_CONTENT_LENGTH'] = 4096
+
+    response = post(client, PDF * 2, 'input.pdf')
+
+    assert response.status_code == 413
+    assert leftovers(tmp_path) == []
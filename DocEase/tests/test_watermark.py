@@ -0,0 +1,69 @@
+"""Watermarking with shared Form XObject stamps and merged page content"""
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4, letter, landscape
+
+from pdf_ops import WatermarkOps
+
+
+def page_texts(path):
+    return [page.extract_text() for page in PdfReader(path).pages]
+
+
+@pytest.mark.parametrize('shared_stamp', [True, False])
+def test_watermark_keeps_page_text(make_pdf, tmp_path, shared_stamp):
+    source = make_pdf('source.pdf', ['first page', 'second page'])
+    output = str(tmp_path / 'watermarked.pdf')
+
+    assert WatermarkOps.add_text_watermark(source, output, 'CONFIDENTIAL', shared_stamp=shared_stamp)
+
+    texts = page_texts(output)
+    assert len(texts) == 2
+    assert all('CONFIDENTIAL' in text for text in texts)
+    assert 'first page' in texts[0] and 'second page' in texts[1]
+
+
+def test_watermarking_twice_keeps_both_stamps(make_pdf, tmp_path):
+    source = make_pdf('source.pdf', ['body'])
+    once = str(tmp_path / 'once.pdf')
+    twice = str(tmp_path / 'twice.pdf')
+
+    assert WatermarkOps.add_text_watermark(source, once, 'DRAFT')
+    assert WatermarkOps.add_text_watermark(once, twice, 'APPROVED')
+
+    page = PdfReader(twice).pages[0]
+    assert len(page['/Resources']['/XObject']) == 2
+    text = page.extract_text()
+    assert 'DRAFT' in text and 'APPROVED' in text
+
+
+def test_one_stamp_per_page_size_and_rotation_rendered_once(tmp_path):
+    writer = PdfWriter()
+    for size in (A4, A4, landscape(letter), A4, landscape(letter)):
+        writer.add_blank_page(*size)
+    writer.pages[3].rotate(90)
+    source = str(tmp_path / 'mixed.pdf')
+    with open(source, 'wb') as f:
+        writer.write(f)
+    # Text unique to this test, so earlier renders cannot be in the cache
+    text = 'MIXED SIZES 1f3a'
+
+    before = WatermarkOps.stamp_cache_info()
+    assert WatermarkOps.add_text_watermark(source, str(tmp_path / 'first.pdf'), text)
+    after_first = WatermarkOps.stamp_cache_info()
+    assert WatermarkOps.add_text_watermark(source, str(tmp_path / 'second.pdf'), text)
+    after_second = WatermarkOps.stamp_cache_info()
+
+    # A4, landscape letter and rotated A4
+    assert after_first.misses - before.misses == 3
+    assert after_second.misses == after_first.misses
+    assert after_second.hits - after_first.hits == 3
+
+    pages = PdfReader(str(tmp_path / 'second.pdf')).pages
+    stamps = [
+        page['/Resources']['/XObject'].raw_get(name).idnum
+        for page in pages
+        for name in page['/Resources']['/XObject']
+    ]
+    assert stamps[0] == stamps[1] and stamps[2] == stamps[4]
+    assert len(set(stamps)) == 3
@@ -0,0 +1,373 @@
+"""Upload handling: single-pass validation of request files, and resumable chunked uploads"""
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import logging
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from security import MAGIC_BYTES_LENGTH, matches_magic_bytes, get_file_extension
+from result_cache import remember_digest
+
+logger = logging.getLogger(__name__)
+
+# Bytes copied per read when an upload has to be copied rather than moved
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+
+# Chunked uploads that receive no chunk for this many minutes are removed
+CHUNKED_UPLOAD_IDLE_MINUTES = int(os.getenv('CHUNKED_UPLOAD_IDLE_MINUTES', 60))
+# Subdirectory of the upload folder holding resumable upload state; cleanup_uploads leaves it alone
+CHUNKED_UPLOAD_DIR = 'chunked'
+
+
+class UploadLimitExceeded(ValueError):
+    """Starting a chunked upload would exceed a limit on open uploads or reserved bytes"""
+
+
+class UploadSpool:
+    """
+    Writable, readable file for one uploaded file, kept in the upload folder.
+
+    Every chunk the form parser writes is size-checked and hashed. The first
+    bytes are checked against the extension's magic bytes, and a mismatch
+    stops all further disk writes while the rest of the body is drained.
+    Too large a file aborts the request. The finished file is moved into
+    place by save_upload, so it is never read back for validation.
+    """
+
+    def __init__(self, filename, upload_folder, max_size):
+        self.filename = filename or ''
+        self.extension = get_file_extension(self.filename)
+        self.max_size = max_size
+        self.size = 0
+        self.error = None
+        self._header = b''
+        self._header_checked = False
+        self._digest = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(dir=upload_folder, prefix='.upload-', delete=False)
+        self.path = self._file.name
+
+    def _check_header(self):
+        self._header_checked = True
+        if not matches_magic_bytes(self.extension, self._header):
+            kind = 'PDF' if self.extension == 'pdf' else f'.{self.extension}'
+            self.error = f'Invalid or corrupted {kind} file: {self.filename}'
+            logger.warning(f"Upload rejected on its first bytes: {self.filename}")
+            self._file.truncate(0)
+
+    def write(self, data):
+        if self.error:
+            return len(data)
+        self.size += len(data)
+        if self.size > self.max_size:
+            logger.warning(f"Upload exceeded {self.max_size} bytes: {self.filename}")
+            raise RequestEntityTooLarge()
+        if not self._header_checked:
+            self._header += data[:MAGIC_BYTES_LENGTH - len(self._header)]
+            if len(self._header) >= MAGIC_BYTES_LENGTH:
+                self._check_header()
+                if self.error:
+                    return len(data)
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset, whence=0):
+        # The parser rewinds once the part is complete
+        self.finish()
+        return self._file.seek(offset, whence)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        return self._file.readline(size)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        return self._file.flush()
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def finish(self):
+        """Run the header check on files shorter than any signature; returns the rejection reason or None"""
+        if not self._header_checked:
+            self._check_header()
+        return self.error
+
+    def move_to(self, save_path):
+        """Move the finished upload to save_path; a rename within the upload folder"""
+        self._file.close()
+        os.replace(self.path, save_path)
+        self.path = None
+
+    def close(self):
+        self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+            self.path = None
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class StreamingRequest(Request):
+    """Request that spools file uploads through UploadSpool instead of anonymous temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool(
+            filename, current_app.config['UPLOAD_FOLDER'], current_app.config['MAX_CONTENT_LENGTH']
+        )
+
+
+def save_upload(file, save_path, max_size):
+    """
+    Store an uploaded file at save_path and return its SHA-256.
+
+    Files spooled by StreamingRequest were validated and hashed as they
+    arrived and are only renamed. Other streams are copied once in
+    UPLOAD_CHUNK_SIZE blocks with the same checks.
+
+    Raises:
+        ValueError: The file is too large or its content does not match its extension.
+    """
+    spool = file.stream
+    if not isinstance(spool, UploadSpool):
+        spool = UploadSpool(file.filename, os.path.dirname(save_path), max_size)
+        try:
+            for block in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                spool.write(block)
+                if spool.error:
+                    break
+        except RequestEntityTooLarge:
+            spool.close()
+            raise ValueError(f'File {file.filename} is too large')
+
+    if spool.size > max_size:
+        spool.close()
+        raise ValueError(f'File {file.filename} is too large')
+    error = spool.finish()
+    if error:
+        spool.close()
+        raise ValueError(error)
+
+    spool.move_to(save_path)
+    remember_digest(save_path, spool.sha256)
+    return spool.sha256
+
+
+class ChunkedUpload:
+    """
+    A file assembled in the upload folder from byte ranges sent in any order.
+
+    The data goes straight into a file preallocated to its final size, so
+    chunks can arrive in parallel and a dropped connection only loses the
+    chunk in flight. Each completed chunk appends one "start end" line to
+    a ranges file; O_APPEND keeps those writes whole across threads and
+    processes. Metadata sits in a JSON file next to them, all in the
+    CHUNKED_UPLOAD_DIR subdirectory so the files survive a worker exit.
+
+    Every open upload reserves its full size on disk, so the number of open
+    uploads and the bytes they reserve are capped per owner (a user or an
+    anonymous session) and overall, and uploads left idle are removed.
+    """
+
+    def __init__(self, upload_folder, upload_id, meta):
+        self.upload_folder = upload_folder
+        self.upload_id = upload_id
+        self.filename = meta['filename']
+        self.size = meta['size']
+        self.user_id = meta.get('user_id')
+        self.owner = meta.get('owner')
+
+    def _path(self, suffix):
+        return os.path.join(self.upload_folder, CHUNKED_UPLOAD_DIR, f"{self.upload_id}.{suffix}")
+
+    @classmethod
+    def create(cls, upload_folder, filename, size, user_id=None, owner=None, limits=None):
+        """
+        Reserve a new upload of size bytes and return it.
+
+        limits holds CHUNKED_UPLOAD_MAX_PER_OWNER, CHUNKED_UPLOAD_MAX_OWNER_MB,
+        CHUNKED_UPLOAD_MAX_OPEN and CHUNKED_UPLOAD_MAX_RESERVED_MB. The
+        metadata is written before the limits are checked, so concurrent
+        requests, in any process, see each other's reservations; the file is
+        preallocated only once they pass.
+
+        Raises:
+            UploadLimitExceeded: The upload would exceed a limit.
+        """
+        meta = {'filename': filename, 'size': size, 'user_id': user_id, 'owner': owner}
+        upload = cls(upload_folder, uuid.uuid4().hex, meta)
+        os.makedirs(os.path.join(upload_folder, CHUNKED_UPLOAD_DIR), exist_ok=True)
+        open(upload._path('ranges'), 'wb').close()
+        with open(upload._path('json'), 'w') as f:
+            json.dump(meta, f)
+        # Listing the open uploads also removes idle ones
+        uploads = cls.open_uploads(upload_folder)
+        if limits:
+            try:
+                upload._check_limits(uploads, limits)
+            except UploadLimitExceeded as e:
+                upload.discard()
+                logger.warning(f"Chunked upload refused for {owner}: {str(e)}")
+                raise
+        with open(upload._path('part'), 'wb') as f:
+            # Sparse on most file systems; blocks are allocated as chunks land
+            f.truncate(size)
+        logger.info(f"Chunked upload {upload.upload_id} started: {filename} ({size} bytes)")
+        return upload
+
+    def _check_limits(self, uploads, limits):
+        owned = [upload for upload in uploads if upload.owner == self.owner]
+        if len(owned) > limits['CHUNKED_UPLOAD_MAX_PER_OWNER']:
+            raise UploadLimitExceeded(
+                f"At most {limits['CHUNKED_UPLOAD_MAX_PER_OWNER']} uploads can be open at once; "
+                f"finish or delete one first"
+            )
+        if sum(upload.size for upload in owned) > limits['CHUNKED_UPLOAD_MAX_OWNER_MB'] * 1024 * 1024:
+            raise UploadLimitExceeded(
+                f"Open uploads can hold at most {limits['CHUNKED_UPLOAD_MAX_OWNER_MB']} MB; "
+                f"finish or delete one first"
+            )
+        if (len(uploads) > limits['CHUNKED_UPLOAD_MAX_OPEN']
+                or sum(upload.size for upload in uploads) > limits['CHUNKED_UPLOAD_MAX_RESERVED_MB'] * 1024 * 1024):
+            raise UploadLimitExceeded('The server has too many uploads in progress; try again later')
+
+    @classmethod
+    def load(cls, upload_folder, upload_id):
+        """Return the upload, or None for an unknown or malformed ID"""
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+            return None
+        try:
+            with open(os.path.join(upload_folder, CHUNKED_UPLOAD_DIR, f"{upload_id}.json")) as f:
+                return cls(upload_folder, upload_id, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def open_uploads(cls, upload_folder):
+        """Uploads not yet finalized, after removing those idle for CHUNKED_UPLOAD_IDLE_MINUTES"""
+        cutoff = time.time() - CHUNKED_UPLOAD_IDLE_MINUTES * 60
+        uploads = []
+        state_dir = os.path.join(upload_folder, CHUNKED_UPLOAD_DIR)
+        for filename in os.listdir(state_dir) if os.path.isdir(state_dir) else []:
+            if not filename.endswith('.json'):
+                continue
+            upload = cls.load(upload_folder, filename[:-len('.json')])
+            if upload is None:
+                continue
+            if upload.last_activity() < cutoff:
+                upload.discard()
+                logger.info(f"Chunked upload {upload.upload_id} expired: {upload.filename}")
+                continue
+            uploads.append(upload)
+        return uploads
+
+    def last_activity(self):
+        """Time of the last chunk written, or of creation if none was"""
+        latest = 0
+        for suffix in ('part', 'ranges', 'json'):
+            try:
+                latest = max(latest, os.path.getmtime(self._path(suffix)))
+            except OSError:
+                pass
+        return latest
+
+    def write_chunk(self, offset, stream, length):
+        """
+        Write length bytes from stream at offset, in UPLOAD_CHUNK_SIZE blocks.
+
+        Raises:
+            ValueError: The range falls outside the file or the stream ended early.
+        """
+        if offset < 0 or length <= 0 or offset + length > self.size:
+            raise ValueError(f"Chunk {offset}+{length} is outside the {self.size}-byte file")
+
+        remaining = length
+        with open(self._path('part'), 'r+b') as f:
+            f.seek(offset)
+            while remaining:
+                block = stream.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+        if remaining:
+            # Only the bytes of complete chunks count as received
+            raise ValueError(f"Chunk at {offset} ended after {length - remaining} of {length} bytes")
+
+        descriptor = os.open(self._path('ranges'), os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(descriptor, f"{offset} {offset + length}\n".encode())
+        finally:
+            os.close(descriptor)
+
+    def received_ranges(self):
+        """Merged [start, end) ranges written so far"""
+        with open(self._path('ranges')) as f:
+            ranges = sorted(tuple(map(int, line.split())) for line in f if line.strip())
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def missing_ranges(self):
+        missing = []
+        position = 0
+        for start, end in self.received_ranges():
+            if start > position:
+                missing.append([position, start])
+            position = max(position, end)
+        if position < self.size:
+            missing.append([position, self.size])
+        return missing
+
+    def received_bytes(self):
+        return sum(end - start for start, end in self.received_ranges())
+
+    def finalize(self, save_path):
+        """
+        Move the complete file to save_path and return its SHA-256.
+
+        One read pass hashes the file and checks its signature against its
+        extension, as save_upload does for single-request uploads.
+
+        Raises:
+            ValueError: Ranges are missing or the content does not match the extension.
+        """
+        missing = self.missing_ranges()
+        if missing:
+            raise ValueError(f"Upload is incomplete: {len(missing)} ranges missing, first at byte {missing[0][0]}")
+
+        digest = hashlib.sha256()
+        with open(self._path('part'), 'rb') as f:
+            header = f.read(MAGIC_BYTES_LENGTH)
+            if not matches_magic_bytes(get_file_extension(self.filename), header):
+                raise ValueError(f"Invalid or corrupted file: {self.filename}")
+            digest.update(header)
+            for block in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(block)
+
+        os.replace(self._path('part'), save_path)
+        self.discard()
+        remember_digest(save_path, digest.hexdigest())
+        logger.info(f"Chunked upload {self.upload_id} finalized: {os.path.basename(save_path)}")
+        return digest.hexdigest()
+
+    def discard(self):
+        for suffix in ('part', 'ranges', 'json'):
+            try:
+                os.remove(self._path(suffix))
+            except FileNotFoundError:
+                pass